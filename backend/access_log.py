@@ -0,0 +1,126 @@
+import logging
+import os
+import queue
+import random
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+# Access records are emitted by log_access() as a plain tuple of ACCESS_FIELDS and
+# only turned into text by AccessLogFormatter on the listener thread, so the request
+# path does no string formatting and no I/O.
+ACCESS_FIELDS = ("ip", "method", "path", "user_agent", "query", "status", "duration_ms")
+
+LOG_FORMAT = '%(asctime)s | %(name)s | %(message)s'
+
+
+class AccessLogFormatter(logging.Formatter):
+    """
+    Formats access records as
+    `<time> | visitor_tracker | IP: .. | Time: .. | Method: .. | Path: .. | UserAgent: .. | Status: .. | Duration: ..ms`
+    (field order kept for scripts/analyze-visitor-logs.sh); other records use LOG_FORMAT.
+    Both timestamps come from the record itself - no extra clock read per request.
+    """
+
+    def __init__(self):
+        super().__init__(LOG_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        access = getattr(record, "access", None)
+        if access is None:
+            return super().format(record)
+        ip, method, path, user_agent, query, status, duration_ms = access
+        timestamp = datetime.fromtimestamp(record.created).isoformat()
+        line = (f"{timestamp} | {record.name} | IP: {ip} | Time: {timestamp} | Method: {method} | Path: {path}"
+                f" | UserAgent: {user_agent} | Status: {status} | Duration: {duration_ms:.1f}ms")
+        if query:
+            line += f" | Query: {query}"
+        return line
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that hands the record over untouched. The stock prepare()
+    formats the message in the calling thread; here everything stays in one
+    process, so formatting is left to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class AppendFileHandler(logging.Handler):
+    """
+    FileHandler replacement that writes each record with one write() on an
+    O_APPEND descriptor, so lines from several worker processes sharing the
+    file never interleave (a buffered text stream may split long lines).
+    """
+
+    def __init__(self, filename, encoding: str = "utf-8"):
+        super().__init__()
+        self.filename = os.fspath(filename)
+        self.encoding = encoding
+        self.fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            data = (self.format(record) + "\n").encode(self.encoding, "replace")
+            os.write(self.fd, data)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+        finally:
+            self.release()
+            super().close()
+
+
+class AccessLogPolicy:
+    """
+    Decides which requests get an access record: excluded paths are skipped,
+    the rest are kept with probability `sample_rate`. Client and server
+    errors (status >= 400) are always kept.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, exclude_paths: str = ""):
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self.exclude_paths = frozenset(p.strip() for p in exclude_paths.split(",") if p.strip())
+
+    def should_log(self, path: str, status: int) -> bool:
+        if status >= 400:
+            return True
+        if path in self.exclude_paths:
+            return False
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+
+def log_access(logger: logging.Logger, fields: tuple):
+    """
+    Emit one access record (fields in ACCESS_FIELDS order). Builds the record
+    directly, skipping the caller lookup logger.info() does on every call.
+    """
+    if logger.isEnabledFor(logging.INFO):
+        logger.handle(logger.makeRecord(logger.name, logging.INFO, __name__, 0, "access", None, None,
+                                        extra={"access": fields}))
+
+
+def setup_queue_logging(handlers: list, level: int = logging.INFO) -> QueueListener:
+    """
+    Route the root logger through a queue: callers only enqueue records and a
+    QueueListener thread formats and writes them to `handlers`.
+    Returns the started listener (stop() it on shutdown to flush).
+    """
+    formatter = AccessLogFormatter()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
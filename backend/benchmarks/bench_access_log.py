@@ -0,0 +1,155 @@
+"""
+Access log benchmark: per-request cost of log_visitor_middleware with the
+previous synchronous FileHandler + StreamHandler logging vs the queue-based
+access log (access_log.py), with and without sampling / path exclusion.
+
+Only the time spent on the request path is measured; the new version's
+file writes happen on the listener thread.
+
+Usage (from backend/):
+    python -m benchmarks.bench_access_log [--requests 20000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from access_log import AccessLogPolicy, log_access, setup_queue_logging
+from metrics import Registry, server_timing, start_request_timings
+
+
+class StubURL:
+    def __init__(self, path: str, query: str):
+        self.path = path
+        self.query = query
+
+
+class StubClient:
+    host = "10.0.0.7"
+
+
+class StubRequest:
+    def __init__(self, path: str, query: str = ""):
+        self.headers = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) Chrome/120.0", "X-Forwarded-For": "203.0.113.9"}
+        self.client = StubClient()
+        self.method = "GET"
+        self.url = StubURL(path, query)
+        self.scope = {}
+
+
+class StubResponse:
+    status_code = 200
+
+
+async def call_next(request):
+    return StubResponse()
+
+
+def legacy_middleware(logger: logging.Logger):
+    # Copy of the previous log_visitor_middleware body
+    async def middleware(request, call_next):
+        client_ip = request.headers.get("X-Forwarded-For", request.client.host if request.client else "unknown")
+        user_agent = request.headers.get("User-Agent", "unknown")
+        method = request.method
+        path = request.url.path
+        query_params = str(request.url.query) if request.url.query else ""
+        timestamp = datetime.now().isoformat()
+        log_message = f"IP: {client_ip} | Time: {timestamp} | Method: {method} | Path: {path} | UserAgent: {user_agent}"
+        if query_params:
+            log_message += f" | Query: {query_params}"
+        logger.info(log_message)
+        response = await call_next(request)
+        return response
+    return middleware
+
+
+def queued_middleware(logger: logging.Logger, policy: AccessLogPolicy):
+    # Same body as main.log_visitor_middleware (including its metrics)
+    metrics = Registry()
+    http_requests = metrics.counter("requests", "", ("method", "route", "status"))
+    http_latency = metrics.histogram("latency", "", ("route",))
+    http_in_flight = metrics.gauge("in_flight", "").labels()
+
+    async def middleware(request, call_next):
+        start = time.perf_counter()
+        status = 500
+        timings = start_request_timings()
+        http_in_flight.inc()
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            if timings:
+                response.headers["Server-Timing"] = server_timing(
+                    timings + [("total", (time.perf_counter() - start) * 1000, "")])
+            return response
+        finally:
+            http_in_flight.dec()
+            path = request.url.path
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            http_requests.labels(request.method, route, str(status)).inc()
+            http_latency.labels(route).observe(time.perf_counter() - start)
+            if policy.should_log(path, status):
+                headers = request.headers
+                log_access(logger, (
+                    headers.get("X-Forwarded-For") or (request.client.host if request.client else "unknown"),
+                    request.method,
+                    path,
+                    headers.get("User-Agent", "unknown"),
+                    request.url.query,
+                    status,
+                    (time.perf_counter() - start) * 1000
+                ))
+    return middleware
+
+
+async def run(middleware, requests: list) -> float:
+    start = time.perf_counter()
+    for request in requests:
+        await middleware(request, call_next)
+    return (time.perf_counter() - start) / len(requests) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Mix of API calls and "/" health probes (1 in 4)
+    requests = [StubRequest("/" if i % 4 == 0 else "/api/recommend", "stream=1" if i % 8 == 1 else "")
+                for i in range(args.requests)]
+    tmp = Path(tempfile.mkdtemp())
+    devnull = open(os.devnull, "w")
+    formatter = logging.Formatter('%(asctime)s | %(name)s | %(message)s')
+
+    legacy_logger = logging.getLogger("bench.legacy")
+    legacy_logger.propagate = False
+    legacy_logger.setLevel(logging.INFO)
+    for handler in (logging.FileHandler(tmp / "legacy.log"), logging.StreamHandler(devnull)):
+        handler.setFormatter(formatter)
+        legacy_logger.addHandler(handler)
+
+    listener = setup_queue_logging([logging.FileHandler(tmp / "queued.log"), logging.StreamHandler(devnull)])
+    queued_logger = logging.getLogger("bench.queued")
+
+    cases = [
+        ("legacy sync handlers", legacy_middleware(legacy_logger)),
+        ("queued, log all", queued_middleware(queued_logger, AccessLogPolicy())),
+        ("queued, exclude /", queued_middleware(queued_logger, AccessLogPolicy(exclude_paths="/"))),
+        ("queued, exclude / + 10% sample", queued_middleware(queued_logger, AccessLogPolicy(0.1, "/"))),
+    ]
+    print(f"{'middleware':<32} {'us/request':>11}")
+    baseline = None
+    for name, middleware in cases:
+        cost = min(asyncio.run(run(middleware, requests)) for _ in range(3))
+        baseline = baseline or cost
+        print(f"{name:<32} {cost:>11.2f}  ({baseline / cost:.1f}x)")
+    listener.stop()
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main()
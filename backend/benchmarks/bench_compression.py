@@ -0,0 +1,62 @@
+"""
+Recommendation payload size and serialization/compression cost: the
+RecommendationResponse JSON for 1x-10x synthetic responses, uncompressed
+(before) vs gzip at several levels and brotli (when installed), and what a
+304 revalidation costs once the client has the ETag.
+
+Usage (from backend/):
+    python -m benchmarks.bench_compression [--repeat 20]
+"""
+import argparse
+import contextlib
+import os
+import time
+
+from fastapi.responses import JSONResponse
+
+from benchmarks.corpus import synthetic_response
+from compression import brotli, compress, etag_for
+from stream_parser import parse_recommendation
+
+CODINGS = [("gzip", 1), ("gzip", 6), ("gzip", 9)] + ([("br", 4), ("br", 8)] if brotli is not None else [])
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli not installed - gzip only (pip install brotli to compare)")
+    for factor in (1, 3, 10):
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            payload = parse_recommendation(synthetic_response(alternatives=3 * factor, seed=factor)).dict()
+        body = JSONResponse(payload).body
+        serialize_ms = best_ms(lambda: JSONResponse(payload), args.repeat)
+        etag_ms = best_ms(lambda: etag_for(body), args.repeat)
+        print(f"\n{factor}x response: {len(body) / 1024:.1f} KB JSON, serialize {serialize_ms:.3f} ms, "
+              f"ETag {etag_ms:.3f} ms, 304 revalidation 0 B body")
+        print(f"  {'coding':<10} {'KB':>8} {'ratio':>7} {'compress ms':>12} {'total ms':>9}")
+        print(f"  {'identity':<10} {len(body) / 1024:>8.1f} {1:>7.2f} {0:>12.3f} {serialize_ms:>9.3f}")
+        for coding, level in CODINGS:
+            if coding == "br":
+                compressed = compress(body, coding, brotli_quality=level)
+                ms = best_ms(lambda: compress(body, coding, brotli_quality=level), args.repeat)
+            else:
+                compressed = compress(body, coding, gzip_level=level)
+                ms = best_ms(lambda: compress(body, coding, gzip_level=level), args.repeat)
+            print(f"  {f'{coding}-{level}':<10} {len(compressed) / 1024:>8.1f} {len(compressed) / len(body):>7.2f} "
+                  f"{ms:>12.3f} {serialize_ms + ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Upstream connection pool benchmark: drives ChatGroq completions against a
+local stand-in for the Groq API (HTTP/1.1 keep-alive, fake chat completions)
+and counts the TCP connections the server accepted.
+
+The stand-in sleeps --handshake-ms on every new connection to model the
+TCP + TLS setup a real request to api.groq.com pays when it cannot reuse one.
+
+Cases:
+- no reuse: keep-alive disabled, like a pool whose idle connections expired
+- pooled: the shared http_pool client, first request opens the connection
+- pooled + warm-up: warm_up() opened the connections before the first request
+
+Usage (from backend/):
+    python -m benchmarks.bench_http_pool [--requests 20] [--concurrency 4] [--handshake-ms 60]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import groq
+from langchain_core.messages import HumanMessage
+from langchain_groq import ChatGroq
+
+from http_pool import build_http_client, pool_stats, warm_up
+
+
+class StandInGroq:
+    """
+    Minimal keep-alive HTTP/1.1 server answering GET /openai/v1/models and
+    POST /openai/v1/chat/completions
+    """
+
+    def __init__(self, handshake_ms: float):
+        self.handshake = handshake_ms / 1000
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {k.strip().lower(): v.strip() for k, _, v in (h.partition(":") for h in header_lines if h)}
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                self.requests += 1
+                payload = json.dumps(self._respond(request_line, body)).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, request_line: str, body: bytes) -> dict:
+        if " /openai/v1/chat/completions " not in request_line:
+            return {"object": "list", "data": [{"id": "llama-3.1-8b-instant", "object": "model"}]}
+        model = json.loads(body).get("model", "llama-3.1-8b-instant")
+        return {
+            "id": f"chatcmpl-{self.requests}", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "### Frontend\n**Next.js**"},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 20, "completion_tokens": 5, "total_tokens": 25},
+        }
+
+
+async def run_case(name: str, base_url: str, server: StandInGroq, keepalive: bool, warm: int,
+                   requests: int, concurrency: int):
+    http = build_http_client(max_keepalive=concurrency if keepalive else 0)
+    client = groq.AsyncGroq(api_key="bench", base_url=base_url, http_client=http, max_retries=0)
+    model = ChatGroq(model_name="llama-3.1-8b-instant", api_key="bench", max_retries=0,
+                     async_client=client.chat.completions)
+    server.connections = 0
+    if warm:
+        await warm_up(http, f"{base_url}/openai/v1/models", warm)
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await model.ainvoke([HumanMessage(content="Recommend a stack")])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    # First request alone (what the first visitor after startup sees), then the burst
+    await one()
+    await asyncio.gather(*(one() for _ in range(requests - 1)))
+    stats = pool_stats(http)
+    await http.aclose()
+    ordered = sorted(latencies)
+    print(f"{name:<18} {server.connections:>11} {stats['reused_connections']:>7} "
+          f"{latencies[0]:>10.1f} {sum(ordered) / len(ordered):>9.1f} {ordered[int(len(ordered) * 0.95) - 1]:>9.1f}")
+
+
+async def main_async(args):
+    server = StandInGroq(args.handshake_ms)
+    base_url = await server.start()
+    print(f"{args.requests} completions, concurrency {args.concurrency}, {args.handshake_ms:.0f}ms per new connection")
+    print(f"{'case':<18} {'connections':>11} {'reused':>7} {'first ms':>10} {'avg ms':>9} {'p95 ms':>9}")
+    await run_case("no reuse", base_url, server, False, 0, args.requests, args.concurrency)
+    await run_case("pooled", base_url, server, True, 0, args.requests, args.concurrency)
+    await run_case("pooled + warm-up", base_url, server, True, args.concurrency, args.requests, args.concurrency)
+    await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--handshake-ms", type=float, default=60.0)
+    args = parser.parse_args()
+    os.environ.pop("GROQ_API_BASE", None)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Visitor reports: scripts/analyze-visitor-logs.sh's grep/awk pipelines, which
+re-read the whole access log for every report, vs log_analytics.py's
+rollups, which only read what was appended since the last run.
+
+Writes a synthetic visitor_access.log (--lines records in the format of
+access_log.AccessLogFormatter, plus non-access lines and records in the old
+format without Status) to a temporary directory, then times:
+  - each report with the shell pipelines (ANALYZE_WITH_SHELL=1)
+  - the first update (reads everything), and the reports after it, which
+    only query the rollups (in-process and as a CLI run)
+  - an update after appending --append more records
+
+and checks the rollups against a full recount after appending (with a
+partial last line), after the log is truncated (copytruncate) and after
+response logs are rotated and compressed by BackgroundLogWriter between
+updates. Exits with status 1 if a count is off.
+
+Usage (from backend/):
+    python -m benchmarks.bench_log_analytics [--lines 500000] [--append 10000]
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from access_log import AccessLogFormatter
+from log_analytics import LogAnalytics, parse_access_line
+from log_writer import BackgroundLogWriter
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SHELL_SCRIPT = BACKEND_DIR.parent / "scripts" / "analyze-visitor-logs.sh"
+REPORTS = ("summary", "daily", "geo")
+
+PATHS = ["/", "/api/recommend", "/api/generate-prompt", "/metrics", "/api/cache/stats", "/healthz"]
+AGENTS = ["Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/126.0",
+          "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) Safari/605.1.15",
+          "curl/8.5.0", "python-httpx/0.27.2", "Go-http-client/1.1 | custom probe"]
+
+
+def access_lines(count: int, seed: int, start: float) -> list:
+    """
+    `count` log lines: mostly access records, some in the old format and some other loggers' lines
+    """
+    rng = random.Random(seed)
+    formatter = AccessLogFormatter()
+    lines = []
+    for i in range(count):
+        created = start + i * 0.05
+        if i % 50 == 0:
+            stamp = datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S,000")
+            lines.append(f'{stamp} | httpx | HTTP Request: POST https://api.groq.com/openai/v1/chat "HTTP/1.1 200 OK"')
+            continue
+        ip = f"10.{rng.randrange(4)}.{rng.randrange(32)}.{rng.randrange(256)}"
+        method = "POST" if rng.random() < 0.3 else "GET"
+        record = logging.makeLogRecord({"name": "visitor_tracker", "created": created, "access": (
+            ip, method, rng.choice(PATHS), rng.choice(AGENTS), "stream=1" if rng.random() < 0.1 else "",
+            rng.choice((200, 200, 200, 304, 404, 503)), rng.random() * 900)})
+        line = formatter.format(record)
+        if i % 97 == 0:
+            line = line.split(" | Status: ")[0]  # written before Status/Duration existed
+        lines.append(line)
+    return lines
+
+
+def recount(path: Path) -> dict:
+    """
+    Ground truth from a full read: requests per IP and hour, statuses
+    """
+    ips, hours, statuses = Counter(), Counter(), Counter()
+    data = path.read_bytes()
+    for line in data[:data.rfind(b"\n") + 1].split(b"\n")[:-1]:
+        fields = parse_access_line(line)
+        if fields:
+            ips[fields[1]] += 1
+            hours[fields[0][:13]] += 1
+            if fields[5]:
+                statuses[fields[5]] += 1
+    return {"ip": ips, "hour": hours, "status": statuses}
+
+
+def matches(analytics: LogAnalytics, expected: dict) -> bool:
+    return all(dict(analytics.top(dimension, 10 ** 9)) == dict(counts) for dimension, counts in expected.items())
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def shell_report(workdir: Path, report: str) -> float:
+    env = {**os.environ, "ANALYZE_WITH_SHELL": "1"}
+    start = time.perf_counter()
+    subprocess.run(["bash", str(SHELL_SCRIPT), report], cwd=workdir, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def cli_report(log_dir: Path, report: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, str(BACKEND_DIR / "log_analytics.py"), report, "--log-dir", str(log_dir)],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def check_rotation(log_dir: Path, batches: int = 12, per_batch: int = 200) -> bool:
+    """
+    Response logs rotated and compressed by BackgroundLogWriter between updates are counted exactly once
+    """
+    writer = BackgroundLogWriter(max_bytes=64 * 1024, backups=0, flush_interval=0.05)
+    analytics = LogAnalytics(log_dir, log_dir / "rotation.db")
+    written = Counter()
+    for batch in range(batches):
+        for i in range(per_batch):
+            app_type = ("SaaS", "Gaming", 'Say "hi"')[i % 3]  # quotes are escaped in the line
+            writer.append_jsonl(log_dir / "stack_recommendation_responses.jsonl", {
+                "timestamp": datetime.now().isoformat(), "model_type": "stack_recommendation",
+                "inputs": {"appType": app_type, "scale": "MVP"},
+                "master_prompt": "x" * 300, "response_preview": "y" * 200, "response_length": 4000})
+            written[app_type] += 1
+        writer.flush()
+        if batch % 3 != 2:  # sometimes several rotations between two updates
+            analytics.update()
+    writer.close()
+    analytics.update()
+    counted = dict(analytics.top("model_type", 10)).get("stack_recommendation", 0)
+    by_app = dict(analytics.top("app_type", 10))
+    analytics.close()
+    segments = len(list(log_dir.glob("stack_recommendation_responses.*.jsonl.gz")))
+    ok = counted == sum(written.values()) and by_app == dict(written)
+    print(f"Response log rotation: {sum(written.values())} written, {counted} counted over {segments} segments: "
+          f"{'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--append", type=int, default=10_000)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory(prefix="bench-analytics-") as tmp:
+        workdir = Path(tmp)
+        log_dir = workdir / "backend" / "logs"
+        log_dir.mkdir(parents=True)
+        log = log_dir / "visitor_access.log"
+        start = time.time() - 3 * 86400
+        log.write_text("\n".join(access_lines(args.lines, 1, start)) + "\n", encoding="utf-8")
+        print(f"visitor_access.log: {args.lines} lines, {log.stat().st_size / 1e6:.0f} MB")
+
+        shell = {}
+        if shutil.which("bash") and SHELL_SCRIPT.exists():
+            shell = {report: shell_report(workdir, report) for report in REPORTS}
+
+        analytics = LogAnalytics(log_dir)
+        _, first_update = timed(analytics.update)
+        print(f"\n{'report':<10} {'shell s':>9} {'first run s':>12} {'next runs ms':>13} {'as CLI ms':>10}")
+        for report, query in (("summary", analytics.summary), ("daily", analytics.daily),
+                              ("geo", lambda: analytics.top("ip", 20))):
+            # A later report: update (nothing new) + query
+            _, later = timed(lambda: (analytics.update(), query()))
+            print(f"{report:<10} {shell.get(report, float('nan')):>9.2f} {first_update:>12.2f} "
+                  f"{later * 1000:>13.1f} {cli_report(log_dir, report) * 1000:>10.0f}")
+
+        # Appended records, the last one still being written
+        extra = access_lines(args.append + 1, 2, start + args.lines * 0.05)
+        with open(log, "a", encoding="utf-8") as f:
+            f.write("\n".join(extra[:-1]) + "\n" + extra[-1][:40])
+        read, incremental = timed(analytics.update)
+        print(f"\nUpdate after appending {args.append} lines: {incremental * 1000:.1f} ms "
+              f"({read['visitor_access.log']} lines read)")
+        appended_ok = matches(analytics, recount(log))
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(extra[-1][40:] + "\n")
+        analytics.update()
+        appended_ok = appended_ok and matches(analytics, recount(log))
+        print(f"Counts after appends (partial last line): {'ok' if appended_ok else 'MISMATCH'}")
+
+        # copytruncate: everything counted so far stays, the new file is read from its start
+        before = recount(log)
+        with open(log, "w", encoding="utf-8") as f:
+            f.write("\n".join(access_lines(1000, 3, time.time())) + "\n")
+        analytics.update()
+        after = recount(log)
+        truncated_ok = matches(analytics, {name: before[name] + after[name] for name in before})
+        print(f"Counts after truncation: {'ok' if truncated_ok else 'MISMATCH'}")
+        analytics.close()
+        ok = appended_ok and truncated_ok
+
+        rotation_dir = workdir / "rotation"
+        rotation_dir.mkdir()
+        ok = check_rotation(rotation_dir) and ok
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Mermaid benchmark: mermaid_ast.lint_mermaid (one-pass lexer + repair +
+validation) vs the old sanitize_mermaid_code/validate_mermaid_syntax regex
+chain, on well-formed and malformed synthetic diagrams.
+
+Usage (from backend/):
+    python -m benchmarks.bench_mermaid [--diagrams 2000] [--repeat 5]
+"""
+import argparse
+import gc
+import random
+import time
+
+from benchmarks import legacy_mermaid
+from benchmarks.corpus import malformed_diagram, mermaid_diagram
+from mermaid_ast import lint_mermaid
+
+
+def best_of(fn, diagrams: list, repeat: int) -> float:
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for code in diagrams:
+                fn(code)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diagrams", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpora = {
+        "well-formed": [mermaid_diagram(rng, nodes=rng.randint(4, 10)) for _ in range(args.diagrams)],
+        "malformed": [malformed_diagram(rng, nodes=rng.randint(4, 10)) for _ in range(args.diagrams)],
+    }
+
+    print(f"{'corpus':>12} {'legacy us':>10} {'new us':>8} {'speedup':>8} {'legacy valid':>13} {'new valid':>10}")
+    for name, diagrams in corpora.items():
+        legacy = best_of(legacy_mermaid.validate_mermaid_syntax, diagrams, args.repeat)
+        new = best_of(lint_mermaid, diagrams, args.repeat)
+        legacy_valid = sum(legacy_mermaid.validate_mermaid_syntax(code)[0] for code in diagrams)
+        new_valid = sum(lint_mermaid(code).valid for code in diagrams)
+        per_legacy = legacy * 1e6 / len(diagrams)
+        per_new = new * 1e6 / len(diagrams)
+        print(f"{name:>12} {per_legacy:>10.1f} {per_new:>8.1f} {per_legacy / per_new:>7.1f}x "
+              f"{legacy_valid:>13} {new_valid:>10}")
+
+
+if __name__ == "__main__":
+    main()
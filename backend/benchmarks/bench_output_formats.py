@@ -0,0 +1,83 @@
+"""
+Output format comparison: the markdown reply parsed by stream_parser vs the
+same recommendation as a JSON-mode reply decoded and validated by
+pydantic-core (json_output.py), on 1x-30x synthetic responses.
+
+Also reports the success rate on a mixed corpus (normal, truncated and
+broken replies) and what the markdown fallback costs when a JSON reply
+can't be decoded.
+
+Usage (from backend/):
+    python -m benchmarks.bench_output_formats [--repeat 5]
+"""
+import argparse
+import contextlib
+import gc
+import os
+import time
+
+from benchmarks.corpus import broken_json_response, json_response, synthetic_response, truncated_response
+from json_output import has_stack, parse_output
+
+FACTORS = [1, 10, 30]
+
+
+def best_of(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(text)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def parse_markdown(text: str):
+    return parse_output(text, "markdown")[0]
+
+
+def parse_json(text: str):
+    return parse_output(text, "json")[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':<6} {'markdown KB':>12} {'json KB':>8} {'markdown ms':>12} {'json ms':>8} {'speedup':>8}")
+    for factor in FACTORS:
+        markdown = synthetic_response(alternatives=3 * factor, seed=factor)
+        document = json_response(alternatives=3 * factor, seed=factor)
+        markdown_s = best_of(parse_markdown, markdown, args.repeat)
+        json_s = best_of(parse_json, document, args.repeat)
+        print(f"{factor:>3}x   {len(markdown) / 1024:>12.1f} {len(document) / 1024:>8.1f} "
+              f"{markdown_s * 1000:>12.3f} {json_s * 1000:>8.3f} {markdown_s / json_s:>7.1f}x")
+
+    corpora = {
+        "markdown": [synthetic_response(seed=seed) for seed in range(20)]
+                    + [truncated_response(0.4, seed=seed) for seed in range(5)],
+        "json": [json_response(seed=seed) for seed in range(20)]
+                + [broken_json_response(seed=seed) for seed in range(5)],
+    }
+    print(f"\n{'format':<9} {'replies':>8} {'usable':>7} {'fallbacks':>10}")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        results = {}
+        for fmt, corpus in corpora.items():
+            outcomes = [parse_output(text, fmt) for text in corpus]
+            results[fmt] = (sum(has_stack(parsed) for parsed, _ in outcomes),
+                            sum(parser == "markdown_fallback" for _, parser in outcomes))
+    for fmt, (usable, fallbacks) in results.items():
+        print(f"{fmt:<9} {len(corpora[fmt]):>8} {usable / len(corpora[fmt]):>7.0%} {fallbacks:>10}")
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        fallback_s = best_of(parse_json, broken_json_response(), args.repeat)
+    print(f"\nBroken JSON reply (decode fails, markdown fallback): {fallback_s * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Parser benchmark: stream_parser.parse_recommendation vs the previous
+regex-based parse_tech_stack_response on synthetic responses 1x-100x the
+normal size.
+
+Usage (from backend/):
+    python -m benchmarks.bench_parser [--repeat 5]
+"""
+import argparse
+import contextlib
+import gc
+import os
+import time
+
+from benchmarks import legacy_parser
+from benchmarks.corpus import scaled_response
+from stream_parser import parse_recommendation
+
+FACTORS = [1, 10, 30, 100]
+
+
+def best_of(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(text)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+@contextlib.contextmanager
+def _quiet_prints():
+    legacy_parser.print = lambda *args, **kwargs: None
+    try:
+        yield
+    finally:
+        del legacy_parser.print
+
+
+def legacy_result(text: str):
+    with _quiet_prints():
+        return legacy_parser.parse_tech_stack_response(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'bytes':>10} {'legacy ms':>10} {'legacy*':>10} {'new ms':>9} {'speedup':>8} {'new us/KB':>10}")
+    with open(os.devnull, "w") as devnull:
+        for factor in FACTORS:
+            text = scaled_response(factor)
+            # The old parser prints per line; time it with and without that output
+            with contextlib.redirect_stdout(devnull):
+                legacy_printing = best_of(legacy_parser.parse_tech_stack_response, text, args.repeat)
+                with _quiet_prints():
+                    legacy = best_of(legacy_parser.parse_tech_stack_response, text, args.repeat)
+            # The legacy parser predates per-alternative diagrams and always leaves them empty
+            assert legacy_result(text) == parse_recommendation(text).model_copy(update={"alternative_diagrams": []}), \
+                "parsers disagree"
+            new = best_of(parse_recommendation, text, args.repeat)
+            print(f"{factor:>5}x {len(text):>10} {legacy_printing * 1000:>10.2f} {legacy * 1000:>10.2f} "
+                  f"{new * 1000:>9.2f} {legacy / new:>7.1f}x {new * 1e6 / (len(text) / 1024):>10.1f}")
+    print("legacy* = legacy parser with its debug print() calls disabled; speedup is against legacy*")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+System prompt profile comparison: "full" (system_prompt) vs "compact"
+(compact_system_prompt).
+
+Offline it reports, per profile:
+- prompt size in characters and tokens (token_count.py), and the input
+  tokens of a typical request (system prompt + template custom prompt)
+- whether the prompt still spells out every marker of the output contract
+  the parsers rely on
+- parse success rate and parse time on a response corpus: recorded responses
+  from --responses DIR/<profile>/*.txt when present, otherwise the synthetic
+  corpus (identical for both profiles, so only a sanity check)
+
+With GROQ_API_KEY set, --record N calls Groq N times per profile (alternating,
+sequential) and saves the responses plus their latencies under --responses,
+so the offline comparison runs on real output afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prompt_profiles [--responses benchmarks/recorded]
+    python -m benchmarks.bench_prompt_profiles --record 10
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import time
+from pathlib import Path
+
+from benchmarks.corpus import malformed_response, synthetic_response, truncated_response
+from token_count import count_tokens, tokenizer_name
+
+PROFILES = ("full", "compact")
+
+# Strings the stream/section parsers key on - every profile must ask for them
+CONTRACT_MARKERS = (
+    "## Architecture Diagram", "```mermaid", "graph TD", "## PRIMARY Technology Stack",
+    "### Frontend", "### Backend", "### Database", "### DevOps/Infrastructure", "### Additional Services",
+    "Pros:", "Cons:", "Why:", "• ", "## ALTERNATIVE Technology Stacks", "## ALTERNATIVE STACK #1",
+    "## ALTERNATIVE STACK #2", "## ALTERNATIVE STACK #3", "**When to use this stack:**",
+    "**Primary trade-off vs recommended stack:**", "**Why this option is worth considering:**",
+    "### Architecture Diagram",
+)
+
+SAMPLE_REQUESTS = [
+    dict(appType="SaaS", scale="Growth (10K-100K users)", focus="Scalability", teamSize="Small (2-5)",
+         budget="Medium ($5K-$20K)", timeToMarket="Moderate (3-6 months)", securityLevel="SOC 2"),
+    dict(appType="E-commerce", scale="MVP (1K-10K users)", focus="Cost Optimization", teamSize="Solo (1 person)",
+         budget="Minimal (<$1K)", timeToMarket="ASAP (1-2 weeks)", securityLevel="PCI-DSS"),
+    dict(appType="Healthcare", scale="Scale (100K-1M users)", focus="Security", teamSize="Large (10-20)",
+         budget="Large ($20K-$100K)", timeToMarket="Standard (6-12 months)", securityLevel="HIPAA"),
+    dict(appType="Gaming", scale="Global Scale", focus="Performance", teamSize="Medium (5-10)",
+         budget="Enterprise ($100K+)", timeToMarket="Long-term (12+ months)", securityLevel="Standard"),
+]
+
+
+def load_main():
+    os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        import main
+    return main
+
+
+def contract_ok(parsed) -> bool:
+    """
+    A usable recommendation: full PRIMARY stack, valid diagram, three complete alternatives
+    """
+    primary = parsed.primary
+    if not all((primary.frontend, primary.backend, primary.database, primary.devops)):
+        return False
+    if not parsed.architecture_diagram.strip() or parsed.diagram_errors:
+        return False
+    return len(parsed.alternatives) >= 3 and all(alt.frontend and alt.backend for alt in parsed.alternatives)
+
+
+def corpus_for(profile: str, responses_dir: Path) -> tuple[str, list]:
+    recorded = sorted((responses_dir / profile).glob("*.txt")) if responses_dir else []
+    if recorded:
+        return f"recorded ({len(recorded)})", [f.read_text(encoding="utf-8") for f in recorded]
+    corpus = ([synthetic_response(seed=seed) for seed in range(20)]
+              + [malformed_response(seed=seed) for seed in range(5)]
+              + [truncated_response(0.5, seed=seed) for seed in range(5)])
+    return f"synthetic ({len(corpus)})", corpus
+
+
+def report(main, responses_dir: Path):
+    from prompt_templates import template_prompt
+    from models import StackRequest
+
+    custom = [template_prompt(StackRequest(customConstraints="", **fields)) for fields in SAMPLE_REQUESTS]
+    custom_tokens = sum(count_tokens(text) for text in custom) / len(custom)
+
+    print(f"Tokenizer: {tokenizer_name()}")
+    print(f"{'profile':<9} {'chars':>7} {'tokens':>7} {'input/request':>14} {'contract':>9} "
+          f"{'corpus':>15} {'parse ok':>9} {'parse ms':>9} {'latency s':>10}")
+    for profile in PROFILES:
+        prompt = main.SYSTEM_PROMPTS[profile]
+        missing = [marker for marker in CONTRACT_MARKERS if marker not in prompt]
+        corpus_name, corpus = corpus_for(profile, responses_dir)
+
+        ok = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            for text in corpus:
+                ok += contract_ok(main.parse_tech_stack_response(text))
+        parse_ms = (time.perf_counter() - start) * 1000 / len(corpus)
+
+        latency_file = responses_dir / profile / "latency.json" if responses_dir else None
+        latency = "-"
+        if latency_file and latency_file.exists():
+            samples = json.loads(latency_file.read_text())
+            latency = f"{sum(samples) / len(samples):.2f}"
+
+        print(f"{profile:<9} {len(prompt):>7} {count_tokens(prompt):>7} {count_tokens(prompt) + custom_tokens:>14.0f} "
+              f"{'ok' if not missing else 'MISSING':>9} {corpus_name:>15} {ok / len(corpus):>8.0%} "
+              f"{parse_ms:>9.2f} {latency:>10}")
+        for marker in missing:
+            print(f"  missing contract marker: {marker!r}")
+    full, compact = (count_tokens(main.SYSTEM_PROMPTS[p]) for p in PROFILES)
+    print(f"compact saves {full - compact} system prompt tokens per stack call ({1 - compact / full:.0%})")
+
+
+async def record(main, count: int, responses_dir: Path):
+    from prompt_templates import template_prompt
+    from models import StackRequest
+
+    latencies = {profile: [] for profile in PROFILES}
+    for profile in PROFILES:
+        (responses_dir / profile).mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        fields = SAMPLE_REQUESTS[i % len(SAMPLE_REQUESTS)]
+        custom_prompt = template_prompt(StackRequest(customConstraints="", **fields))
+        for profile in PROFILES:
+            start = time.perf_counter()
+            text = await main.profile_stack_chain(profile).ainvoke({"custom_prompt": custom_prompt})
+            latencies[profile].append(round(time.perf_counter() - start, 3))
+            (responses_dir / profile / f"{i:03d}.txt").write_text(text, encoding="utf-8")
+            print(f"{profile:<8} #{i}: {latencies[profile][-1]:.2f}s, {len(text)} chars")
+    for profile, samples in latencies.items():
+        (responses_dir / profile / "latency.json").write_text(json.dumps(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=Path, default=Path(__file__).parent / "recorded",
+                        help="Directory with <profile>/*.txt recorded responses")
+    parser.add_argument("--record", type=int, default=0, help="Record N responses per profile from Groq first")
+    args = parser.parse_args()
+
+    if args.record:
+        if not os.getenv("GROQ_API_KEY"):
+            raise SystemExit("--record calls Groq and needs GROQ_API_KEY")
+        os.environ["LLM_BACKEND"] = "groq"
+        main_module = load_main()
+        asyncio.run(record(main_module, args.record, args.responses))
+    else:
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        main_module = load_main()
+    report(main_module, args.responses)
+
+
+if __name__ == "__main__":
+    main()
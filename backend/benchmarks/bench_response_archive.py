@@ -0,0 +1,210 @@
+"""
+Response archive (response_archive.py): write throughput, size on disk,
+point lookups, time-range scans and memory, at --records records.
+
+Records look like the ones finalize_recommendation archives: synthetic raw
+replies (~21 KB) and their parsed results, for --keys distinct request keys
+(so keys repeat and lookups must find the newest record), one every
+--interval seconds. Also shown:
+  - the same records as gzipped JSONL, what keeping full responses in the
+    response logs would give: size, and finding one key means reading
+    (and inflating) everything
+  - codecs and block sizes on the first --sample records
+
+Checks that every lookup returns the newest record of its key, that range
+scans return exactly the records in the range, and that a full scan stays
+within --max-scan-mb of traced memory. Exits with status 1 otherwise.
+
+Usage (from backend/):
+    python -m benchmarks.bench_response_archive [--records 50000] [--keys 20000]
+    python -m benchmarks.bench_response_archive --records 1000000   # ~20 GB raw, a few GB on disk
+"""
+import argparse
+import gzip
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.corpus import synthetic_response
+from cache import request_key
+from precompute import FORM_OPTIONS
+from response_archive import ResponseArchive
+from stream_parser import parse_recommendation
+
+
+def record_pool(size: int) -> list:
+    """
+    (raw reply, parsed result) pairs to build records from
+    """
+    pool = []
+    for seed in range(size):
+        text = synthetic_response(seed=seed)
+        pool.append((text, parse_recommendation(text).model_dump()))
+    return pool
+
+
+def request_keys(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    keys = {}
+    while len(keys) < count:
+        inputs = {field: rng.choice(options) for field, options in FORM_OPTIONS.items()}
+        inputs["customConstraints"] = f"needs offline mode {rng.randrange(count)}" if rng.random() < 0.3 else ""
+        keys[request_key(inputs)] = inputs
+    return list(keys.items())
+
+
+def records(count: int, keys: list, pool: list, start: float, interval: float):
+    rng = random.Random(2)
+    for i in range(count):
+        key, inputs = keys[rng.randrange(len(keys))]
+        response, parsed = pool[i % len(pool)]
+        yield {"key": key, "created_at": start + i * interval, "inputs": inputs, "prompt_profile": "full",
+               "output_format": "markdown", "custom_prompt": "Recommend a stack", "response": response, "parsed": parsed}
+
+
+def fill(archive: ResponseArchive, items) -> tuple:
+    """
+    Append everything (waiting whenever the queue is full); returns (records, seconds)
+    """
+    start = time.perf_counter()
+    count = 0
+    for record in items:
+        while not archive.append(record):
+            archive.flush()
+        count += 1
+    archive.flush(timeout=600)
+    return count, time.perf_counter() - start
+
+
+def file_size(path: Path) -> int:
+    # Recent pages may still be in the write-ahead log
+    wal = path.with_name(path.name + "-wal")
+    return path.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def compare_layouts(tmp: Path, keys: list, pool: list, sample: int):
+    print(f"\nLayouts on the first {sample} records:")
+    print(f"{'layout':<28} {'MB':>8} {'ratio':>6} {'write rec/s':>12} {'lookup ms':>10}")
+    raw = sum(len(json.dumps(r)) for r in records(sample, keys, pool, 0, 1))
+    lookups = list(dict.fromkeys(r["key"] for r in records(sample, keys, pool, 0, 1)))[:200]
+    for codec, level, block_bytes in (("zlib", 6, 32 * 1024), ("zlib", 6, 128 * 1024), ("zlib", 1, 128 * 1024),
+                                      ("lzma", 6, 1024 * 1024)):
+        path = tmp / f"sample-{codec}-{level}-{block_bytes}.db"
+        archive = ResponseArchive(path, block_bytes=block_bytes, codec=codec, level=level)
+        count, seconds = fill(archive, records(sample, keys, pool, 0, 1))
+        start = time.perf_counter()
+        for key in lookups:
+            archive.get(key)
+        lookup = (time.perf_counter() - start) * 1000 / len(lookups)
+        archive.close()
+        size = path.stat().st_size
+        name = f"{codec} level {level}, {block_bytes // 1024} KB blocks"
+        print(f"{name:<28} {size / 1e6:>8.1f} {raw / size:>6.1f} {count / seconds:>12.0f} {lookup:>10.2f}")
+
+    path = tmp / "sample.jsonl.gz"
+    start = time.perf_counter()
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records(sample, keys, pool, 0, 1):
+            f.write(json.dumps(record) + "\n")
+    seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    target = lookups[0]
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        newest = None
+        for line in f:
+            record = json.loads(line)
+            if record["key"] == target:
+                newest = record
+    lookup = (time.perf_counter() - start) * 1000
+    size = path.stat().st_size
+    print(f"{'gzip JSONL (full scan)':<28} {size / 1e6:>8.1f} {raw / size:>6.1f} {sample / seconds:>12.0f} "
+          f"{lookup:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--keys", type=int, default=20_000)
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between records")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--sample", type=int, default=5000)
+    parser.add_argument("--max-scan-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    pool = record_pool(32)
+    keys = request_keys(args.keys)
+    start_at = time.time() - args.records * args.interval
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="bench-archive-") as tmp:
+        tmp = Path(tmp)
+        compare_layouts(tmp, keys, pool, min(args.sample, args.records))
+
+        archive = ResponseArchive(tmp / "archive.db")
+        newest = {}
+        for record in records(args.records, keys, pool, start_at, args.interval):
+            newest[record["key"]] = record["created_at"]  # created_at is unique and increasing
+        count, seconds = fill(archive, records(args.records, keys, pool, start_at, args.interval))
+        stats = archive.stats()
+        size = file_size(tmp / "archive.db")
+        print(f"\n{count} records, {len(newest)} keys: written in {seconds:.1f}s ({count / seconds:.0f} records/s, "
+              f"{stats['raw_bytes'] / seconds / 1e6:.1f} MB/s raw)")
+        print(f"Raw {stats['raw_bytes'] / 1e6:.0f} MB -> file {size / 1e6:.0f} MB ({stats['raw_bytes'] / size:.1f}x), "
+              f"{stats['blocks']} blocks, {(size - stats['stored_bytes']) / count:.0f} bytes/record of index and pages")
+
+        rng = random.Random(3)
+        sample = rng.sample(sorted(newest), min(args.lookups, len(newest)))
+        times, wrong = [], 0
+        for key in sample:
+            begin = time.perf_counter()
+            record = archive.get(key)
+            times.append((time.perf_counter() - begin) * 1000)
+            if record is None or record["created_at"] != newest[key]:
+                wrong += 1
+        print(f"\nPoint lookup (newest record of a key): p50 {percentile(times, 0.5):.2f} ms, "
+              f"p99 {percentile(times, 0.99):.2f} ms, mean {statistics.mean(times):.2f} ms")
+        if wrong:
+            failures.append(f"{wrong}/{len(sample)} lookups did not return the newest record")
+
+        for hours in (1, 24):
+            since = start_at + args.records * args.interval / 2
+            until = since + hours * 3600
+            expected_count = sum(1 for i in range(args.records) if since <= start_at + i * args.interval < until)
+            begin = time.perf_counter()
+            found = sum(1 for _ in archive.scan(since, until))
+            elapsed = time.perf_counter() - begin
+            print(f"Range scan, {hours:>2} h: {found} records in {elapsed * 1000:.0f} ms "
+                  f"({found / elapsed if elapsed else 0:.0f} records/s)")
+            if found != expected_count:
+                failures.append(f"{hours} h range scan returned {found} records, expected {expected_count}")
+
+        tracemalloc.start()
+        begin = time.perf_counter()
+        scanned = sum(1 for _ in archive.scan())
+        elapsed = time.perf_counter() - begin
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        print(f"Full scan: {scanned} records in {elapsed:.1f}s, peak traced memory {peak:.1f} MB")
+        if scanned != count:
+            failures.append(f"full scan returned {scanned} records, expected {count}")
+        if peak > args.max_scan_mb:
+            failures.append(f"full scan peaked at {peak:.1f} MB (budget {args.max_scan_mb:.0f} MB)")
+        archive.close()
+
+    if failures:
+        print("\nArchive check failed:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nArchive checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Per-request cost of turning a stack_chain reply into the /api/recommend body:
+the old path (TechItem/TechStack models built line by line, .dict(), then
+JSONResponse re-encoding the dict) vs the current one (__slots__ records,
+one pydantic validation in result(), FastJSONResponse). The old parser is
+loaded from git (stream_parser.py as of --baseline-rev, the commit before the
+records landed), so this needs a git checkout.
+
+Reports CPU time and tracemalloc peak per request on 1x-10x synthetic
+responses, and the serialization cost alone for a cached (dict)
+recommendation, which is what cache hits pay.
+
+Usage (from backend/):
+    python -m benchmarks.bench_response_model [--repeat 200] [--baseline-rev REV]
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from starlette.responses import JSONResponse
+
+from benchmarks.corpus import synthetic_response
+from fast_json import FastJSONResponse, orjson
+from stream_parser import parse_recommendation
+
+FACTORS = [1, 3, 10]
+# Parent of the commit that moved stream_parser.py to __slots__ records
+BASELINE_REV = "3bf2238^"
+
+legacy_stream_parser = None
+
+
+def load_revision(rev: str, path: str, name: str):
+    """
+    Import `path` (relative to the repo root) as it was at `rev`, under `name`
+    """
+    source = subprocess.run(["git", "show", f"{rev}:{path}"], check=True, capture_output=True,
+                            text=True, cwd=Path(__file__).parent).stdout
+    with tempfile.TemporaryDirectory() as tmp:
+        file = Path(tmp) / f"{name}.py"
+        file.write_text(source)
+        spec = importlib.util.spec_from_file_location(name, file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+def old_path(text: str) -> bytes:
+    return JSONResponse(legacy_stream_parser.parse_recommendation(text).dict()).body
+
+
+def new_path(text: str) -> bytes:
+    return FastJSONResponse(parse_recommendation(text)).body
+
+
+def cpu_us(fn, arg, repeat: int) -> float:
+    """
+    Mean process CPU time per call, in microseconds
+    """
+    gc.collect()
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.process_time() - start) * 1e6 / repeat
+
+
+def peak_kb(fn, arg) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--baseline-rev", default=BASELINE_REV,
+                        help="git revision whose backend/stream_parser.py is the old path")
+    args = parser.parse_args()
+
+    global legacy_stream_parser
+    legacy_stream_parser = load_revision(args.baseline_rev, "backend/stream_parser.py", "legacy_stream_parser")
+
+    print(f"JSON encoder for dicts: {'orjson' if orjson is not None else 'json (pip install orjson to compare)'}")
+    print(f"\n{'response':<10} {'path':<5} {'KB':>6} {'CPU us':>9} {'peak KB':>9}")
+    for factor in FACTORS:
+        text = synthetic_response(alternatives=3 * factor, seed=factor)
+        repeat = max(5, args.repeat // factor)
+        old_body, new_body = old_path(text), new_path(text)
+        assert json.loads(old_body) == json.loads(new_body), "paths disagree"
+        results = {}
+        for name, fn in (("old", old_path), ("new", new_path)):
+            results[name] = cpu_us(fn, text, repeat), peak_kb(fn, text)
+            print(f"{f'{factor}x':<10} {name:<5} {len(new_body) / 1024:>6.1f} {results[name][0]:>9.1f} "
+                  f"{results[name][1]:>9.1f}")
+        (old_cpu, old_peak), (new_cpu, new_peak) = results["old"], results["new"]
+        print(f"{'':<10} {'':<5} {'':>6} {old_cpu / new_cpu:>8.2f}x {new_peak / old_peak - 1:>+8.0%}")
+
+    print("\nCached recommendation (dict) -> response body")
+    print(f"{'response':<10} {'JSONResponse us':>16} {'FastJSONResponse us':>20}")
+    for factor in FACTORS:
+        cached = parse_recommendation(synthetic_response(alternatives=3 * factor, seed=factor)).dict()
+        repeat = max(5, args.repeat // factor)
+        print(f"{f'{factor}x':<10} {cpu_us(JSONResponse, cached, repeat):>16.1f} "
+              f"{cpu_us(FastJSONResponse, cached, repeat):>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Similarity index benchmark: insert cost and top-k lookup latency at 1k-100k
+entries, plus the scores of typical near-duplicate requests, to help pick a
+SIMILARITY_REUSE_THRESHOLD (reuse is off by default).
+
+Lookups are expected to stay under a millisecond at 100k entries with numpy
+installed; the pure-Python fallback is reported too but is much slower.
+
+Usage (from backend/):
+    python -m benchmarks.bench_similarity [--sizes 1000 10000 100000]
+"""
+import argparse
+import random
+import time
+
+from similarity import FIELDS, RequestEncoder, SimilarityIndex, numpy_module
+
+WORDS = ("realtime chat payments stripe mobile offline sync python team knows react prefer aws gcp azure "
+         "kubernetes serverless low latency video ml search admin dashboard multi tenant").split()
+
+# (description, change applied to a base request)
+NEAR_DUPLICATES = [
+    ("identical", lambda r: r),
+    ("constraints reworded", lambda r: {**r, "customConstraints": r["customConstraints"].upper() + " please"}),
+    ("one adjacent budget bucket", lambda r: {**r, "budget": "Medium ($5K-$20K)"}),
+    ("one adjacent scale bucket", lambda r: {**r, "scale": "Scale (100K-1M users)"}),
+    ("budget 3 buckets away", lambda r: {**r, "budget": "Enterprise ($100K+)"}),
+    ("different focus", lambda r: {**r, "focus": "Security"}),
+    ("different constraints", lambda r: {**r, "customConstraints": "video transcoding and ml recommendations"}),
+]
+
+
+def random_request(rng: random.Random) -> dict:
+    request = {field: rng.choice(options) for field, options, _, _ in FIELDS}
+    request["customConstraints"] = " ".join(rng.sample(WORDS, rng.randint(0, 6)))
+    return request
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"Backend: {'numpy' if numpy_module() is not None else 'python (install numpy for the matrix search)'}")
+    print(f"{'entries':>8} {'insert us':>10} {'lookup ms':>10} {'p99 ms':>8}")
+    for size in args.sizes:
+        index = SimilarityIndex(max_entries=size)
+        requests = [random_request(rng) for _ in range(size)]
+        start = time.perf_counter()
+        for i, request in enumerate(requests):
+            index.add(f"key-{i}", request)
+        insert_us = (time.perf_counter() - start) * 1e6 / size
+
+        samples = []
+        for _ in range(args.queries):
+            query = random_request(rng)
+            start = time.perf_counter()
+            index.search(query, k=3)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        print(f"{size:>8} {insert_us:>10.1f} {sum(samples) * 1000 / len(samples):>10.3f} "
+              f"{samples[int(len(samples) * 0.99)] * 1000:>8.3f}")
+
+    encoder = RequestEncoder()
+    base = {"appType": "SaaS", "scale": "Growth (10K-100K users)", "focus": "Performance", "teamSize": "Small (2-5)",
+            "budget": "Small ($1K-$5K)", "timeToMarket": "Quick (1-2 months)", "securityLevel": "SOC 2",
+            "customConstraints": "Team knows Python, needs realtime chat and Stripe payments"}
+    reference = encoder.encode(base)
+    print(f"\n{'near duplicate':<28} {'cosine':>7}")
+    for name, change in NEAR_DUPLICATES:
+        vector = encoder.encode(change(dict(base)))
+        print(f"{name:<28} {sum(value * vector.get(i, 0.0) for i, value in reference.items()):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Startup cost and its regression check.
+
+Import: `import main` in fresh interpreters (median of --repeat), next to
+`import fastapi` alone, which main cannot avoid. The check fails when main
+costs more than --max-ratio times fastapi (a ratio, so the budget holds on
+slower machines), when importing main pulls in LangChain or Groq (they are
+built on first use, see llm_chains in main.py), or when it creates files in
+the working directory.
+
+Server: starts serve.py (one worker, LLM_BACKEND=fake) in a temporary
+directory and times, from process start, the first answer of /healthz, the
+first 200 from /readyz (models built) and the first /api/recommend.
+
+Exits with status 1 if the import check fails.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--repeat 5] [--max-ratio 1.6] [--no-server]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Must stay out of `import main` - see LLMChains / llm_models.py
+DEFERRED_MODULES = ("langchain_core", "langchain_groq", "groq")
+# Budget for `import main` as a multiple of `import fastapi`
+MAX_RATIO = 1.6
+
+IMPORT_PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {deferred!r} if m in sys.modules],
+                  "files": sorted(os.listdir("."))}}))
+"""
+
+
+def import_once(module: str, workdir: Path) -> dict:
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    env.pop("GROQ_API_KEY", None)  # importing must not need it
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+                         cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_imports(repeat: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as tmp:
+        workdir = Path(tmp)
+        fastapi_ms = statistics.median(import_once("fastapi", workdir)["ms"] for _ in range(repeat))
+        runs = [import_once("main", workdir) for _ in range(repeat)]
+    return {
+        "fastapi_ms": fastapi_ms,
+        "main_ms": statistics.median(run["ms"] for run in runs),
+        "loaded": sorted({m for run in runs for m in run["loaded"]}),
+        "files": sorted({f for run in runs for f in run["files"]}),
+    }
+
+
+def wait_for(client: httpx.Client, server: subprocess.Popen, started: float, method: str, path: str, timeout: float,
+             **kwargs) -> float:
+    """
+    Poll until `path` answers 200; returns the seconds since the server process started
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}")
+        try:
+            if client.request(method, path, **kwargs).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    raise SystemExit(f"{path} not answering after {timeout:.0f}s")
+
+
+def measure_server(port: int, timeout: float) -> dict:
+    env = {
+        **os.environ,
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_FIRST_TOKEN_MS": "0",
+        "FAKE_LLM_TOKEN_DELAY_MS": "0",
+        "FAKE_LLM_JITTER_MS": "0",
+        "PROMPT_MODE": "template",
+        "LLM_HTTP_WARMUP": "0",
+        "WEB_CONCURRENCY": "1",
+    }
+    body = {"appType": "SaaS", "scale": "Startup", "focus": "Speed", "teamSize": "Solo", "budget": "Low",
+            "timeToMarket": "1 month", "securityLevel": "Standard", "customConstraints": ""}
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as tmp, \
+            httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10.0) as client:
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, str(BACKEND_DIR / "serve.py"), "--port", str(port)],
+                                  cwd=tmp, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            return {
+                "healthz": wait_for(client, server, started, "GET", "/healthz", timeout),
+                "readyz": wait_for(client, server, started, "GET", "/readyz", timeout),
+                "recommend": wait_for(client, server, started, "POST", "/api/recommend", timeout, json=body),
+            }
+        finally:
+            server.terminate()
+            try:
+                server.wait(10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ratio", type=float, default=MAX_RATIO,
+                        help="Budget for `import main` as a multiple of `import fastapi`")
+    parser.add_argument("--no-server", action="store_true", help="Only measure and check the import")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    imports = measure_imports(args.repeat)
+    ratio = imports["main_ms"] / imports["fastapi_ms"]
+    print(f"import fastapi {imports['fastapi_ms']:>8.1f} ms")
+    print(f"import main    {imports['main_ms']:>8.1f} ms  ({ratio:.2f}x fastapi, budget {args.max_ratio:.2f}x)")
+
+    if not args.no_server:
+        runs = [measure_server(args.port, args.timeout) for _ in range(args.repeat)]
+        print(f"\n{'from process start to':<28} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+        for name, label in (("healthz", "first /healthz"), ("readyz", "/readyz 200 (models built)"),
+                            ("recommend", "first /api/recommend")):
+            values = [run[name] * 1000 for run in runs]
+            print(f"{label:<28} {statistics.median(values):>10.1f} {min(values):>8.1f} {max(values):>8.1f}")
+
+    failures = []
+    if ratio > args.max_ratio:
+        failures.append(f"import main is {ratio:.2f}x import fastapi (budget {args.max_ratio:.2f}x)")
+    if imports["loaded"]:
+        failures.append(f"import main loads {', '.join(imports['loaded'])}")
+    if imports["files"]:
+        failures.append(f"import main creates {', '.join(imports['files'])}")
+    if failures:
+        print("\nStartup regressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nImport within budget")
+
+
+if __name__ == "__main__":
+    main()
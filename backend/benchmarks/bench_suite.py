@@ -0,0 +1,247 @@
+"""
+Hot-path regression suite: parse_tech_stack_response, parse_stack_section,
+sanitize_mermaid_code and validate_mermaid_syntax (the functions in main.py
+that run on every response) over the synthetic corpus - normal, malformed
+diagrams, missing/truncated alternatives and 10x-100x long responses.
+
+For each case it reports ops/sec, the peak memory allocated while handling
+one input and the memory blocks still held by its result, then compares
+against a stored baseline and exits 1 when a case regressed past the
+tolerance. Throughput is normalized by a fixed pure-Python calibration loop,
+so a baseline recorded on one machine is usable on another. Each round is
+calibrated next to its own timing and the median round counts, so one slow
+round doesn't fail the gate; a case whose throughput still looks regressed
+is measured again and only reported if it fails that re-run too.
+
+Runs offline: main is imported with LLM_BACKEND=fake.
+
+Usage (from backend/):
+    python -m benchmarks.bench_suite                     # compare with baseline_hotpath.json
+    python -m benchmarks.bench_suite --update-baseline   # record a new baseline
+    python -m benchmarks.bench_suite --filter mermaid --tolerance 0.3
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")
+
+from benchmarks.corpus import (malformed_diagram, malformed_response, mermaid_diagram, scaled_response,  # noqa: E402
+                               stack_body, synthetic_response, truncated_response)
+
+BASELINE = Path(__file__).parent / "baseline_hotpath.json"
+
+# Memory is not machine dependent, so it gets a tighter default tolerance
+MEMORY_TOLERANCE = 0.1
+
+
+def corpus_cases(main) -> list:
+    """
+    (name, function, inputs) - each op is one call on one input
+    """
+    rng = random.Random(0)
+    normal = [synthetic_response(seed=seed) for seed in range(20)]
+    sections = [stack_body(random.Random(seed)) for seed in range(50)]
+    return [
+        ("parse_response/normal", main.parse_tech_stack_response, normal),
+        ("parse_response/malformed_diagrams", main.parse_tech_stack_response,
+         [malformed_response(seed=seed) for seed in range(20)]),
+        ("parse_response/no_alternatives", main.parse_tech_stack_response,
+         [synthetic_response(alternatives=0, seed=seed) for seed in range(20)]),
+        ("parse_response/truncated", main.parse_tech_stack_response,
+         [truncated_response(0.3 + seed * 0.03, seed=seed) for seed in range(20)]),
+        ("parse_response/long_10x", main.parse_tech_stack_response, [scaled_response(10, seed=1)]),
+        ("parse_response/long_100x", main.parse_tech_stack_response, [scaled_response(100, seed=2)]),
+        ("parse_stack_section/normal", main.parse_stack_section, sections),
+        ("parse_stack_section/long_10x", main.parse_stack_section,
+         [stack_body(random.Random(seed), techs_per_category=10) for seed in range(5)]),
+        ("sanitize_mermaid/well_formed", main.sanitize_mermaid_code,
+         [mermaid_diagram(rng, nodes=rng.randint(4, 10)) for _ in range(200)]),
+        ("sanitize_mermaid/malformed", main.sanitize_mermaid_code,
+         [malformed_diagram(rng, nodes=rng.randint(4, 10)) for _ in range(200)]),
+        ("validate_mermaid/well_formed", main.validate_mermaid_syntax,
+         [mermaid_diagram(rng, nodes=rng.randint(4, 10)) for _ in range(200)]),
+        ("validate_mermaid/malformed", main.validate_mermaid_syntax,
+         [malformed_diagram(rng, nodes=rng.randint(4, 10)) for _ in range(200)]),
+        ("validate_mermaid/large", main.validate_mermaid_syntax,
+         [malformed_diagram(rng, nodes=300) for _ in range(5)]),
+    ]
+
+
+def calibrate(repeat: int) -> float:
+    """
+    Best seconds over `repeat` runs of a fixed mix of string/dict/list work - the unit
+    throughput is normalized by
+    """
+    def workload():
+        table = {}
+        for i in range(20000):
+            key = f"item-{i % 500}"
+            table[key] = table.get(key, 0) + len(key.split("-"))
+        return sorted(table.items())
+
+    best = float("inf")
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            workload()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def measure_speed(fn, inputs: list, repeat: int, min_time: float) -> tuple[float, float, float]:
+    """
+    Median (ops/sec, normalized ops, calibration seconds) over `repeat` rounds. Each round
+    loops the inputs for at least `min_time` right after its own calibration, so a machine
+    that slows down mid-run skews one round, not the result
+    """
+    rounds = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            unit = calibrate(5)
+            ops = 0
+            start = time.perf_counter()
+            while True:
+                for item in inputs:
+                    fn(item)
+                ops += len(inputs)
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_time:
+                    break
+            rounds.append((ops / elapsed * unit, ops / elapsed, unit))
+    finally:
+        gc.enable()
+    normalized, ops, unit = sorted(rounds)[len(rounds) // 2]
+    return ops, normalized, unit
+
+
+def measure_memory(fn, inputs: list) -> tuple[float, float]:
+    """
+    (mean peak KB allocated during one call, mean blocks retained by its result)
+    """
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        for item in inputs:
+            gc.collect()
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            result = fn(item)
+            peaks.append((tracemalloc.get_traced_memory()[1] - base) / 1024)
+            after = tracemalloc.take_snapshot()
+            retained.append(sum(stat.count_diff for stat in after.compare_to(before, "filename")
+                                if stat.count_diff > 0))
+            del result
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks), sum(retained) / len(retained)
+
+
+def run_suite(args, names=None) -> dict:
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        import main
+    results = {}
+    units = []
+    print(f"{'case':<36} {'ops/sec':>11} {'norm':>9} {'peak KB':>9} {'blocks':>8}")
+    # The functions print debug output on every call; keep it off the terminal
+    with open(os.devnull, "w") as devnull:
+        for name, fn, inputs in corpus_cases(main):
+            if (args.filter and args.filter not in name) or (names is not None and name not in names):
+                continue
+            with contextlib.redirect_stdout(devnull):
+                ops, normalized, unit = measure_speed(fn, inputs, args.repeat, args.min_time)
+                peak_kb, blocks = measure_memory(fn, inputs[:10])
+            units.append(unit)
+            results[name] = {
+                "ops_per_sec": round(ops, 2),
+                "normalized": round(normalized, 4),
+                "peak_kb": round(peak_kb, 1),
+                "retained_blocks": round(blocks, 1),
+            }
+            print(f"{name:<36} {ops:>11.1f} {normalized:>9.3f} {peak_kb:>9.1f} {blocks:>8.0f}")
+    return {"python": platform.python_version(), "calibration_seconds": round(min(units, default=0.0), 6), "cases": results}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> dict:
+    """
+    {case: [regression, ...]} for the cases that got slower or use more memory than the baseline
+    """
+    regressions = {}
+    for name, now in results["cases"].items():
+        before = baseline["cases"].get(name)
+        if not before:
+            continue
+        if now["normalized"] < before["normalized"] * (1 - tolerance):
+            regressions.setdefault(name, []).append(
+                f"{name}: throughput {before['normalized']:.3f} -> {now['normalized']:.3f} (normalized)")
+        for metric in ("peak_kb", "retained_blocks"):
+            # Small absolute changes are noise from interpreter internals
+            if now[metric] > before[metric] * (1 + MEMORY_TOLERANCE) + 2:
+                regressions.setdefault(name, []).append(f"{name}: {metric} {before[metric]} -> {now[metric]}")
+    return regressions
+
+
+def confirm(args, baseline: dict, regressions: dict) -> dict:
+    """
+    Measure the cases that regressed again and keep those that fail the re-run too.
+    Memory is deterministic, so only throughput can be noise
+    """
+    print(f"\nRe-running {len(regressions)} case(s) that look regressed")
+    rerun = run_suite(args, names=set(regressions))
+    confirmed = compare(rerun, baseline, args.tolerance)
+    for name in regressions:
+        if name not in confirmed:
+            print(f"{name}: passed the re-run, not a regression")
+    return confirmed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=7, help="Calibrated timing rounds per case (median counts)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing round")
+    parser.add_argument("--filter", help="Only run cases whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed throughput drop (default 25%%)")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline} - run with --update-baseline to record one")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if results["python"].rsplit(".", 1)[0] != baseline["python"].rsplit(".", 1)[0]:
+        print(f"Note: baseline recorded on Python {baseline['python']}, running {results['python']}")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        regressions = confirm(args, baseline, regressions)
+    for line in (line for lines in regressions.values() for line in lines):
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions vs {args.baseline.name} (throughput tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Multi-worker scaling: starts serve.py with 1, 2, 4 ... worker processes
+(LLM_BACKEND=fake without token delays, so a request is pure CPU: prompt
+template, response replay, parse, Mermaid lint, JSON encoding), drives
+/api/recommend with unique bodies from several client processes and
+reports throughput, latency and speedup over one worker.
+
+After each run it also checks what several workers sharing the files must
+not break:
+  - every response log line, in the live file and in segments rotated during
+    the run, is complete JSON - one per recommendation
+  - every visitor_access.log line is complete - one per request
+  - /metrics, answered by a single worker, counts the requests of all of them
+
+Each server runs in a fresh temporary directory, so backend/logs is untouched.
+The client processes need CPU too: on a machine with C cores, worker counts
+up to about C - clients show the server's scaling.
+
+Usage (from backend/):
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--requests 400] [--concurrency 32] [--clients 2]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.load_test import one_request, summarize
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ACCESS_LINE = re.compile(r"^\S+ \| visitor_tracker \| IP: .+ \| Method: \w+ \| Path: (\S+) \| UserAgent: .*"
+                         r" \| Status: \d+ \| Duration: [\d.]+ms( \| Query: .*)?$")
+RECOMMEND_200 = re.compile(r'^techstack_http_requests_total\{method="POST",route="/api/recommend",status="200"\} (\d+)',
+                           re.MULTILINE)
+
+
+def start_server(workers: int, port: int, workdir: Path, metrics_interval: float) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_FIRST_TOKEN_MS": "0",
+        "FAKE_LLM_TOKEN_DELAY_MS": "0",
+        "FAKE_LLM_JITTER_MS": "0",
+        "PROMPT_MODE": "template",
+        "SIMILARITY_REUSE_THRESHOLD": "0",
+        "LLM_HTTP_WARMUP": "0",
+        "ACCESS_LOG_SAMPLE_RATE": "1",
+        # Small segments and no pruning, so rotation happens under load and nothing is lost
+        "RESPONSE_LOG_MAX_BYTES": str(256 * 1024),
+        "RESPONSE_LOG_BACKUPS": "0",
+        "SHARED_METRICS_INTERVAL": str(metrics_interval),
+        "WEB_CONCURRENCY": str(workers),
+    }
+    with open(workdir / "server.out", "w") as out:
+        return subprocess.Popen([sys.executable, str(BACKEND_DIR / "serve.py"), "--port", str(port)],
+                                cwd=workdir, env=env, stdout=out, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url: str, server: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}")
+        try:
+            if httpx.get(url + "/", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server at {url} not ready after {timeout:.0f}s")
+
+
+def client_process(url: str, start: int, count: int, concurrency: int) -> list:
+    async def run() -> list:
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, timeout=120.0, limits=limits) as client:
+            indices = iter(range(start, start + count))
+            samples = []
+
+            async def worker():
+                for i in indices:
+                    samples.append(await one_request(client, "recommend", i, 0))
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return samples
+
+    return asyncio.run(run())
+
+
+def check_logs(log_dir: Path, expected: int) -> dict:
+    """
+    Complete / broken lines in the response log (live + rotated) and visitor_access.log
+    """
+    responses = broken = 0
+    name = "stack_recommendation_responses"
+    for path in sorted(log_dir.glob(f"{name}.*.jsonl.gz")) + [log_dir / f"{name}.jsonl"]:
+        if not path.exists():
+            continue
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    json.loads(line)
+                    responses += 1
+                except ValueError:
+                    broken += 1
+    access = access_broken = 0
+    with open(log_dir / "visitor_access.log", encoding="utf-8") as f:
+        for line in f:
+            match = ACCESS_LINE.match(line.rstrip("\n"))
+            if match is None:
+                access_broken += "visitor_tracker" in line
+            elif match.group(1) == "/api/recommend":
+                access += 1
+    segments = len(list(log_dir.glob(f"{name}.*.jsonl.gz")))
+    return {"responses": responses, "broken_responses": broken, "segments": segments,
+            "access_lines": access, "broken_access": access_broken,
+            "ok": broken == 0 and access_broken == 0 and responses == expected and access == expected}
+
+
+def run_workers(workers: int, args, pool) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench-workers-") as tmp:
+        workdir = Path(tmp)
+        url = f"http://127.0.0.1:{args.port}"
+        server = start_server(workers, args.port, workdir, args.metrics_interval)
+        try:
+            wait_ready(url, server)
+            # Let every worker finish starting, then warm each one up
+            time.sleep(1.0)
+            pool.starmap(client_process, [(url, 10 ** 6 + c * 1000, 2 * workers, 1) for c in range(args.clients)])
+
+            share = args.requests // args.clients
+            jobs = [(url, c * share, share, max(1, args.concurrency // args.clients)) for c in range(args.clients)]
+            start = time.perf_counter()
+            samples = [s for part in pool.starmap(client_process, jobs) for s in part]
+            wall = time.perf_counter() - start
+
+            # Every worker publishes within one interval; the scrape adds its own worker's current values
+            time.sleep(args.metrics_interval * 1.5)
+            scraped = RECOMMEND_200.search(httpx.get(url + "/metrics", timeout=10.0).text)
+        finally:
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        stats = summarize(samples, wall)
+        # The warm-up requests are part of the logs and the counters
+        expected = stats["requests"] - stats["errors"] + 2 * workers * args.clients
+        logs = check_logs(workdir / "logs", expected)
+        counted = int(scraped.group(1)) if scraped else 0
+        return {"workers": workers, "stats": stats, "logs": logs, "metrics_count": counted,
+                "metrics_ok": counted == expected, "expected": expected}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight, over all clients")
+    parser.add_argument("--clients", type=int, default=2, help="Client processes generating the load")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--metrics-interval", type=float, default=1.0, help="SHARED_METRICS_INTERVAL for the servers")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes, {args.requests} requests, "
+          f"concurrency {args.concurrency}")
+    print(f"{'workers':>7} {'rps':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'err':>4} "
+          f"{'log lines':>10} {'segments':>9} {'access':>7} {'/metrics':>9}")
+    results = []
+    with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+        for workers in (int(w) for w in args.workers.split(",")):
+            result = run_workers(workers, args, pool)
+            results.append(result)
+            stats, logs = result["stats"], result["logs"]
+            speedup = stats["throughput_rps"] / results[0]["stats"]["throughput_rps"]
+            print(f"{workers:>7} {stats['throughput_rps']:>8.1f} {speedup:>7.2f}x {stats['p50_ms']:>8.1f} "
+                  f"{stats['p95_ms']:>8.1f} {stats['errors']:>4} "
+                  f"{logs['responses']:>5}/{result['expected']:<4} {logs['segments']:>9} "
+                  f"{'ok' if logs['broken_access'] == 0 and logs['access_lines'] == result['expected'] else 'BROKEN':>7} "
+                  f"{'ok' if result['metrics_ok'] else result['metrics_count']:>9}")
+    failed = [r["workers"] for r in results if not (r["logs"]["ok"] and r["metrics_ok"]) or r["stats"]["errors"]]
+    if failed:
+        print(f"Integrity check failed for {', '.join(map(str, failed))} workers")
+        sys.exit(1)
+    print("Logs complete and /metrics aggregated for every worker count")
+
+
+if __name__ == "__main__":
+    main()
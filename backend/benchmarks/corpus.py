@@ -0,0 +1,165 @@
+import random
+
+# Synthetic stack_chain responses in the format system_prompt asks for.
+# Everything is generated locally so the benchmarks run without Groq.
+
+CATEGORIES = [
+    ("Frontend", ["React", "Next.js", "Vue.js", "SvelteKit", "Angular"]),
+    ("Backend", ["FastAPI", "Express", "Django", "Go_Fiber", "Spring_Boot"]),
+    ("Database", ["PostgreSQL", "MongoDB", "MySQL", "DynamoDB", "Supabase"]),
+    ("DevOps/Infrastructure", ["Docker", "Kubernetes", "Vercel + Railway", "AWS ECS", "Render"]),
+    ("Additional Services", ["Redis", "RabbitMQ", "Sentry", "Auth0", "Stripe"]),
+]
+
+EMOJIS = ["⚛️", "🚀", "🐘", "🐳", "⚡", "🔒", "📦"]
+
+WORDS = (
+    "fast scalable budget team solo timeline secure managed free tier ecosystem community "
+    "latency throughput cost migration hosting tooling learning curve production ready mvp"
+).split()
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def mermaid_diagram(rng: random.Random, nodes: int = 6) -> str:
+    names = [rng.choice(options).replace(" ", "_").replace(".", "").replace("+", "") for _, options in CATEGORIES]
+    names = (names * (nodes // len(names) + 1))[:nodes]
+    lines = ["graph TD", "    Browser[User_Browser]"]
+    for i, name in enumerate(names):
+        lines.append(f"    N{i}[{name}_Service]")
+    lines.append("    Browser -->|HTTP_Request| N0")
+    for i in range(1, len(names)):
+        lines.append(f"    N{i - 1} -->|Calls| N{i}")
+    return "\n".join(lines)
+
+
+def malformed_diagram(rng: random.Random, nodes: int = 6) -> str:
+    """
+    A diagram with the breakage LLMs typically produce: unclosed brackets,
+    dangling arrows, spaced labels/IDs, escaped or dotted arrows
+    """
+    lines = mermaid_diagram(rng, nodes).split("\n")
+    breakages = [
+        lambda line: line.rstrip("]"),
+        lambda line: line.replace("_", " "),
+        lambda line: line.replace("-->", "--&gt;"),
+        lambda line: line.replace("-->", "-.->"),
+        lambda line: line.split("|")[0] + "|" + line.split("|")[1] + "|" if "|" in line else line + " -->",
+        lambda line: line.replace("[", " ["),
+        lambda line: line.replace("N", "Node ", 1),
+    ]
+    for i in range(1, len(lines)):
+        if rng.random() < 0.4:
+            lines[i] = rng.choice(breakages)(lines[i])
+    return "\n".join(lines)
+
+
+def tech_entry(rng: random.Random, name: str) -> str:
+    pros = "\n".join(f"• {_sentence(rng)}" for _ in range(3))
+    cons = "\n".join(f"• {_sentence(rng)}" for _ in range(2))
+    return f"**{name}** - {rng.choice(EMOJIS)}\nPros:\n{pros}\nCons:\n{cons}\nWhy: {_sentence(rng, 40)}\n"
+
+
+def stack_body(rng: random.Random, techs_per_category: int = 1) -> str:
+    parts = []
+    for heading, options in CATEGORIES:
+        parts.append(f"### {heading}")
+        for _ in range(techs_per_category):
+            parts.append(tech_entry(rng, rng.choice(options)))
+    return "\n".join(parts)
+
+
+def synthetic_response(alternatives: int = 3, techs_per_category: int = 1, seed: int = 0) -> str:
+    """
+    One response shaped like a real stack_chain completion: diagram, PRIMARY
+    stack and `alternatives` ALTERNATIVE STACK sections each with a diagram.
+    """
+    rng = random.Random(seed)
+    parts = [
+        "## Architecture Diagram",
+        "```mermaid",
+        mermaid_diagram(rng),
+        "```",
+        "",
+        "## PRIMARY Technology Stack",
+        "",
+        stack_body(rng, techs_per_category),
+        "## ALTERNATIVE Technology Stacks",
+        "",
+    ]
+    for n in range(1, alternatives + 1):
+        parts.extend([
+            f"## ALTERNATIVE STACK #{n}: Option {n}",
+            f"**When to use this stack:** {_sentence(rng, 25)}",
+            f"**Primary trade-off vs recommended stack:** {_sentence(rng, 20)}",
+            f"**Why this option is worth considering:** {_sentence(rng, 20)}",
+            "",
+            "### Architecture Diagram",
+            "```mermaid",
+            mermaid_diagram(rng),
+            "```",
+            "",
+            stack_body(rng, techs_per_category),
+        ])
+    return "\n".join(parts)
+
+
+def scaled_response(factor: int, seed: int = 0) -> str:
+    """
+    A response roughly `factor` times the size of a normal one
+    by adding ALTERNATIVE STACK sections
+    """
+    return synthetic_response(alternatives=3 * factor, techs_per_category=1, seed=seed)
+
+
+def malformed_response(alternatives: int = 3, seed: int = 0) -> str:
+    """
+    A normal response whose Mermaid diagrams have typical LLM breakage
+    """
+    rng = random.Random(seed)
+    text = synthetic_response(alternatives=alternatives, seed=seed)
+    parts = text.split("```mermaid\n")
+    for i in range(1, len(parts)):
+        code, _, rest = parts[i].partition("\n```")
+        parts[i] = malformed_diagram(rng, nodes=code.count("\n") // 2) + "\n```" + rest
+    return "```mermaid\n".join(parts)
+
+
+def truncated_response(fraction: float = 0.6, seed: int = 0) -> str:
+    """
+    A response cut off part-way (e.g. the model hit its token limit), losing
+    the later alternatives and possibly ending inside a diagram or entry
+    """
+    text = synthetic_response(seed=seed)
+    return text[:int(len(text) * fraction)]
+
+
+def json_response(alternatives: int = 3, techs_per_category: int = 1, seed: int = 0) -> str:
+    """
+    The same recommendation as synthetic_response, in the JSON output mode shape
+    (RecommendationOutput)
+    """
+    from models import RecommendationOutput
+    from stream_parser import parse_recommendation
+
+    parsed = parse_recommendation(synthetic_response(alternatives, techs_per_category, seed))
+    output = RecommendationOutput(
+        architecture_diagram=parsed.architecture_diagram,
+        primary=parsed.primary,
+        alternatives=[
+            {**explanation, "architecture_diagram": diagram, "stack": stack}
+            for stack, diagram, explanation in zip(parsed.alternatives, parsed.alternative_diagrams,
+                                                   parsed.alternative_explanations)
+        ],
+    )
+    return output.model_dump_json(indent=2)
+
+
+def broken_json_response(seed: int = 0) -> str:
+    """
+    A JSON-mode reply cut off mid-document - unusable as JSON, so the markdown fallback runs
+    """
+    text = json_response(seed=seed)
+    return text[:len(text) // 2]
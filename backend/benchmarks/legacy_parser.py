@@ -0,0 +1,227 @@
+# Snapshot of the regex-based parser that shipped before stream_parser.py.
+# Kept only as the baseline for the parser benchmarks - do not import from the app.
+import re
+
+from models import TechItem, TechStack, RecommendationResponse
+
+
+# Parse response into structured format
+def parse_tech_stack_response(response: str) -> RecommendationResponse:
+    """
+    Parse the LLM response into a structured RecommendationResponse
+    """
+    print(f"\n=== PARSE START: Response length {len(response)} ===")
+    print(f"First 500 chars:\n{response[:500]}\n")
+    
+    # Extract architecture diagram
+    mermaid_match = re.search(r'```mermaid\n(.*?)\n```', response, re.DOTALL)
+    diagram = mermaid_match.group(1) if mermaid_match else ""
+    
+    # Extract PRIMARY stack
+    primary_match = re.search(r'## PRIMARY Technology Stack\n(.*?)(?=## ALTERNATIVE|$)', response, re.DOTALL)
+    primary_text = primary_match.group(1) if primary_match else ""
+    print(f"\n=== PRIMARY section length: {len(primary_text)} ===")
+    print(f"PRIMARY first 300 chars:\n{primary_text[:300]}\n")
+    primary_stack = parse_stack_section(primary_text)
+    
+    # Extract alternatives
+    alternatives = []
+    alternative_explanations = []
+    # Fixed regex: Allow for text after the number in the header (e.g., ": Cost-Effective MVP")
+    alt_pattern = r'## ALTERNATIVE STACK #(\d+)[:\s][^\n]*\n(.*?)(?=## ALTERNATIVE STACK #\d+|$)'
+    
+    # Debug: Check if response contains ALTERNATIVE STACK markers
+    if '## ALTERNATIVE STACK' in response:
+        print("✓ Response contains ALTERNATIVE STACK markers")
+    else:
+        print("✗ Response MISSING ALTERNATIVE STACK markers!")
+        print(f"  Response content preview:\n{response[-500:]}")
+    
+    alt_matches = list(re.finditer(alt_pattern, response, re.DOTALL))
+    print(f"Found {len(alt_matches)} alternative stacks with improved regex")
+    
+    for match in alt_matches:
+        stack_num = int(match.group(1))
+        alt_text = match.group(2)
+        
+        print(f"\n=== ALTERNATIVE STACK #{stack_num} ===")
+        print(f"Alt text length: {len(alt_text)}")
+        print(f"Alt text first 200 chars:\n{alt_text[:200]}\n")
+        
+        # Extract explanation lines
+        when_match = re.search(r'\*\*When to use this stack:\*\*\s*(.+?)(?:\n\n|\*\*)', alt_text, re.DOTALL)
+        trade_match = re.search(r'\*\*Primary trade-off vs recommended stack:\*\*\s*(.+?)(?:\n\n|\*\*)', alt_text, re.DOTALL)
+        why_match = re.search(r'\*\*Why this option is worth considering:\*\*\s*(.+?)(?:\n\n###)', alt_text, re.DOTALL)
+        
+        when_text = when_match.group(1).strip() if when_match else ""
+        trade_text = trade_match.group(1).strip() if trade_match else ""
+        why_text = why_match.group(1).strip() if why_match else ""
+        
+        print(f"When to use: {when_text[:100]}")
+        print(f"Trade off: {trade_text[:100]}")
+        print(f"Why consider: {why_text[:100]}\n")
+        
+        alternative_explanations.append({
+            "stack_num": stack_num,
+            "when_to_use": when_text,
+            "trade_off": trade_text,
+            "why_consider": why_text
+        })
+        
+        alt_stack = parse_stack_section(alt_text)
+        print(f"Parsed alternative #{stack_num}: Frontend={len(alt_stack.frontend)}, Backend={len(alt_stack.backend)}, DB={len(alt_stack.database)}")
+        alternatives.append(alt_stack)
+    
+    return RecommendationResponse(
+        architecture_diagram=diagram,
+        primary=primary_stack,
+        alternatives=alternatives,
+        alternative_explanations=alternative_explanations
+    )
+
+def parse_stack_section(text: str) -> TechStack:
+    """
+    Parse a single tech stack section (PRIMARY or ALTERNATIVE)
+    More robust parsing with better error handling
+    """
+    stack = TechStack()
+    lines = text.split('\n')
+    current_category = None
+    current_tech = None
+    parsing_mode = None  # 'pros', 'cons', or 'why'
+    
+    print(f"\n=== PARSING STACK SECTION: {len(lines)} lines ===")
+    
+    for i, line in enumerate(lines):
+        line_stripped = line.strip()
+        if not line_stripped:
+            parsing_mode = None
+            continue
+        
+        # Skip explanation lines and examples
+        if any(kw in line_stripped for kw in ['When to use', 'Primary trade-off', 'Why this option', 'EXAMPLE']):
+            parsing_mode = None
+            continue
+        
+        # Detect category (###)
+        if line_stripped.startswith('### '):
+            # Save previous tech if exists
+            if current_tech and current_category:
+                cat_list = getattr(stack, current_category)
+                cat_list.append(current_tech)
+                print(f"  Added {current_tech.name} to {current_category}")
+            current_tech = None
+            parsing_mode = None
+            
+            # Identify new category
+            if 'Frontend' in line_stripped:
+                current_category = 'frontend'
+            elif 'Backend' in line_stripped:
+                current_category = 'backend'
+            elif 'Database' in line_stripped:
+                current_category = 'database'
+            elif 'DevOps' in line_stripped or 'Infrastructure' in line_stripped:
+                current_category = 'devops'
+            elif 'Additional' in line_stripped:
+                current_category = 'additional'
+            else:
+                current_category = None
+            
+            if current_category:
+                print(f"  Category: {current_category}")
+            continue
+        
+        # Extract tech name - look for **TechName** with dash and emoji/description
+        if line_stripped.startswith('**') and ' - ' in line_stripped and current_category:
+            # Save previous tech
+            if current_tech and current_category:
+                cat_list = getattr(stack, current_category)
+                cat_list.append(current_tech)
+            
+            # Match: **TechName** - emoji/description
+            match = re.search(r'\*\*([^*]+)\*\*\s*-\s*(.+)$', line_stripped)
+            if match:
+                tech_name = match.group(1).strip()
+                current_tech = TechItem(name=tech_name)
+                parsing_mode = None
+                print(f"    Found tech: {tech_name}")
+            continue
+        
+        # Section headers (case-insensitive)
+        if line_stripped.lower() == 'pros:' and current_tech:
+            parsing_mode = 'pros'
+            continue
+        
+        if line_stripped.lower() == 'cons:' and current_tech:
+            parsing_mode = 'cons'
+            continue
+        
+        if line_stripped.lower().startswith('why:') and current_tech:
+            # Extract inline why if exists
+            why_match = re.search(r'^why:\s*(.+)$', line_stripped, re.IGNORECASE)
+            if why_match and why_match.group(1):
+                current_tech.why = why_match.group(1).strip()
+                parsing_mode = None
+            else:
+                parsing_mode = 'why'
+            continue
+        
+        # Example blocks - skip them
+        if 'EXAMPLE' in line_stripped or 'example' in line_stripped:
+            parsing_mode = None
+            continue
+        
+        # Bullet point handling
+        if line_stripped.startswith('•') and current_tech:
+            bullet_text = line_stripped[1:].strip()
+            # Remove bold markers
+            bullet_text = re.sub(r'\*\*([^*]+)\*\*:\s*', '', bullet_text)
+            # Remove trailing punctuation except period in middle
+            bullet_text = re.sub(r'[,;]\s*$', '', bullet_text)
+            bullet_text = bullet_text.strip()
+            
+            if parsing_mode == 'pros' and bullet_text:
+                current_tech.pros.append(bullet_text)
+            elif parsing_mode == 'cons' and bullet_text:
+                current_tech.cons.append(bullet_text)
+            continue
+        
+        # Multi-line why continuation
+        if parsing_mode == 'why' and current_tech and line_stripped:
+            # Stop at next section
+            if line_stripped.startswith('###') or (line_stripped.startswith('**') and ' - ' in line_stripped):
+                parsing_mode = None
+                # Re-process this line as new category/tech
+                if line_stripped.startswith('### '):
+                    if 'Frontend' in line_stripped:
+                        current_category = 'frontend'
+                    elif 'Backend' in line_stripped:
+                        current_category = 'backend'
+                    elif 'Database' in line_stripped:
+                        current_category = 'database'
+                    elif 'DevOps' in line_stripped or 'Infrastructure' in line_stripped:
+                        current_category = 'devops'
+                    elif 'Additional' in line_stripped:
+                        current_category = 'additional'
+                    current_tech = None
+                continue
+            # Accumulate why
+            current_tech.why += ' ' + line_stripped
+            continue
+        
+        # Stop parsing sections when encountering new markers
+        if line_stripped.startswith('###') and parsing_mode:
+            parsing_mode = None
+    
+    # Don't forget the last tech
+    if current_tech and current_category:
+        cat_list = getattr(stack, current_category)
+        cat_list.append(current_tech)
+        print(f"  Added final {current_tech.name} to {current_category}")
+    
+    # Debug output
+    total_techs = len(stack.frontend) + len(stack.backend) + len(stack.database) + len(stack.devops) + len(stack.additional)
+    print(f"  PARSED TOTAL: {total_techs} technologies")
+    print(f"    Frontend: {len(stack.frontend)}, Backend: {len(stack.backend)}, Database: {len(stack.database)}, DevOps: {len(stack.devops)}, Additional: {len(stack.additional)}")
+    
+    return stack
@@ -0,0 +1,282 @@
+"""
+End-to-end load test: drives the FastAPI app at a target concurrency and
+reports throughput and latency percentiles per endpoint.
+
+By default the app runs in-process with LLM_BACKEND=fake (fake_llm.py replays
+last_llm_response.txt with realistic pacing), so no Groq quota is used.
+Pass --url to load-test a running server instead (start it with
+LLM_BACKEND=fake unless you really want to hit Groq). The in-process
+transport buffers whole responses, so time-to-first-byte is only meaningful
+with --url. The in-process app runs in a temporary directory with LOG_DIR and
+every SQLite store pointed there, so the fake replies never reach logs/.
+
+Every request body is unique by default so the recommendation cache and
+request coalescing don't hide the generation cost; --distinct N cycles
+through N bodies instead to measure the cached path.
+
+Results can be saved as JSON and compared against an earlier run:
+    python -m benchmarks.load_test --output results/v2.1.json
+    python -m benchmarks.load_test --baseline results/v2.1.json   # exit 1 on regression
+
+Usage (from backend/):
+    python -m benchmarks.load_test [--requests 200] [--concurrency 16]
+        [--mix recommend=2,stream=2,prompt=1] [--token-delay-ms 1.5] [--first-token-ms 300]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+ENDPOINTS = {
+    "prompt": ("POST", "/api/generate-prompt"),
+    "recommend": ("POST", "/api/recommend"),
+    "stream": ("POST", "/api/recommend?stream=1"),
+    "fanout": ("POST", "/api/recommend?fanout=1"),
+    "health": ("GET", "/"),
+}
+
+APP_TYPES = ["SaaS", "E-commerce", "Marketplace", "Analytics", "Streaming", "Healthcare"]
+SCALES = ["MVP (1K-10K users)", "Growth (10K-100K users)", "Scale (100K-1M users)"]
+TEAMS = ["Solo (1 person)", "Small (2-5)", "Medium (5-10)"]
+
+
+def request_body(i: int) -> dict:
+    return {
+        "appType": APP_TYPES[i % len(APP_TYPES)],
+        "scale": SCALES[i % len(SCALES)],
+        "focus": "Performance",
+        "teamSize": TEAMS[i % len(TEAMS)],
+        "budget": "Small ($1K-$5K)",
+        "timeToMarket": "Quick (1-2 months)",
+        "securityLevel": "Standard",
+        # Differs per request so every call is a cache miss (and goes through the prompt-engineer LLM call)
+        "customConstraints": f"Load test request #{i}",
+    }
+
+
+def parse_mix(mix: str) -> list:
+    """
+    "recommend=2,stream=1" -> ["recommend", "recommend", "stream"]
+    """
+    plan = []
+    for part in mix.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}' (choose from {', '.join(ENDPOINTS)})")
+        plan += [name] * int(weight or 1)
+    return plan
+
+
+def percentile(ordered: list, p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples: list, wall_seconds: float) -> dict:
+    ordered = sorted(s["ms"] for s in samples if s["ok"])
+    first_byte = sorted(s["first_byte_ms"] for s in samples if s["ok"])
+    statuses = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s["ok"]),
+        "statuses": statuses,
+        "throughput_rps": round(len(ordered) / wall_seconds, 3) if wall_seconds else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered), 1) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 1),
+        "p95_ms": round(percentile(ordered, 95), 1),
+        "p99_ms": round(percentile(ordered, 99), 1),
+        "max_ms": round(ordered[-1], 1) if ordered else 0.0,
+        "first_byte_p50_ms": round(percentile(first_byte, 50), 1),
+        "first_byte_p95_ms": round(percentile(first_byte, 95), 1),
+    }
+
+
+async def one_request(client: httpx.AsyncClient, name: str, i: int, distinct: int) -> dict:
+    method, path = ENDPOINTS[name]
+    body = request_body(i % distinct if distinct else i) if method == "POST" else None
+    start = time.perf_counter()
+    first_byte = None
+    status = 0
+    ok = False
+    try:
+        async with client.stream(method, path, json=body) as response:
+            status = response.status_code
+            text = []
+            async for chunk in response.aiter_text():
+                first_byte = first_byte or time.perf_counter()
+                text.append(chunk)
+            text = "".join(text)
+        # The endpoints report failures as {"error": ...} with a 200 status
+        ok = status == 200 and not text.startswith('{"error"') and "event: error" not in text
+    except httpx.HTTPError:
+        pass
+    end = time.perf_counter()
+    return {"endpoint": name, "status": status, "ok": ok, "ms": (end - start) * 1000,
+            "first_byte_ms": ((first_byte or end) - start) * 1000}
+
+
+async def drive(client: httpx.AsyncClient, plan: list, requests: int, concurrency: int, distinct: int) -> tuple:
+    counter = iter(range(requests))
+    samples = []
+
+    async def worker():
+        for i in counter:
+            samples.append(await one_request(client, plan[i % len(plan)], i, distinct))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def isolate_app_state(workdir: Path):
+    """
+    Point everything the in-process app writes (response logs, last_llm_response.txt, the
+    archive, cache, metrics and precomputed store) at `workdir` and run from there, so fake
+    replies never end up in the real logs that precompute.py, the archive warm-up and the
+    fake backend's replay read back
+    """
+    os.environ["LOG_DIR"] = str(workdir / "logs")
+    os.environ["RESPONSE_ARCHIVE_PATH"] = str(workdir / "logs" / "response_archive.db")
+    os.environ["RECOMMEND_CACHE_PATH"] = str(workdir / "logs" / "recommendation_cache.db")
+    os.environ["SHARED_METRICS_PATH"] = str(workdir / "logs" / "metrics.db")
+    os.environ["PRECOMPUTED_STORE_PATH"] = str(workdir / "logs" / "precomputed.db")
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(workdir)
+
+
+async def run(args) -> dict:
+    plan = parse_mix(args.mix)
+    timeout = httpx.Timeout(args.timeout)
+    if args.url:
+        return await measure(args, plan, httpx.AsyncClient(
+            base_url=args.url, timeout=timeout, limits=httpx.Limits(max_connections=args.concurrency)))
+
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="load-test-") as tmp:
+        if args.responses:
+            os.environ["FAKE_LLM_RESPONSES"] = str(Path(args.responses).resolve())
+        isolate_app_state(Path(tmp))
+        try:
+            os.environ["LLM_BACKEND"] = "fake"
+            os.environ["FAKE_LLM_FIRST_TOKEN_MS"] = str(args.first_token_ms)
+            os.environ["FAKE_LLM_TOKEN_DELAY_MS"] = str(args.token_delay_ms)
+            os.environ["FAKE_LLM_JITTER_MS"] = str(args.jitter_ms)
+            os.environ.setdefault("ACCESS_LOG_SAMPLE_RATE", "0")  # errors are still logged
+            # The bodies only differ in customConstraints wording - don't let similarity reuse answer them
+            os.environ.setdefault("SIMILARITY_REUSE_THRESHOLD", "0")
+            from main import app
+            logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per in-process request
+            await app.router.startup()
+            try:
+                return await measure(args, plan, httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout))
+            finally:
+                await app.router.shutdown()
+        finally:
+            os.chdir(cwd)
+
+
+async def measure(args, plan: list, client: httpx.AsyncClient) -> dict:
+    try:
+        if args.warmup:
+            await drive(client, ["health"], args.warmup, min(args.warmup, args.concurrency), 0)
+        samples, wall = await drive(client, plan, args.requests, args.concurrency, args.distinct)
+    finally:
+        await client.aclose()
+
+    endpoints = {}
+    for name in dict.fromkeys(plan):
+        endpoints[name] = summarize([s for s in samples if s["endpoint"] == name], wall)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "target": args.url or "in-process (LLM_BACKEND=fake)",
+        "python": platform.python_version(),
+        "config": {
+            "requests": args.requests, "concurrency": args.concurrency, "mix": args.mix, "distinct": args.distinct,
+            "first_token_ms": args.first_token_ms, "token_delay_ms": args.token_delay_ms, "jitter_ms": args.jitter_ms,
+            "llm_max_concurrency": os.getenv("LLM_MAX_CONCURRENCY", "8"),
+        },
+        "wall_seconds": round(wall, 3),
+        "total": summarize(samples, wall),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: dict):
+    print(f"{result['target']}: {result['config']['requests']} requests, concurrency {result['config']['concurrency']}, "
+          f"{result['wall_seconds']:.1f}s")
+    print(f"{'endpoint':<12} {'reqs':>5} {'err':>4} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ttfb p50':>9}")
+    for name, stats in list(result["endpoints"].items()) + [("total", result["total"])]:
+        print(f"{name:<12} {stats['requests']:>5} {stats['errors']:>4} {stats['throughput_rps']:>7.2f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['first_byte_p50_ms']:>9.1f}")
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Regressions vs a previous run: p95 up or throughput down by more than `tolerance`, or new errors
+    """
+    regressions = []
+    for name, stats in list(result["endpoints"].items()) + [("total", result["total"])]:
+        before = baseline["total"] if name == "total" else baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms")
+        if before["throughput_rps"] and stats["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']:.2f} -> {stats['throughput_rps']:.2f} rps")
+        if stats["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {stats['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running backend (default: in-process app with the fake LLM)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", default="recommend=2,stream=2,prompt=1",
+                        help=f"Weighted endpoints: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--distinct", type=int, default=0, help="Cycle through N request bodies (0 = all unique)")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed health-check requests before the run")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="Fake LLM time to first token")
+    parser.add_argument("--token-delay-ms", type=float, default=1.5, help="Fake LLM time per token")
+    parser.add_argument("--jitter-ms", type=float, default=0.5, help="Fake LLM per-token jitter (+/-)")
+    parser.add_argument("--responses", help="Recorded response file, directory of *.txt or response archive .db (default: last_llm_response.txt)")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 20%%)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(result, indent=2))
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        regressions = compare(result, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+import contextlib
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+# Fields coming from the InputForm dropdowns - compared case/whitespace-insensitively
+REQUEST_FIELDS = ("appType", "scale", "focus", "teamSize", "budget", "timeToMarket", "securityLevel")
+
+_CLEAR = object()  # writer queue markers
+_STOP = object()
+
+
+def _fold(value) -> str:
+    """
+    Lowercase and collapse whitespace so "AI  Consumer App" == "ai consumer app"
+    """
+    return " ".join(str(value or "").split()).lower()
+
+
+def normalize_request(inputs: dict) -> dict:
+    """
+    Build the normalized view of a StackRequest used for cache keys.
+    customConstraints is free text, so only its hash is kept.
+    """
+    normalized = {field: _fold(inputs.get(field)) for field in REQUEST_FIELDS}
+    constraints = _fold(inputs.get("customConstraints"))
+    normalized["customConstraints"] = hashlib.sha256(constraints.encode("utf-8")).hexdigest() if constraints else ""
+    return normalized
+
+
+def request_key(inputs: dict) -> str:
+    """
+    Stable hex key for a StackRequest (same normalized inputs -> same key)
+    """
+    payload = json.dumps(normalize_request(inputs), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RecommendationCache:
+    """
+    Exact-match LRU cache with per-entry TTL for parsed recommendations.
+
+    Values must be JSON-serializable (store RecommendationResponse.model_dump()).
+    When `path` is given, entries are also written to a SQLite file so they
+    survive restarts and are visible to other worker processes using the same
+    file (found there on a memory miss); memory stays bounded by `max_entries`
+    either way. The file is written by a background thread - set() only
+    queues - but a memory miss still reads it, so callers on an event loop
+    should run get()/peek() of a `persistent` cache in a thread.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 24 * 3600, path: Optional[str] = None,
+                 max_queue: int = 1000):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.write_dropped = 0
+        self.write_errors = 0
+        self._db = None  # reader connection
+        self._queue = None
+        self._thread = None
+        self.path = path
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            # WAL: worker processes sharing the file read while another one writes
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS recommendations ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.execute("DELETE FROM recommendations WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+            self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+            self._thread = threading.Thread(target=self._run, name="recommendation-cache", daemon=True)
+            self._thread.start()
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            value, from_disk = self._lookup(key, time.time())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += from_disk
+            return value
+
+    def peek(self, key: str) -> Optional[dict]:
+        """
+        get() without counting a hit or miss (lookups on behalf of the similarity index)
+        """
+        with self._lock:
+            return self._lookup(key, time.time())[0]
+
+    def set(self, key: str, value: dict, ttl_seconds: Optional[float] = None):
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._remember(key, expires_at, value)
+        if self._queue is not None:
+            # Serialized and committed by the writer thread; memory already has the entry
+            try:
+                self._queue.put_nowait((key, expires_at, value))
+            except queue.Full:
+                with self._lock:
+                    self.write_dropped += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._queue is not None:
+            # Queued behind pending writes so none of them survives the clear
+            self._queue.put(_CLEAR)
+            self.flush()
+
+    def flush(self, timeout: float = 5.0):
+        """
+        Block until everything queued so far is in the file
+        """
+        if self._queue is None:
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+                "write_queue": self._queue.qsize() if self._queue is not None else 0,
+                "write_dropped": self.write_dropped,
+                "write_errors": self.write_errors,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _lookup(self, key: str, now: float) -> tuple[Optional[dict], bool]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at >= now:
+                self._entries.move_to_end(key)
+                return value, False
+            del self._entries[key]
+        value = self._load_from_disk(key, now)
+        return value, value is not None
+
+    def _remember(self, key: str, expires_at: float, value: dict):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load_from_disk(self, key: str, now: float) -> Optional[dict]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT expires_at, value FROM recommendations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            expires_at, raw = row
+            if expires_at < now:
+                # Left for the next startup's cleanup - a delete here would be a write on the read path
+                return None
+            value = json.loads(raw)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Cache read error: {e}")
+            return None
+        # Promote into memory so the next hit skips SQLite
+        self._remember(key, expires_at, value)
+        return value
+
+    # --- writer thread ---
+
+    def _run(self):
+        db = None
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if db is None:
+                    db = sqlite3.connect(self.path, timeout=30)
+                # One transaction per batch; a clear applies in queue order
+                for item in batch:
+                    if item is _CLEAR:
+                        db.execute("DELETE FROM recommendations")
+                    elif isinstance(item, tuple):
+                        key, expires_at, value = item
+                        try:
+                            raw = json.dumps(value)
+                        except (TypeError, ValueError) as e:
+                            with self._lock:
+                                self.write_errors += 1
+                            print(f"Cache persistence error: {e}")
+                            continue
+                        db.execute(
+                            "INSERT OR REPLACE INTO recommendations (key, expires_at, value) VALUES (?, ?, ?)",
+                            (key, expires_at, raw),
+                        )
+                db.commit()
+            except sqlite3.Error as e:
+                with self._lock:
+                    self.write_errors += 1
+                print(f"Cache persistence error: {e}")
+                if db is not None:
+                    with contextlib.suppress(sqlite3.Error):
+                        db.rollback()
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is _STOP for item in batch):
+                if db is not None:
+                    db.close()
+                return
+
+
+class PrecomputedStore:
+    """
+    Recommendations generated ahead of time by precompute.py, keyed by
+    request_key() in an indexed SQLite file. Entries don't expire, but each
+    one records the system prompt it was generated with (`prompt_sha`) and is
+    only served while that prompt is still current.
+
+    The file is opened lazily, so a server started before the first
+    precompute run picks the store up once it exists.
+    """
+
+    def __init__(self, path: str, prompt_sha: str = ""):
+        self.path = Path(path)
+        self.prompt_sha = prompt_sha
+        self._db = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def available(self) -> bool:
+        """
+        Whether the file exists, i.e. whether get() reads SQLite
+        """
+        return self._db is not None or self.path.exists()
+
+    def _connect(self, create: bool = False):
+        if self._db is None and (create or self.path.exists()):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS precomputed ("
+                "key TEXT PRIMARY KEY, prompt_sha TEXT NOT NULL, inputs TEXT NOT NULL, "
+                "value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            try:
+                db = self._connect()
+                row = db.execute("SELECT value FROM precomputed WHERE key = ? AND prompt_sha = ?",
+                                 (key, self.prompt_sha)).fetchone() if db else None
+                value = json.loads(row[0]) if row else None
+            except (sqlite3.Error, ValueError) as e:
+                print(f"Precomputed store read error: {e}")
+                value = None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def entries(self) -> list:
+        """
+        (key, inputs) of every current entry - to seed the similarity index at startup
+        """
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return []
+            rows = db.execute("SELECT key, inputs FROM precomputed WHERE prompt_sha = ?", (self.prompt_sha,))
+            return [(key, json.loads(inputs)) for key, inputs in rows]
+
+    def keys(self) -> set:
+        """
+        Keys already generated with the current system prompt (precompute.py skips them on resume)
+        """
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return set()
+            rows = db.execute("SELECT key FROM precomputed WHERE prompt_sha = ?", (self.prompt_sha,))
+            return {key for key, in rows}
+
+    def put(self, key: str, inputs: dict, value: dict):
+        with self._lock:
+            self._connect(create=True).execute(
+                "INSERT OR REPLACE INTO precomputed (key, prompt_sha, inputs, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, self.prompt_sha, json.dumps(inputs), json.dumps(value), time.time()),
+            )
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = stale = 0
+            db = self._connect()
+            if db is not None:
+                try:
+                    entries, stale = db.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(prompt_sha != ?), 0) FROM precomputed", (self.prompt_sha,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Precomputed store read error: {e}")
+            lookups = self.hits + self.misses
+            return {
+                "path": str(self.path),
+                "available": db is not None,
+                "entries": entries - stale,
+                "stale_entries": stale,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
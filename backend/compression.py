@@ -0,0 +1,172 @@
+import gzip
+import hashlib
+import threading
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Negotiated response compression (pure ASGI, so bodies aren't re-buffered
+# through BaseHTTPMiddleware) and ETag helpers for conditional requests.
+#
+# Bodies are compressed whole. Server-Sent Event streams pass through
+# untouched: a compressor would hold events back until its buffer filled.
+
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "application/pdf", "application/gzip")
+
+
+def accepted_encodings(header: str) -> dict:
+    """
+    Accept-Encoding -> {coding: q}, e.g. "gzip, br;q=0.9, *;q=0" -> {"gzip": 1.0, "br": 0.9, "*": 0.0}
+    """
+    codings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+def negotiate(header: str) -> str:
+    """
+    "br", "gzip" or "" (identity) for an Accept-Encoding header; br only with the brotli package
+    """
+    codings = accepted_encodings(header or "")
+    wildcard = codings.get("*", 0.0)
+    best, best_q = "", 0.0
+    for coding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionStats:
+    """
+    Bytes before/after compression and time spent compressing, per coding
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codings = {}
+
+    def record(self, coding: str, raw: int, sent: int, seconds: float):
+        with self._lock:
+            entry = self._codings.setdefault(coding, {"responses": 0, "raw_bytes": 0, "sent_bytes": 0, "seconds": 0.0})
+            entry["responses"] += 1
+            entry["raw_bytes"] += raw
+            entry["sent_bytes"] += sent
+            entry["seconds"] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                coding: {
+                    "responses": entry["responses"],
+                    "raw_bytes": entry["raw_bytes"],
+                    "sent_bytes": entry["sent_bytes"],
+                    "ratio": round(entry["sent_bytes"] / entry["raw_bytes"], 4) if entry["raw_bytes"] else 1.0,
+                    "avg_compress_ms": round(entry["seconds"] * 1000 / entry["responses"], 3),
+                }
+                for coding, entry in self._codings.items()
+            }
+
+
+def compress(body: bytes, coding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli for responses of at least `minimum_size` bytes, picked from
+    the client's Accept-Encoding. Smaller bodies, SSE streams, already-encoded
+    responses and 204/304 go out as they are.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 stats: CompressionStats = None):
+        self.app = app
+        self.minimum_size = int(minimum_size)
+        self.gzip_level = int(gzip_level)
+        self.brotli_quality = int(brotli_quality)
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.minimum_size < 0:
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if not coding:
+            await self.app(scope, receive, send)
+            return
+
+        pending_start = None
+        chunks = []
+
+        async def send_compressed(message):
+            nonlocal pending_start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if ("content-encoding" in headers or message["status"] in (204, 304)
+                        or headers.get("content-type", "").startswith(SKIP_CONTENT_TYPES)):
+                    await send(message)
+                else:
+                    pending_start = message
+                return
+            if message["type"] != "http.response.body" or pending_start is None:
+                await send(message)
+                return
+            # Body chunks (BaseHTTPMiddleware re-streams even plain JSON) are joined first
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            start, pending_start = pending_start, None
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) >= self.minimum_size:
+                began = time.perf_counter()
+                compressed = compress(body, coding, self.gzip_level, self.brotli_quality)
+                if self.stats is not None:
+                    self.stats.record(coding, len(body), len(compressed), time.perf_counter() - began)
+                headers["Content-Encoding"] = coding
+                body = compressed
+            headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def etag_for(body: bytes) -> str:
+    """
+    Weak validator for a serialized payload (weak: the same payload is sent with different content codings)
+    """
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match uses weak comparison: W/"x" matches "x" and W/"x"
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
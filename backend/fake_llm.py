@@ -0,0 +1,130 @@
+import asyncio
+import itertools
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Offline stand-in for ChatGroq (LLM_BACKEND=fake): replays recorded responses
+# with a realistic time-to-first-token and per-token pace, so the endpoints
+# can be load-tested without spending Groq quota.
+
+# At most this many of the newest responses are replayed from a response archive
+REPLAY_LIMIT = 1000
+
+# Rough LLM "tokens": a word or a run of punctuation plus trailing whitespace
+TOKEN_RE = re.compile(r'\w+\s*|[^\w\s]+\s*|\s+')
+
+# Tokens are paced against a running deadline and emitted in bursts whenever
+# the schedule is less than this far ahead, so sleep overshoot doesn't accumulate
+MIN_SLEEP = 0.002
+
+DEFAULT_PROMPT_REPLY = (
+    "Recommend a production-ready tech stack for this project. Weigh every choice against the team size, "
+    "budget, expected scale and timeline, and explain the trade-offs that matter for this specific team."
+)
+
+
+def load_responses(path) -> List[str]:
+    """
+    Recorded responses from a file (one response), a directory (every *.txt file, sorted)
+    or a response archive (*.db, the newest REPLAY_LIMIT raw replies - see response_archive.py)
+    """
+    path = Path(path)
+    if path.suffix == ".db":
+        from response_archive import ResponseArchive
+        archive = ResponseArchive(path)
+        try:
+            records = itertools.islice(archive.scan(reverse=True), REPLAY_LIMIT)
+            responses = [record.get("response") or "" for record in records][::-1]
+        finally:
+            archive.close()
+    else:
+        files = sorted(path.glob("*.txt")) if path.is_dir() else [path]
+        responses = [f.read_text(encoding="utf-8") for f in files]
+    responses = [text for text in responses if text.strip()]
+    if not responses:
+        raise ValueError(f"No recorded responses found at {path}")
+    return responses
+
+
+def split_tokens(text: str) -> List[str]:
+    return TOKEN_RE.findall(text)
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Chat model that answers with `responses` in rotation, ignoring the input.
+
+    - first_token_delay: seconds before the first token (queueing + prompt processing)
+    - token_delay: seconds per generated token, +/- a uniform `jitter`
+    ainvoke sleeps for the whole response at once; astream paces the tokens.
+    """
+
+    responses: List[str]
+    first_token_delay: float = 0.0
+    token_delay: float = 0.0
+    jitter: float = 0.0
+    seed: Optional[int] = None
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat"
+
+    def _next_response(self) -> str:
+        response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        return response
+
+    def _rng(self) -> random.Random:
+        return random.Random(None if self.seed is None else self.seed + self.calls)
+
+    def _token_delays(self, tokens: int) -> Iterator[float]:
+        rng = self._rng()
+        for _ in range(tokens):
+            yield max(0.0, self.token_delay + rng.uniform(-self.jitter, self.jitter)) if self.jitter else self.token_delay
+
+    def _total_delay(self, text: str) -> float:
+        return self.first_token_delay + sum(self._token_delays(len(split_tokens(text))))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = self._next_response()
+        time.sleep(self._total_delay(text))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = self._next_response()
+        await asyncio.sleep(self._total_delay(text))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tokens = split_tokens(self._next_response())
+        due = time.monotonic() + self.first_token_delay
+        for token, delay in zip(tokens, self._token_delays(len(tokens))):
+            due += delay
+            pause = due - time.monotonic()
+            if pause > MIN_SLEEP:
+                time.sleep(pause)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tokens = split_tokens(self._next_response())
+        due = time.monotonic() + self.first_token_delay
+        for token, delay in zip(tokens, self._token_delays(len(tokens))):
+            due += delay
+            pause = due - time.monotonic()
+            if pause > MIN_SLEEP:
+                await asyncio.sleep(pause)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
@@ -0,0 +1,43 @@
+import json
+import typing
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the json module
+    orjson = None
+
+# JSON encoding for responses and SSE frames.
+#
+# Pydantic models are serialized by pydantic-core (model_dump_json) without
+# building an intermediate dict; plain dicts (cached recommendations, the
+# other endpoints) go through orjson when it is installed. Both produce the
+# same compact UTF-8 output as starlette's JSONResponse, so ETags of a fresh
+# and a cached copy of the same recommendation match.
+
+
+def dumps(content: typing.Any) -> bytes:
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode("utf-8")
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            pass  # e.g. non-str dict keys or integers beyond 64 bits
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: typing.Union[bytes, str]) -> typing.Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse that also takes a pydantic model as content, encoded with dumps()
+    """
+
+    def render(self, content: typing.Any) -> bytes:
+        return dumps(content)
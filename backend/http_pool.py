@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import threading
+import weakref
+
+import httpx
+
+logger = logging.getLogger("techstack.upstream")
+
+# One pooled httpx.AsyncClient shared by every ChatGroq model. The Groq SDK's
+# default pool drops idle connections after 5s, so a request after a short
+# lull pays TCP + TLS setup again; this pool keeps them longer, can speak
+# HTTP/2 (needs the optional `h2` package) and can be pre-warmed at startup.
+
+
+class CountingTransport(httpx.AsyncHTTPTransport):
+    """
+    AsyncHTTPTransport that counts how many requests opened a new connection
+    vs reused a pooled one (tracked through the response's network stream)
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._streams = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.http_versions: dict[str, int] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await super().handle_async_request(request)
+        stream = response.extensions.get("network_stream")
+        version = response.extensions.get("http_version", b"").decode() or "unknown"
+        with self._lock:
+            self.requests += 1
+            self.http_versions[version] = self.http_versions.get(version, 0) + 1
+            if stream is None:
+                pass
+            elif stream in self._streams:
+                self.reused_connections += 1
+            else:
+                self._streams.add(stream)
+                self.new_connections += 1
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": self.reused_connections,
+                "reuse_rate": round(self.reused_connections / self.requests, 4) if self.requests else 0.0,
+                "open_connections": len(self._streams),
+                "http_versions": dict(self.http_versions),
+            }
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_http_client(max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 60.0,
+                      http2: bool = False, timeout: float = 120.0) -> httpx.AsyncClient:
+    """
+    Pooled AsyncClient for groq.AsyncGroq(http_client=...); its transport is a CountingTransport
+    """
+    if http2 and not http2_available():
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed - using HTTP/1.1")
+        http2 = False
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                          keepalive_expiry=keepalive_expiry)
+    transport = CountingTransport(limits=limits, http2=http2)
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(timeout, connect=10.0),
+                             follow_redirects=True)
+
+
+def pool_stats(client: httpx.AsyncClient) -> dict:
+    """
+    Connection reuse counters of a client made by build_http_client
+    """
+    transport = client._transport
+    return transport.stats() if isinstance(transport, CountingTransport) else {}
+
+
+async def warm_up(client: httpx.AsyncClient, url: str, connections: int = 2, headers: dict = None,
+                  timeout: float = 5.0) -> int:
+    """
+    Open `connections` pooled connections by sending concurrent cheap GETs to `url`.
+    Any HTTP response counts (even 401/404) - the point is the TCP/TLS handshake.
+    Returns how many requests got a response; failures are logged, never raised.
+    """
+    async def ping():
+        try:
+            await client.get(url, headers=headers, timeout=timeout)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning("Upstream warm-up failed: %r", e)
+            return False
+
+    results = await asyncio.gather(*(ping() for _ in range(max(1, connections))))
+    return sum(results)
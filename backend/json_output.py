@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+
+from pydantic import ValidationError
+
+from models import RecommendationOutput, RecommendationResponse
+from stream_parser import parse_recommendation
+
+# JSON output mode (OUTPUT_FORMAT=json / ?output_format=json): stack_chain is
+# asked for a RecommendationOutput document, which pydantic-core decodes and
+# validates in one pass. Only when that fails is the markdown parser tried,
+# in case the model answered in markdown anyway.
+
+OUTPUT_FORMATS = ("markdown", "json")
+
+# Shown to the model in the JSON system prompt
+JSON_SHAPE = """{
+  "architecture_diagram": "graph TD\\n    Browser[User_Browser]\\n    React[React_App]\\n    Browser -->|HTTP_Request| React",
+  "primary": {
+    "frontend": [{"name": "React", "pros": ["..."], "cons": ["..."], "why": "..."}],
+    "backend": [...],
+    "database": [...],
+    "devops": [...],
+    "additional": [...]
+  },
+  "alternatives": [
+    {
+      "when_to_use": "...",
+      "trade_off": "...",
+      "why_consider": "...",
+      "architecture_diagram": "graph TD\\n    ...",
+      "stack": {"frontend": [...], "backend": [...], "database": [...], "devops": [...], "additional": [...]}
+    }
+  ]
+}"""
+
+
+def extract_json(text: str) -> str:
+    """
+    The outermost {...} of a reply, dropping ```json fences or prose around it
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("No JSON object in the response")
+    return text[start:end + 1]
+
+
+def parse_json_recommendation(text: str) -> RecommendationResponse:
+    """
+    Decode and validate a JSON-mode reply; raises ValueError if it isn't a valid RecommendationOutput
+    """
+    try:
+        output = RecommendationOutput.model_validate_json(extract_json(text))
+    except ValidationError as e:
+        raise ValueError(f"Invalid JSON recommendation: {e.error_count()} errors") from e
+    # Already validated as RecommendationOutput, so no second pass
+    return RecommendationResponse.model_construct(
+        architecture_diagram=output.architecture_diagram,
+        primary=output.primary,
+        alternatives=[alt.stack for alt in output.alternatives],
+        alternative_explanations=[
+            {"stack_num": num, "when_to_use": alt.when_to_use, "trade_off": alt.trade_off,
+             "why_consider": alt.why_consider}
+            for num, alt in enumerate(output.alternatives, 1)
+        ],
+        alternative_diagrams=[alt.architecture_diagram for alt in output.alternatives],
+    )
+
+
+def parse_output(text: str, output_format: str) -> tuple[RecommendationResponse, str]:
+    """
+    Parse a stack_chain reply in `output_format`. Returns (parsed, parser used):
+    "json", "markdown", or "markdown_fallback" when a JSON reply had to be parsed as markdown.
+    """
+    if output_format == "json":
+        try:
+            return parse_json_recommendation(text), "json"
+        except ValueError as e:
+            print(f"JSON output unusable ({e}), falling back to the markdown parser")
+            return parse_recommendation(text), "markdown_fallback"
+    return parse_recommendation(text), "markdown"
+
+
+def has_stack(parsed: RecommendationResponse) -> bool:
+    primary = parsed.primary
+    return bool(primary.frontend or primary.backend)
+
+
+class ParseStats:
+    """
+    Per-output-format parse time and success rate (last `window` samples per format)
+    """
+
+    def __init__(self, window: int = 1000):
+        self._samples = {fmt: deque(maxlen=window) for fmt in OUTPUT_FORMATS}
+        self._counts = {fmt: {"parsed": 0, "succeeded": 0, "fallbacks": 0} for fmt in OUTPUT_FORMATS}
+        self._lock = threading.Lock()
+
+    def record(self, output_format: str, parser: str, seconds: float, succeeded: bool):
+        with self._lock:
+            self._samples[output_format].append(seconds * 1000)
+            counts = self._counts[output_format]
+            counts["parsed"] += 1
+            counts["succeeded"] += succeeded
+            counts["fallbacks"] += parser == "markdown_fallback"
+
+    def timed_parse(self, text: str, output_format: str) -> RecommendationResponse:
+        start = time.perf_counter()
+        parsed, parser = parse_output(text, output_format)
+        self.record(output_format, parser, time.perf_counter() - start, has_stack(parsed))
+        return parsed
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for fmt, samples in self._samples.items():
+                ordered = sorted(samples)
+                counts = self._counts[fmt]
+                result[fmt] = {
+                    **counts,
+                    "success_rate": round(counts["succeeded"] / counts["parsed"], 4) if counts["parsed"] else 0.0,
+                    "avg_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                    "p50_ms": round(ordered[len(ordered) // 2], 3) if ordered else 0.0,
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3) if ordered else 0.0,
+                }
+            return result
@@ -0,0 +1,111 @@
+import os
+import uuid
+from pathlib import Path
+
+import groq
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_groq import ChatGroq
+
+from fake_llm import DEFAULT_PROMPT_REPLY, ReplayChatModel, load_responses
+from metrics import Counter
+
+# The upstream models. Everything LangChain/Groq lives behind this module so
+# main.py only imports it when the models are first needed (main.llm_chains),
+# not at startup: langchain_core, groq and langchain_groq are about a third of
+# the app's import time (see benchmarks/bench_startup.py).
+
+
+# --- upstream token accounting ---
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """
+    LangChain callback counting input/output tokens per model. Uses the
+    provider's usage block when the response has one (ChatGroq ainvoke),
+    otherwise estimates ~4 characters per token (streams, fake backend).
+    """
+
+    run_inline = True  # plain counter updates - don't hop to a thread pool
+
+    def __init__(self, model: str, tokens: Counter, calls: Counter, errors: Counter):
+        self.model = model
+        self.tokens = tokens
+        self.calls = calls
+        self.errors = errors
+        self._input_estimates: dict[uuid.UUID, int] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: uuid.UUID, **kwargs):
+        self._input_estimates[run_id] = sum(len(str(m.content)) for batch in messages for m in batch) // 4
+
+    def on_llm_end(self, response, *, run_id: uuid.UUID, **kwargs):
+        estimate = self._input_estimates.pop(run_id, 0)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        if completion_tokens is None:
+            completion_tokens = sum(len(g.text) for batch in response.generations for g in batch) // 4
+        self.tokens.labels(self.model, "input").inc(prompt_tokens if prompt_tokens is not None else estimate)
+        self.tokens.labels(self.model, "output").inc(completion_tokens)
+        self.calls.labels(self.model).inc()
+
+    def on_llm_error(self, error: BaseException, *, run_id: uuid.UUID, **kwargs):
+        self._input_estimates.pop(run_id, None)
+        status = getattr(error, "status_code", None)
+        self.errors.labels(self.model, str(status) if isinstance(status, int) else type(error).__name__).inc()
+
+
+# --- model construction ---
+
+def build_models(backend: str, http_client: httpx.AsyncClient, tokens: Counter, calls: Counter,
+                 errors: Counter) -> tuple:
+    """
+    (groq_client, prompt_engineer_model, stack_model) for LLM_BACKEND `backend`.
+    "fake" replays recorded responses (see fake_llm.py) and has no groq_client.
+    """
+    # Count tokens, calls and errors per model for /metrics
+    prompt_engineer_callbacks = [TokenUsageCallback("prompt_engineer", tokens, calls, errors)]
+    stack_callbacks = [TokenUsageCallback("stack", tokens, calls, errors)]
+
+    if backend == "fake":
+        fake_timing = dict(
+            first_token_delay=float(os.getenv("FAKE_LLM_FIRST_TOKEN_MS", "300")) / 1000,
+            token_delay=float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "1.5")) / 1000,
+            jitter=float(os.getenv("FAKE_LLM_JITTER_MS", "0.5")) / 1000
+        )
+        prompt_engineer_model = ReplayChatModel(responses=[DEFAULT_PROMPT_REPLY], callbacks=prompt_engineer_callbacks,
+                                                **fake_timing)
+        stack_model = ReplayChatModel(
+            responses=load_responses(os.getenv("FAKE_LLM_RESPONSES") or Path(__file__).parent / "last_llm_response.txt"),
+            callbacks=stack_callbacks,
+            **fake_timing
+        )
+        return None, prompt_engineer_model, stack_model
+
+    # Retries are done by llm_scheduler (jittered, slot released while backing off), not the Groq SDK
+    groq_client = groq.AsyncGroq(
+        api_key=os.getenv("GROQ_API_KEY"),
+        base_url=os.getenv("GROQ_API_BASE") or None,
+        http_client=http_client,
+        max_retries=0
+    )
+
+    # Model 1: For generating custom prompts based on user inputs
+    prompt_engineer_model = ChatGroq(
+        temperature=0.7,  # Higher creativity for prompt generation
+        model_name="llama-3.1-8b-instant",
+        api_key=os.getenv("GROQ_API_KEY"),
+        max_retries=0,
+        async_client=groq_client.chat.completions,
+        callbacks=prompt_engineer_callbacks
+    )
+
+    # Model 2: For tech stack recommendation (keep conservative)
+    stack_model = ChatGroq(
+        temperature=0.2,
+        model_name="llama-3.1-8b-instant",
+        api_key=os.getenv("GROQ_API_KEY"),
+        max_retries=0,
+        async_client=groq_client.chat.completions,
+        callbacks=stack_callbacks
+    )
+    return groq_client, prompt_engineer_model, stack_model
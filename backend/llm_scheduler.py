@@ -0,0 +1,273 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+# Priorities: lower runs first
+INTERACTIVE = 0
+BATCH = 1
+
+# Upstream statuses worth retrying (rate limited / provider trouble)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SchedulerOverloaded(Exception):
+    """
+    Raised instead of queueing when the wait for an upstream slot would exceed
+    the deadline (or the queue is full). Endpoints turn it into a 503.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously; `per_minute <= 0` means unlimited
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = float(per_minute)
+        self.capacity = self.per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` is available (0 if it is now)
+        """
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill(time.monotonic())
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def take(self, amount: float):
+        if self.per_minute > 0:
+            self._refill(time.monotonic())
+            self.level -= min(amount, self.capacity)
+
+
+def upstream_status(error: BaseException) -> Optional[int]:
+    """
+    HTTP status of a provider error (groq.APIStatusError and friends), if any
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    status = upstream_status(error)
+    if status is not None:
+        return status in RETRY_STATUSES
+    # groq.APIConnectionError / APITimeoutError carry no status
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or type(error).__name__ in (
+        "APIConnectionError", "APITimeoutError")
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    """
+    Sits between the endpoints and the LangChain chains:
+
+    - at most `max_concurrency` upstream calls run at once
+    - requests-per-minute and tokens-per-minute token buckets
+    - callers wait in a bounded priority queue (INTERACTIVE before BATCH, FIFO within a priority)
+    - 429/5xx/connection errors are retried with full-jitter exponential backoff
+      (honoring Retry-After), releasing the slot while backing off
+    - when the estimated queue wait exceeds `queue_deadline` (or the queue is
+      full) callers get SchedulerOverloaded immediately instead of timing out later
+    """
+
+    def __init__(self, max_concurrency: int = 8, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_queue: int = 100, queue_deadline: float = 30.0, max_retries: int = 3,
+                 retry_base_delay: float = 0.5, retry_max_delay: float = 8.0):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue = max(0, int(max_queue))
+        self.queue_deadline = float(queue_deadline)
+        self.max_retries = max(0, int(max_retries))
+        self.retry_base_delay = float(retry_base_delay)
+        self.retry_max_delay = float(retry_max_delay)
+        self._waiting = []  # heap of (priority, seq, future, tokens)
+        self._seq = itertools.count()
+        self._running = 0
+        self._timer = None
+        self._avg_call_seconds = 5.0  # EWMA of upstream call time, seeds the wait estimate
+        self.started = 0
+        self.retries = 0
+        self.shed = 0
+        self.failures = 0
+        self.rate_limited = 0
+
+    # --- public API ---
+
+    async def run(self, fn: Callable[[], Awaitable], tokens: int = 0, priority: int = INTERACTIVE):
+        """
+        Await `fn()` (a fresh coroutine per attempt) under the scheduler's limits
+        """
+        self.admit(priority)
+        attempt = 0
+        while True:
+            await self._acquire(priority, tokens, self.queue_deadline if attempt == 0 else None)
+            start = time.monotonic()
+            try:
+                result = await fn()
+                self._observe(time.monotonic() - start)
+                return result
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                error = e
+            finally:
+                self._release()
+            await asyncio.sleep(self._backoff(attempt, error))
+            attempt += 1
+
+    async def stream(self, fn: Callable[[], AsyncIterator], tokens: int = 0,
+                     priority: int = INTERACTIVE) -> AsyncIterator:
+        """
+        Iterate `fn()` (a fresh async iterator per attempt) holding one slot for
+        the whole stream. Only failures before the first chunk are retried.
+        """
+        self.admit(priority)
+        attempt = 0
+        while True:
+            await self._acquire(priority, tokens, self.queue_deadline if attempt == 0 else None)
+            start = time.monotonic()
+            started = False
+            upstream = fn()
+            try:
+                async for chunk in upstream:
+                    started = True
+                    yield chunk
+                self._observe(time.monotonic() - start)
+                return
+            except Exception as e:
+                if started or not self._should_retry(e, attempt):
+                    raise
+                error = e
+            finally:
+                self._release()
+                # A consumer that stops early closes us; close the upstream stream with us
+                if hasattr(upstream, "aclose"):
+                    await upstream.aclose()
+            await asyncio.sleep(self._backoff(attempt, error))
+            attempt += 1
+
+    def admit(self, priority: int = INTERACTIVE):
+        """
+        Fail fast with SchedulerOverloaded if a new call would wait past the deadline
+        """
+        ahead = sum(1 for item in self._waiting if item[0] <= priority and not item[2].done())
+        if self.max_queue and ahead >= self.max_queue:
+            self._shed("LLM queue is full", self.queue_deadline)
+        estimate = self.estimated_wait(ahead)
+        if self.queue_deadline > 0 and estimate > self.queue_deadline:
+            self._shed(f"Estimated LLM queue wait {estimate:.1f}s exceeds {self.queue_deadline:.1f}s", estimate)
+
+    def estimated_wait(self, ahead: int = None) -> float:
+        if ahead is None:
+            ahead = sum(1 for item in self._waiting if not item[2].done())
+        slots = 0.0 if self._running + ahead < self.max_concurrency else \
+            (self._running + ahead - self.max_concurrency + 1) / self.max_concurrency * self._avg_call_seconds
+        return max(slots, self.requests.wait_time(ahead + 1))
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "queued": sum(1 for item in self._waiting if not item[2].done()),
+            "max_concurrency": self.max_concurrency,
+            "estimated_wait_seconds": round(self.estimated_wait(), 3),
+            "avg_call_seconds": round(self._avg_call_seconds, 3),
+            "started": self.started,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+            "failures": self.failures,
+        }
+
+    # --- internals ---
+
+    def _shed(self, message: str, retry_after_seconds: float):
+        self.shed += 1
+        raise SchedulerOverloaded(message, retry_after_seconds)
+
+    async def _acquire(self, priority: int, tokens: int, deadline: Optional[float]):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._seq), future, tokens))
+        self._dispatch()
+        try:
+            if deadline:
+                await asyncio.wait_for(asyncio.shield(future), deadline)
+            else:
+                await future
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted in the same instant we gave up - hand the slot back
+                self._release()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self._shed(f"Waited over {deadline:.0f}s for an LLM slot", deadline)
+            raise
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._waiting and self._running < self.max_concurrency:
+            priority, seq, future, tokens = self._waiting[0]
+            if future.done():
+                heapq.heappop(self._waiting)  # gave up while queued
+                continue
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._on_timer)
+                return
+            heapq.heappop(self._waiting)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._running += 1
+            self.started += 1
+            future.set_result(None)
+
+    def _release(self):
+        self._running -= 1
+        self._dispatch()
+
+    def _observe(self, seconds: float):
+        self._avg_call_seconds = 0.8 * self._avg_call_seconds + 0.2 * seconds
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if upstream_status(error) == 429:
+            self.rate_limited += 1
+        if attempt < self.max_retries and is_retryable(error):
+            self.retries += 1
+            return True
+        self.failures += 1
+        return False
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        hinted = retry_after(error)
+        return max(delay, min(hinted, self.retry_max_delay)) if hinted is not None else delay
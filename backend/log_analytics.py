@@ -0,0 +1,483 @@
+"""
+Visitor and response log analytics from incrementally maintained rollups.
+
+Counts per IP, path, method, user agent, status, hour and day+IP (from
+logs/visitor_access.log) and per model type and appType (from
+logs/*_responses.jsonl and their rotated .jsonl.gz segments) are kept in a
+SQLite file next to the logs. Every report first folds in what was appended
+since the last run - files are memory-mapped from a per-file checkpoint up to
+their last complete line, rotated segments are read once - and then answers
+from the rollups, so it costs milliseconds however large the logs are.
+
+A checkpoint is (inode, offset, first bytes) of a file: a truncated or
+replaced access log is read again from the start, and the part of a rotated
+response log that was already counted is skipped in its segment.
+
+Usage (from backend/; scripts/analyze-visitor-logs.sh runs it from the repo root):
+    python log_analytics.py summary              # the default
+    python log_analytics.py hourly | daily | geo | today
+    python log_analytics.py agents 10
+    python log_analytics.py export visitors.csv
+    python log_analytics.py update               # fold in new lines only (e.g. from cron)
+"""
+import argparse
+import csv
+import gzip
+import json
+import mmap
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional
+
+ACCESS_LOG = "visitor_access.log"
+RESPONSE_LOG_SUFFIX = "_responses.jsonl"
+HEAD_BYTES = 64  # identifies a file across runs, together with its inode
+CHUNK_BYTES = 8 * 1024 * 1024  # read (and split into lines) this much at a time
+FLUSH_LINES = 200_000  # move the in-memory counts into SQLite every this many lines
+
+# Rotated response log segments (see log_writer.py): "<stem>.<stamp>.jsonl" while
+# being compressed, "<stem>.<stamp>.jsonl.gz" after
+RESPONSE_SEGMENT = re.compile(r"(.+_responses)\.(\d{8}-\d{6}-\d{6})\.jsonl(\.gz)?")
+# The first fields of a main.log_request_response entry, in the order they are
+# written - a match saves decoding the whole (multi-KB) line
+RESPONSE_PREFIX = re.compile(rb'\{"timestamp": "([^"]*)", "model_type": "([^"]*)", "inputs": \{"appType": "((?:[^"\\]|\\.)*)"')
+
+
+def parse_access_line(line: bytes) -> Optional[tuple]:
+    """
+    (time, ip, method, path, user_agent, status) of a visitor_tracker line
+    (see access_log.AccessLogFormatter), None for any other line. Lines
+    written before the Status field existed have status "".
+    """
+    parts = line.decode("utf-8", "replace").split(" | ")
+    if len(parts) < 7 or parts[1] != "visitor_tracker" or not parts[2].startswith("IP: "):
+        return None
+    # The user agent is the only free-text field, so a " | " inside it is joined back
+    end, status = len(parts), ""
+    for i in range(7, len(parts)):
+        if parts[i].startswith("Status: "):
+            end, status = i, parts[i][8:]
+            break
+    return parts[3][6:], parts[2][4:], parts[4][8:], parts[5][6:], " | ".join(parts[6:end])[11:], status
+
+
+def parse_response_line(line: bytes) -> Optional[tuple]:
+    """
+    (timestamp, model_type, appType) of a response log entry, None if it isn't one
+    """
+    match = RESPONSE_PREFIX.match(line)
+    if match is not None:
+        app_type = match.group(3)
+        app_type = json.loads(b'"' + app_type + b'"') if b"\\" in app_type else app_type.decode("utf-8", "replace")
+        return match.group(1).decode(), match.group(2).decode(), app_type
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(entry, dict):
+        return None
+    inputs = entry.get("inputs")
+    app_type = inputs.get("appType", "") if isinstance(inputs, dict) else ""
+    return str(entry.get("timestamp", "")), str(entry.get("model_type", "")), str(app_type)
+
+
+def mapped_lines(path: Path, start: int) -> Iterator[tuple]:
+    """
+    (lines, offset after them) for the complete lines of `path` from byte `start`,
+    CHUNK_BYTES at a time, read through mmap. A trailing partial line is left
+    for the next run.
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size <= start:
+            return
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as buf:
+            end = buf.rfind(b"\n", start) + 1
+            pos = start
+            while pos < end:
+                cut = buf.rfind(b"\n", pos, min(pos + CHUNK_BYTES, end)) + 1 or buf.find(b"\n", pos) + 1
+                yield buf[pos:cut].split(b"\n")[:-1], cut
+                pos = cut
+
+
+def gzip_lines(path: Path, skip: int = 0) -> Iterator[tuple]:
+    """
+    Like mapped_lines for a compressed segment, skipping its first `skip` (uncompressed) bytes
+    """
+    with gzip.open(path, "rb") as f:
+        while skip > 0:
+            data = f.read(min(skip, CHUNK_BYTES))
+            if not data:
+                return
+            skip -= len(data)
+        pos, rest = 0, b""
+        while True:
+            data = f.read(CHUNK_BYTES)
+            if not data:
+                return
+            data = rest + data
+            cut = data.rfind(b"\n") + 1
+            rest = data[cut:]
+            pos += cut
+            if cut:
+                yield data[:cut].split(b"\n")[:-1], pos
+
+
+class LogAnalytics:
+    """
+    Rollups of the logs in `log_dir`, stored in `db_path` (default: <log_dir>/analytics.db).
+    update() folds in new lines; the report methods only query the rollups.
+    """
+
+    def __init__(self, log_dir: str = "logs", db_path: Optional[str] = None):
+        self.log_dir = Path(log_dir)
+        self.db_path = Path(db_path) if db_path else self.log_dir / "analytics.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: update() runs its own BEGIN IMMEDIATE ... COMMIT
+        self._db = sqlite3.connect(str(self.db_path), timeout=5, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS rollups ("
+                         "dimension TEXT NOT NULL, key TEXT NOT NULL, count INTEGER NOT NULL, "
+                         "PRIMARY KEY (dimension, key))")
+        self._db.execute("CREATE INDEX IF NOT EXISTS rollups_top ON rollups (dimension, count)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS checkpoints ("
+                         "source TEXT PRIMARY KEY, inode INTEGER NOT NULL, offset INTEGER NOT NULL, head BLOB NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS segments_read (name TEXT PRIMARY KEY)")
+        self._counts = Counter()
+        self._pending = 0
+
+    def close(self):
+        self._db.close()
+
+    # --- incremental update ---
+
+    def update(self) -> dict:
+        """
+        Fold in everything appended since the last update. Returns lines read per
+        source. Raises sqlite3.OperationalError if another update holds the file.
+        """
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            read = {ACCESS_LOG: self._update_access(self.log_dir / ACCESS_LOG)}
+            for stem in self._response_logs():
+                read[f"{stem}.jsonl"] = self._update_responses(stem)
+            self._flush()
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._counts.clear()
+            self._pending = 0
+            self._db.execute("ROLLBACK")
+            raise
+        return read
+
+    def _update_access(self, path: Path) -> int:
+        identity = self._identity(path)
+        if identity is None:
+            return 0
+        offset = self._resume_offset(ACCESS_LOG, identity)
+        read = 0
+        counts = self._counts
+        for lines, offset in mapped_lines(path, offset):
+            for line in lines:
+                fields = parse_access_line(line)
+                if fields is None:
+                    continue
+                when, ip, method, request_path, user_agent, status = fields
+                counts["ip", ip] += 1
+                counts["path", request_path] += 1
+                counts["method", method] += 1
+                counts["user_agent", user_agent] += 1
+                counts["hour", when[:13]] += 1
+                counts["day_ip", f"{when[:10]} {ip}"] += 1
+                if status:
+                    counts["status", status] += 1
+            read += len(lines)
+            self._counted(len(lines))
+            self._save_checkpoint(ACCESS_LOG, identity, offset)
+        return read
+
+    def _response_logs(self) -> list:
+        stems = {p.name[:-len(".jsonl")] for p in self.log_dir.glob(f"*{RESPONSE_LOG_SUFFIX}")}
+        stems.update(m.group(1) for m in (RESPONSE_SEGMENT.fullmatch(p.name) for p in self.log_dir.glob("*.jsonl*")) if m)
+        return sorted(stems)
+
+    def _update_responses(self, stem: str) -> int:
+        live = self.log_dir / f"{stem}.jsonl"
+        source = live.name
+        previous = self._checkpoint(source)
+        identity = self._identity(live)
+        rotated = previous is not None and (identity is None or not self._same_file(previous, identity))
+
+        segments = {}
+        for path in self.log_dir.glob(f"{stem}.*.jsonl*"):
+            match = RESPONSE_SEGMENT.fullmatch(path.name)
+            if match and match.group(1) == stem:
+                # The uncompressed file is complete; the .gz may still be being written
+                name = f"{stem}.{match.group(2)}.jsonl"
+                if match.group(3) is None or name not in segments:
+                    segments[name] = path
+        done = {row[0] for row in self._db.execute("SELECT name FROM segments_read WHERE name LIKE ?",
+                                                   (f"{stem}.%",))}
+        read = 0
+        for name in sorted(set(segments) - done):
+            path = segments[name]
+            skip = 0
+            if rotated and previous[1] and self._head(path).startswith(previous[2]):
+                # The live file, counted up to `offset` last time and rotated since
+                skip, rotated = previous[1], False
+            for lines, _ in gzip_lines(path, skip) if path.suffix == ".gz" else mapped_lines(path, skip):
+                read += self._count_responses(lines)
+            self._db.execute("INSERT OR IGNORE INTO segments_read (name) VALUES (?)", (name,))
+
+        if identity is not None:
+            offset = self._resume_offset(source, identity)
+            for lines, offset in mapped_lines(live, offset):
+                read += self._count_responses(lines)
+                self._save_checkpoint(source, identity, offset)
+        return read
+
+    def _count_responses(self, lines: list) -> int:
+        counts = self._counts
+        for line in lines:
+            fields = parse_response_line(line)
+            if fields is None:
+                continue
+            _, model_type, app_type = fields
+            counts["model_type", model_type] += 1
+            if model_type == "stack_recommendation":
+                counts["app_type", app_type] += 1
+        self._counted(len(lines))
+        return len(lines)
+
+    def _counted(self, lines: int):
+        # Bounded memory on a first run over a huge log
+        self._pending += lines
+        if self._pending >= FLUSH_LINES:
+            self._flush()
+
+    def _flush(self):
+        if self._counts:
+            self._db.executemany(
+                "INSERT INTO rollups (dimension, key, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count",
+                ((dimension, key, count) for (dimension, key), count in self._counts.items())
+            )
+            self._counts.clear()
+        self._pending = 0
+
+    # --- checkpoints ---
+
+    @staticmethod
+    def _head(path: Path) -> bytes:
+        opener = gzip.open if path.suffix == ".gz" else open
+        try:
+            with opener(path, "rb") as f:
+                return f.read(HEAD_BYTES)
+        except (OSError, EOFError):
+            return b""
+
+    def _identity(self, path: Path) -> Optional[tuple]:
+        """
+        (inode, size, head) of `path`, None if it doesn't exist
+        """
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, self._head(path)
+
+    @staticmethod
+    def _same_file(checkpoint: tuple, identity: tuple) -> bool:
+        inode, offset, head = checkpoint
+        return identity[0] == inode and identity[1] >= offset and identity[2][:len(head)] == head
+
+    def _checkpoint(self, source: str) -> Optional[tuple]:
+        return self._db.execute("SELECT inode, offset, head FROM checkpoints WHERE source = ?", (source,)).fetchone()
+
+    def _resume_offset(self, source: str, identity: tuple) -> int:
+        checkpoint = self._checkpoint(source)
+        if checkpoint is not None and self._same_file(checkpoint, identity):
+            return checkpoint[1]
+        # New, truncated or replaced file: read it from the start
+        self._save_checkpoint(source, identity, 0)
+        return 0
+
+    def _save_checkpoint(self, source: str, identity: tuple, offset: int):
+        self._db.execute("INSERT OR REPLACE INTO checkpoints (source, inode, offset, head) VALUES (?, ?, ?, ?)",
+                         (source, identity[0], offset, identity[2][:offset]))
+
+    # --- reports (rollups only) ---
+
+    def top(self, dimension: str, limit: int) -> list:
+        return self._db.execute("SELECT key, count FROM rollups WHERE dimension = ? ORDER BY count DESC, key LIMIT ?",
+                                (dimension, limit)).fetchall()
+
+    def distinct(self, dimension: str) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM rollups WHERE dimension = ?", (dimension,)).fetchone()[0]
+
+    def total(self, since: str = "", until: str = "~") -> int:
+        """
+        Access log requests with since <= hour key ("YYYY-MM-DDTHH") < until
+        """
+        return self._db.execute("SELECT COALESCE(SUM(count), 0) FROM rollups "
+                                "WHERE dimension = 'hour' AND key >= ? AND key < ?", (since, until)).fetchone()[0]
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.total(),
+            "unique_ips": self.distinct("ip"),
+            "top_ips": self.top("ip", 5),
+            "top_paths": self.top("path", 5),
+            "methods": self.top("method", 100),
+            "statuses": self.top("status", 100),
+            "top_user_agents": self.top("user_agent", 5),
+            "recommendations_by_app_type": self.top("app_type", 10),
+            "responses_by_model": self.top("model_type", 10),
+        }
+
+    def hourly(self, hours: int = 24, now: Optional[datetime] = None) -> list:
+        """
+        [(hour, requests)] for the last `hours` hours that had requests
+        """
+        start = ((now or datetime.now()) - timedelta(hours=hours - 1)).strftime("%Y-%m-%dT%H")
+        return self._db.execute("SELECT key, count FROM rollups WHERE dimension = 'hour' AND key >= ? ORDER BY key",
+                                (start,)).fetchall()
+
+    def daily(self) -> list:
+        """
+        [(day, requests, unique IPs)]
+        """
+        return self._db.execute(
+            "SELECT h.day, h.requests, COALESCE(u.ips, 0) FROM "
+            "(SELECT substr(key, 1, 10) AS day, SUM(count) AS requests FROM rollups WHERE dimension = 'hour' GROUP BY day) h "
+            "LEFT JOIN (SELECT substr(key, 1, 10) AS day, COUNT(*) AS ips FROM rollups WHERE dimension = 'day_ip' GROUP BY day) u "
+            "ON u.day = h.day ORDER BY h.day"
+        ).fetchall()
+
+    def day(self, day: str) -> dict:
+        """
+        Requests, unique IPs and requests per IP on `day` (YYYY-MM-DD)
+        """
+        # "YYYY-MM-DD <ip>" keys of that day sort between "YYYY-MM-DD " and "YYYY-MM-DD!"
+        by_ip = self._db.execute("SELECT substr(key, 12), count FROM rollups WHERE dimension = 'day_ip' "
+                                 "AND key >= ? AND key < ? ORDER BY count DESC, key", (f"{day} ", f"{day}!")).fetchall()
+        return {"requests": self.total(day, f"{day}~"), "unique_ips": len(by_ip), "by_ip": by_ip}
+
+    # --- export (reads the log itself) ---
+
+    def export_csv(self, output: str) -> int:
+        """
+        Write every access record as CSV (the columns scripts/analyze-visitor-logs.sh exported)
+        """
+        path = self.log_dir / ACCESS_LOG
+        rows = 0
+        with open(output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(["Timestamp", "IP", "Method", "Path", "UserAgent"])
+            if path.exists():
+                for lines, _ in mapped_lines(path, 0):
+                    for line in lines:
+                        fields = parse_access_line(line)
+                        if fields is not None:
+                            writer.writerow(fields[:5])
+                            rows += 1
+        return rows
+
+
+# --- CLI ---
+
+def print_header(title: str):
+    print("╔════════════════════════════════════════╗")
+    print(f"║ {title}")
+    print("╚════════════════════════════════════════╝\n")
+
+
+def print_counts(title: str, rows: list, unit: str = "visits"):
+    print(f"{title}:")
+    for key, count in rows:
+        print(f"  {key} ({count} {unit})")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", default="summary",
+                        choices=("summary", "hourly", "daily", "geo", "today", "agents", "export", "update"))
+    parser.add_argument("arg", nargs="?", help="export: output file; agents: how many")
+    parser.add_argument("--log-dir", default="logs", help="Directory with visitor_access.log and *_responses.jsonl")
+    parser.add_argument("--db", help="Rollup file (default: <log-dir>/analytics.db)")
+    parser.add_argument("--no-update", action="store_true", help="Report from the rollups as they are")
+    args = parser.parse_args()
+
+    analytics = LogAnalytics(args.log_dir, args.db)
+    if not args.no_update and args.command != "export":
+        start = time.perf_counter()
+        try:
+            read = analytics.update()
+            print(f"Rollups updated: {sum(read.values())} new lines in {(time.perf_counter() - start) * 1000:.0f}ms",
+                  file=sys.stderr)
+        except sqlite3.OperationalError as e:
+            print(f"Rollups not updated ({e}) - reporting the last completed update", file=sys.stderr)
+
+    command = args.command
+    if command == "summary":
+        summary = analytics.summary()
+        print_header("VISITOR SUMMARY REPORT")
+        print(f"Total Requests:\n{summary['requests']}\n")
+        print(f"Unique Visitor IPs:\n{summary['unique_ips']}\n")
+        print_counts("Top 5 Visitor IPs", summary["top_ips"])
+        print_counts("Most Visited Paths", summary["top_paths"])
+        print("Requests by Method:")
+        for method, count in summary["methods"]:
+            print(f"  {method}: {count}")
+        print("\nRequests by Status:")
+        for status, count in summary["statuses"]:
+            print(f"  {status}: {count}")
+        print()
+        print_counts("Top 5 User Agents", [(ua[:60], count) for ua, count in summary["top_user_agents"]], "requests")
+        print_counts("Recommendations by App Type", summary["recommendations_by_app_type"], "requests")
+    elif command == "hourly":
+        print_header("HOURLY TRAFFIC REPORT")
+        print("Requests per Hour (Last 24 hours):")
+        for hour, count in analytics.hourly():
+            print(f"  {hour[:10]} {hour[11:13]}:00 - {hour[11:13]}:59: {count} requests")
+    elif command == "daily":
+        print_header("DAILY TRAFFIC REPORT")
+        print("Requests per Day:")
+        for day, count, ips in analytics.daily():
+            print(f"  {day}: {count} requests ({ips} unique IPs)")
+    elif command == "geo":
+        print_header("GEOGRAPHIC ANALYSIS (by IP)")
+        print("Note: This requires local geo-IP database. Showing IP summary instead.\n")
+        print("IP Distribution:")
+        for ip, count in analytics.top("ip", 20):
+            print(f"  {ip:<15} {count:>4} requests")
+    elif command == "today":
+        today = datetime.now().strftime("%Y-%m-%d")
+        stats = analytics.day(today)
+        print_header(f"VISITORS TODAY ({today})")
+        print(f"Total Visits (All Time): {analytics.total()}")
+        print(f"Unique IPs (All Time): {analytics.distinct('ip')}")
+        print(f"Visits Today: {stats['requests']}")
+        print(f"Unique IPs Today: {stats['unique_ips']}\n")
+        print_counts("Breakdown by IP", stats["by_ip"])
+    elif command == "agents":
+        limit = int(args.arg or 10)
+        print_header(f"TOP {limit} USER AGENTS")
+        print_counts("User Agent Distribution", analytics.top("user_agent", limit), "requests")
+    elif command == "export":
+        output = args.arg or f"visitor_report_{datetime.now():%Y%m%d_%H%M%S}.csv"
+        print_header("EXPORTING LOGS")
+        rows = analytics.export_csv(output)
+        print(f"Exported to: {output}")
+        print(f"Rows: {rows + 1}")
+    analytics.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: single-process only there
+    fcntl = None
+
+# What submit() does when the queue is full:
+#   drop_newest - discard the record being submitted (default, never blocks)
+#   drop_oldest - discard the oldest queued record to make room
+#   block       - wait up to `block_timeout` seconds, then discard
+DROP_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+_STOP = object()
+
+
+class BackgroundLogWriter:
+    """
+    Bounded in-memory queue drained by one writer thread.
+
+    Request handlers only enqueue (`append_jsonl` / `replace_text`); the thread
+    serializes, groups records per file and writes each batch with one open()
+    per file. JSONL files are rotated by size and/or age and the rotated
+    segments are gzip-compressed, keeping at most `backups` of them.
+
+    Several worker processes can share the files: each batch is appended
+    with a single O_APPEND write under a shared flock on "<file>.lock", and
+    rotation takes that lock exclusively, so lines never interleave and no
+    worker appends to a segment that is being compressed. Text snapshots are
+    replaced atomically (the last writer wins).
+    """
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 256, flush_interval: float = 1.0,
+                 max_bytes: int = 50 * 1024 * 1024, rotate_interval: float = 0, backups: int = 10,
+                 drop_policy: str = "drop_newest", block_timeout: float = 0.05):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {DROP_POLICIES}, got {drop_policy!r}")
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.max_bytes = int(max_bytes)
+        self.rotate_interval = float(rotate_interval)
+        self.backups = int(backups)
+        self.drop_policy = drop_policy
+        self.block_timeout = float(block_timeout)
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._segment_started: dict[Path, tuple] = {}  # path -> (inode, first seen, size)
+        self._dirs: set[Path] = set()  # directories already created
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+        self._reported_drops = 0
+        self._last_drop_report = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    # --- producer side (called from request handlers) ---
+
+    def append_jsonl(self, path: Path, record: dict) -> bool:
+        """
+        Queue `record` to be appended as one JSON line to `path`
+        """
+        return self._submit(("jsonl", Path(path), record))
+
+    def replace_text(self, path: Path, text: str) -> bool:
+        """
+        Queue an overwrite of `path` with `text` (debug snapshots like last_llm_response.txt)
+        """
+        return self._submit(("text", Path(path), text))
+
+    def _submit(self, item: tuple) -> bool:
+        if self._closed:
+            return False
+        try:
+            if self.drop_policy == "block":
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            if self.drop_policy != "drop_oldest":
+                return self._count_drop()
+            try:
+                self._queue.get_nowait()
+                self._count_drop()
+                self._queue.put_nowait(item)
+            except (queue.Empty, queue.Full):
+                return self._count_drop()
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _count_drop(self) -> bool:
+        with self._lock:
+            self.dropped += 1
+        return False
+
+    def flush(self, timeout: float = 5.0):
+        """
+        Block until everything queued so far has been written
+        """
+        done = threading.Event()
+        if self._submit(("flush", None, done)):
+            done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def alive(self) -> bool:
+        """
+        Accepting records and the writer thread is running
+        """
+        return not self._closed and self._thread.is_alive()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "drop_policy": self.drop_policy,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "rotations": self.rotations,
+                "errors": self.errors,
+            }
+
+    # --- writer thread ---
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            self._write_batch([item for item in batch if item is not _STOP])
+            if stop:
+                # Drain whatever was queued before close()
+                rest = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        rest.append(item)
+                self._write_batch(rest)
+                return
+
+    def _write_batch(self, batch: list):
+        lines: dict[Path, list[str]] = {}
+        snapshots: dict[Path, str] = {}
+        waiters = []
+        for kind, path, payload in batch:
+            if kind == "jsonl":
+                try:
+                    lines.setdefault(path, []).append(json.dumps(payload, default=str))
+                except (TypeError, ValueError) as e:
+                    self._error(f"Logging error: {e}")
+            elif kind == "text":
+                snapshots[path] = payload  # only the newest snapshot matters
+            else:
+                waiters.append(payload)
+
+        written = 0
+        for path, records in lines.items():
+            try:
+                self._make_dir(path)
+                self._maybe_rotate(path)
+                self._append(path, ("\n".join(records) + "\n").encode("utf-8"))
+                written += len(records)
+            except OSError as e:
+                self._error(f"Logging error: {e}")
+        for path, text in snapshots.items():
+            try:
+                self._make_dir(path)
+                # Written aside and renamed over, so readers and other workers never see half a file
+                tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                tmp.write_text(text, encoding="utf-8")
+                os.replace(tmp, path)
+            except OSError as e:
+                self._error(f"Logging error: {e}")
+
+        with self._lock:
+            self.written += written
+            self.batches += 1
+            dropped = self.dropped
+        # Report drops at most every 10s so a saturated queue doesn't also flood stdout
+        if dropped != self._reported_drops and time.monotonic() - self._last_drop_report >= 10:
+            self._last_drop_report = time.monotonic()
+            print(f"Log queue full: {dropped - self._reported_drops} records dropped ({self.drop_policy})")
+            self._reported_drops = dropped
+        for done in waiters:
+            done.set()
+
+    def _error(self, message: str):
+        with self._lock:
+            self.errors += 1
+        print(message)
+
+    def _make_dir(self, path: Path):
+        # The first write creates the directory (importing main doesn't create logs/)
+        if path.parent not in self._dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._dirs.add(path.parent)
+
+    def _append(self, path: Path, data: bytes):
+        # Opened under the lock, so a concurrent rotation can't move the file in between
+        with _FileLock(path, exclusive=False):
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+
+    def _due(self, path: Path, now: float) -> bool:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        inode, started, size = self._segment_started.get(path, (None, now, 0))
+        if inode != stat.st_ino or stat.st_size < size:
+            # A new segment (possibly started by another worker's rotation; a shrunk file means a reused inode)
+            started = now
+        self._segment_started[path] = (stat.st_ino, started, stat.st_size)
+        too_big = self.max_bytes > 0 and stat.st_size >= self.max_bytes
+        too_old = self.rotate_interval > 0 and now - started >= self.rotate_interval
+        return bool(stat.st_size and (too_big or too_old))
+
+    def _maybe_rotate(self, path: Path):
+        now = time.time()
+        if not self._due(path, now):
+            return
+        with _FileLock(path, exclusive=True):
+            # Another worker may have rotated it while this one waited for the lock
+            if not self._due(path, now):
+                return
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            rotated = path.with_name(f"{path.stem}.{stamp}{path.suffix}")
+            os.replace(path, rotated)
+        # Nobody appends to the renamed segment any more, so it is compressed without the lock
+        self._compress(path, rotated)
+
+    def _compress(self, path: Path, rotated: Path):
+        with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        rotated.unlink()
+        with self._lock:
+            self.rotations += 1
+        if self.backups > 0:
+            segments = sorted(path.parent.glob(f"{path.stem}.*{path.suffix}.gz"))
+            for old in segments[:-self.backups]:
+                old.unlink(missing_ok=True)
+
+
+class _FileLock:
+    """
+    flock on "<path>.lock": shared while appending, exclusive while rotating (no-op without fcntl)
+    """
+
+    def __init__(self, path: Path, exclusive: bool):
+        self.path = path.with_name(path.name + ".lock")
+        self.exclusive = exclusive
+        self.fd = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self.fd, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
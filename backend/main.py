@@ -1,41 +1,179 @@
 import os
 import re
-import json
+import asyncio
+import math
+import hashlib
+from contextlib import aclosing
+import time
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
 from dotenv import load_dotenv
 import sys
 
-# LangChain & Groq Imports
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from access_log import AccessLogPolicy, AppendFileHandler, log_access, setup_queue_logging
+from cache import PrecomputedStore, RecommendationCache, request_key
+from similarity import SimilarityIndex, seed_summary
+from compression import CompressionMiddleware, CompressionStats, etag_for, etag_matches
+import fast_json
+from fast_json import FastJSONResponse
+from log_writer import BackgroundLogWriter
+from response_archive import ResponseArchive
+from prompt_templates import PROMPT_MODES, PromptModeStats, resolve_prompt_mode, template_prompt
+from singleflight import SingleFlight
+from llm_scheduler import INTERACTIVE, LLMScheduler, SchedulerOverloaded
+from http_pool import build_http_client, pool_stats, warm_up
+from token_count import count_tokens, tokenizer_name
+from json_output import JSON_SHAPE, OUTPUT_FORMATS, ParseStats, has_stack
+from shared_metrics import SharedMetrics
+from metrics import Registry, StageTimer, server_timing, start_request_timings, record_timing, current_timings
+from models import TechStack, RecommendationResponse, StackRequest, PromptGenerationRequest
+from mermaid_ast import lint_mermaid
+from stream_parser import StackSectionParser, RecommendationStreamParser, parse_recommendation
 
 # 1. Load Environment Variables
 load_dotenv()
 
 # 2. Setup Logging Directory
-LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
+# Created when the server starts (start_logging) or by whatever writes there first,
+# so importing main (precompute.py, the benchmarks) leaves the working directory alone.
+# The default paths of the SQLite files below (archive, cache, metrics, precomputed store) live here too
+LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
+
+# Worker processes serving this app (serve.py / gunicorn set WEB_CONCURRENCY). With more
+# than one, the recommendation cache and /metrics are shared through SQLite files in
+# LOG_DIR and the upstream budgets below are split between the workers
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY") or 1))
 
 # 3. Setup Structured Logging for Visitor Tracking
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(name)s | %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_DIR / "visitor_access.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Records are queued and written by a listener thread (see access_log.py), started by start_logging
+log_listener = None
 visitor_logger = logging.getLogger("visitor_tracker")
 
+# Application log - startup, upstream and request errors, and (at LOG_LEVEL=DEBUG) a trace of
+# every parse and generation. Kept off the root logger so none of it lands in the access log
+logger = logging.getLogger("techstack")
+logger.propagate = False
+access_log_policy = AccessLogPolicy(
+    sample_rate=float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0")),
+    exclude_paths=os.getenv("ACCESS_LOG_EXCLUDE_PATHS", "/,/healthz,/readyz")
+)
+
+# Response logs are written by a background thread - handlers only enqueue
+response_log = BackgroundLogWriter(
+    max_queue=int(os.getenv("RESPONSE_LOG_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("RESPONSE_LOG_BATCH_SIZE", "256")),
+    flush_interval=float(os.getenv("RESPONSE_LOG_FLUSH_INTERVAL", "1.0")),
+    max_bytes=int(os.getenv("RESPONSE_LOG_MAX_BYTES", str(50 * 1024 * 1024))),
+    rotate_interval=float(os.getenv("RESPONSE_LOG_ROTATE_INTERVAL", "0")),
+    backups=int(os.getenv("RESPONSE_LOG_BACKUPS", "10")),
+    drop_policy=os.getenv("RESPONSE_LOG_DROP_POLICY", "drop_newest")
+)
+
+# Every generated recommendation in full (raw reply + parsed result), block-compressed
+# and indexed by cache key and time - see response_archive.py. An empty path turns it off
+RESPONSE_ARCHIVE_PATH = os.getenv("RESPONSE_ARCHIVE_PATH", str(LOG_DIR / "response_archive.db"))
+response_archive = ResponseArchive(
+    RESPONSE_ARCHIVE_PATH,
+    block_records=int(os.getenv("RESPONSE_ARCHIVE_BLOCK_RECORDS", "64")),
+    block_bytes=int(os.getenv("RESPONSE_ARCHIVE_BLOCK_BYTES", str(128 * 1024))),
+    codec=os.getenv("RESPONSE_ARCHIVE_CODEC", "zlib").lower(),
+    max_queue=int(os.getenv("RESPONSE_ARCHIVE_QUEUE_SIZE", "1000"))
+) if RESPONSE_ARCHIVE_PATH else None
+
+# Exact-match recommendation cache (set RECOMMEND_CACHE_PATH to persist across restarts;
+# with several workers it defaults to a file so they share entries)
+recommendation_cache = RecommendationCache(
+    max_entries=int(os.getenv("RECOMMEND_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("RECOMMEND_CACHE_TTL", str(24 * 3600))),
+    path=os.getenv("RECOMMEND_CACHE_PATH") or (str(LOG_DIR / "recommendation_cache.db") if WORKERS > 1 else None)
+)
+
+# Nearest-neighbour lookup for requests that miss the cache only because of wording
+# or an adjacent budget/scale bucket: reuse the match's recommendation (>= REUSE
+# threshold) or pass its PRIMARY stack to the model as a starting point (>= SEED).
+# Both are off by default: an adjacent budget or team-size bucket scores about 0.97,
+# and a reused answer was generated for those other inputs
+similarity_index = SimilarityIndex(max_entries=int(os.getenv("SIMILARITY_INDEX_SIZE", "10000")))
+SIMILARITY_REUSE_THRESHOLD = float(os.getenv("SIMILARITY_REUSE_THRESHOLD", "0"))
+SIMILARITY_SEED_THRESHOLD = float(os.getenv("SIMILARITY_SEED_THRESHOLD", "0"))
+
+# Identical requests arriving while one is generating share its result
+recommend_flight = SingleFlight("recommendations")
+prompt_flight = SingleFlight("prompts")
+
+# Generate primary + alternatives as concurrent calls by default (?fanout= overrides per request)
+RECOMMEND_FANOUT = os.getenv("RECOMMEND_FANOUT", "false").lower() in ("1", "true", "yes")
+
+# How the custom prompt is built: "llm" (prompt_engineer_chain), "template" (local,
+# see prompt_templates.py) or "auto" (template unless customConstraints has content)
+PROMPT_MODE = os.getenv("PROMPT_MODE", "auto").lower()
+
+# stack_chain system prompt: "full" (system_prompt) or "compact" (compact_system_prompt)
+SYSTEM_PROMPT_PROFILE = os.getenv("SYSTEM_PROMPT_PROFILE", "full").lower()
+
+# stack_chain output: "markdown" (parsed by stream_parser) or "json" (see json_output.py)
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "markdown").lower()
+parse_stats = ParseStats()
+prompt_mode_stats = PromptModeStats()
+
+# Prometheus metrics served on /metrics (see metrics.py); component stats are
+# pulled at scrape time by collect_component_metrics below
+metrics = Registry()
+stage_timer = StageTimer(metrics.histogram(
+    "techstack_stage_seconds", "Time spent in each recommendation pipeline stage", ("stage",)))
+http_requests = metrics.counter("techstack_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = metrics.histogram("techstack_http_request_seconds", "Time until the response starts, by route", ("route",))
+http_in_flight = metrics.gauge("techstack_http_in_flight", "HTTP requests being handled").labels()
+llm_tokens = metrics.counter("techstack_llm_tokens_total", "Upstream tokens by model and direction", ("model", "direction"))
+similarity_matches = metrics.counter("techstack_similarity_matches_total", "Requests served (reuse) or seeded (seed) from a similar past request", ("use",))
+llm_calls = metrics.counter("techstack_llm_calls_total", "Completed upstream LLM calls by model", ("model",))
+llm_errors = metrics.counter("techstack_llm_errors_total", "Failed upstream LLM calls by model and HTTP status / error type", ("model", "reason"))
+
+# With several workers, /metrics merges every worker's registry (see shared_metrics.py)
+shared_metrics = SharedMetrics(
+    os.getenv("SHARED_METRICS_PATH", str(LOG_DIR / "metrics.db")), metrics.render,
+    interval=float(os.getenv("SHARED_METRICS_INTERVAL", "5"))
+) if WORKERS > 1 else None
+
 # 4. Setup FastAPI App
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+
+@app.on_event("startup")
+def start_logging():
+    global log_listener
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    if log_listener is None:
+        log_listener = setup_queue_logging([
+            AppendFileHandler(LOG_DIR / "visitor_access.log"),
+            logging.StreamHandler(sys.stdout)
+        ])
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+@app.on_event("startup")
+def start_shared_metrics():
+    if shared_metrics is not None:
+        shared_metrics.start()
+        logger.info("Worker %d up (%d workers), metrics shared via %s", os.getpid(), WORKERS, shared_metrics.path)
+
+@app.on_event("shutdown")
+def flush_response_log():
+    response_log.close()
+    if response_archive is not None:
+        response_archive.close()
+    recommendation_cache.close()
+    if log_listener is not None:
+        log_listener.stop()
+    if shared_metrics is not None:
+        shared_metrics.stop()
 
 # 5. Middleware for Visitor Logging
 @app.middleware("http")
@@ -45,26 +183,52 @@ async def log_visitor_middleware(request: Request, call_next):
     - IP address (X-Forwarded-For or remote_addr)
     - User Agent
     - Timestamp
-    - Request method and path
-    """
-    # Extract visitor information
-    client_ip = request.headers.get("X-Forwarded-For", request.client.host if request.client else "unknown")
-    user_agent = request.headers.get("User-Agent", "unknown")
-    method = request.method
-    path = request.url.path
-    query_params = str(request.url.query) if request.url.query else ""
-    
-    # Log the visit
-    timestamp = datetime.now().isoformat()
-    log_message = f"IP: {client_ip} | Time: {timestamp} | Method: {method} | Path: {path} | UserAgent: {user_agent}"
-    if query_params:
-        log_message += f" | Query: {query_params}"
-    
-    visitor_logger.info(log_message)
-    
-    # Continue processing request
-    response = await call_next(request)
-    return response
+    - Request method, path and query
+    - Response status and duration (time until the response starts)
+    Paths in ACCESS_LOG_EXCLUDE_PATHS are skipped and ACCESS_LOG_SAMPLE_RATE
+    thins out the rest; errors are always logged.
+    """
+    start = time.perf_counter()
+    status = 500
+    timings = start_request_timings()
+    http_in_flight.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        # Streams only include the stages done before their first byte
+        if timings:
+            response.headers["Server-Timing"] = server_timing(
+                timings + [("total", (time.perf_counter() - start) * 1000, "")])
+        return response
+    finally:
+        http_in_flight.dec()
+        path = request.url.path
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_requests.labels(request.method, route, str(status)).inc()
+        http_latency.labels(route).observe(time.perf_counter() - start)
+        if access_log_policy.should_log(path, status):
+            headers = request.headers
+            # Formatting and the file write happen on the log listener thread
+            log_access(visitor_logger, (
+                headers.get("X-Forwarded-For") or (request.client.host if request.client else "unknown"),
+                request.method,
+                path,
+                headers.get("User-Agent", "unknown"),
+                request.url.query,
+                status,
+                (time.perf_counter() - start) * 1000
+            ))
+
+# Negotiated gzip/brotli for JSON bodies over COMPRESS_MIN_SIZE bytes (-1 disables; SSE is never compressed)
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+compression_stats = CompressionStats()
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESS_MIN_SIZE,
+    gzip_level=int(os.getenv("COMPRESS_GZIP_LEVEL", "6")),
+    brotli_quality=int(os.getenv("COMPRESS_BROTLI_QUALITY", "4")),
+    stats=compression_stats
+)
 
 # 6. CORS Setup (Crucial for Next.js to talk to Python)
 app.add_middleware(
@@ -73,27 +237,125 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Recommendation-Key"],
 )
 
 # 7. Setup Groq Models
-# Model 1: For generating custom prompts based on user inputs
-prompt_engineer_model = ChatGroq(
-    temperature=0.7,  # Higher creativity for prompt generation
-    model_name="llama-3.1-8b-instant",
-    api_key=os.getenv("GROQ_API_KEY")
+# Both models share one pooled HTTP client (see http_pool.py) so upstream
+# connections stay open between calls instead of re-handshaking
+upstream_http = build_http_client(
+    max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60")),
+    http2=os.getenv("LLM_HTTP2", "false").lower() in ("1", "true", "yes")
 )
-
-# Model 2: For tech stack recommendation (keep conservative)
-stack_model = ChatGroq(
-    temperature=0.2, 
-    model_name="llama-3.1-8b-instant", 
-    api_key=os.getenv("GROQ_API_KEY")
+# LLM_BACKEND=fake swaps both models for an offline replay of recorded
+# responses (see fake_llm.py) - used for load tests, never calls Groq
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+
+# The models and the LangChain pipelines are built on first use, not at import:
+# langchain_core, groq and langchain_groq are a third of the import time. With
+# LLM_PRELOAD (default) prepare_upstream builds them, and warms up the upstream
+# connections, in the background as soon as the server is up - requests that
+# don't need a model are answered meanwhile and /readyz reports when it's done
+LLM_PRELOAD = os.getenv("LLM_PRELOAD", "true").lower() in ("1", "true", "yes")
+_llm_chains = None
+_llm_chains_lock = threading.Lock()
+llm_setup_error = None
+llm_preload_task = None
+# Set once prepare_upstream is done with the warm-up, whether it opened connections or not
+upstream_warm = False
+
+def llm_chains() -> "LLMChains":
+    """
+    The models and pipelines (see LLMChains), built by whichever caller needs them first
+    """
+    global _llm_chains, llm_setup_error
+    if _llm_chains is None:
+        with _llm_chains_lock:
+            if _llm_chains is None:
+                try:
+                    _llm_chains = LLMChains()
+                    llm_setup_error = None
+                except Exception as e:
+                    llm_setup_error = f"{type(e).__name__}: {e}"
+                    raise
+    return _llm_chains
+
+async def prepare_upstream():
+    """
+    Build the models off the event loop, then open LLM_HTTP_WARMUP connections to
+    Groq so the first recommendations don't pay the TCP/TLS handshake (failures
+    are only logged; the next request that needs a model tries again)
+    """
+    global upstream_warm
+    try:
+        chains = await asyncio.to_thread(llm_chains)
+    except Exception as e:
+        logger.error("LLM setup failed: %s", llm_setup_error or e)
+        return
+    try:
+        connections = int(os.getenv("LLM_HTTP_WARMUP", "2"))
+        if connections > 0 and chains.groq_client is not None:
+            groq_client = chains.groq_client
+            opened = await warm_up(upstream_http, str(groq_client.base_url.join("openai/v1/models")), connections,
+                                   headers={"Authorization": f"Bearer {groq_client.api_key}"})
+            logger.info("Upstream warm-up: %d/%d connections ready", opened, connections)
+    finally:
+        upstream_warm = True
+
+@app.on_event("startup")
+def start_llm_preload():
+    global llm_preload_task
+    if LLM_PRELOAD and llm_preload_task is None:
+        llm_preload_task = asyncio.get_running_loop().create_task(prepare_upstream())
+
+@app.on_event("shutdown")
+async def close_upstream_connections():
+    if llm_preload_task is not None and not llm_preload_task.done():
+        llm_preload_task.cancel()
+    await upstream_http.aclose()
+
+# Every upstream call goes through the scheduler: bounded concurrency, RPM/TPM
+# budgets, priority queue, retries on 429/5xx and 503 load shedding
+# (limits are for the whole server, so each worker gets its share - rounded down,
+# but at least one call, so only more workers than LLM_MAX_CONCURRENCY exceed it)
+llm_scheduler = LLMScheduler(
+    max_concurrency=max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "8")) // WORKERS),
+    requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")) / WORKERS,
+    tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")) / WORKERS,
+    max_queue=int(os.getenv("LLM_QUEUE_SIZE", "100")),
+    queue_deadline=float(os.getenv("LLM_QUEUE_DEADLINE", "30")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "3"))
 )
 
+def estimate_tokens(*texts: str, output: int) -> int:
+    """
+    Rough token cost of one call for the TPM budget (~4 chars per token + expected output)
+    """
+    return sum(len(text) for text in texts) // 4 + output
+
+def llm_call(chain, inputs: dict, tokens: int, priority: int = INTERACTIVE):
+    """
+    chain.ainvoke(inputs) through llm_scheduler
+    """
+    return llm_scheduler.run(lambda: chain.ainvoke(inputs), tokens=tokens, priority=priority)
+
+def llm_stream(chain, inputs: dict, tokens: int, priority: int = INTERACTIVE):
+    """
+    chain.astream(inputs) through llm_scheduler
+    """
+    return llm_scheduler.stream(lambda: chain.astream(inputs), tokens=tokens, priority=priority)
+
+def overloaded_response(e: SchedulerOverloaded) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"error": str(e)},
+                        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+
 # 8. Logging Function for API Responses
 def log_request_response(user_inputs: dict, response: str, model_type: str = "stack", custom_prompt: str = None, master_prompt: str = None):
     """
-    Log API requests and responses for learning and analysis
+    Log API requests and responses for learning and analysis.
+    Only enqueues the entry - response_log writes it from its own thread.
     """
     try:
         timestamp = datetime.now().isoformat()
@@ -106,11 +368,9 @@ def log_request_response(user_inputs: dict, response: str, model_type: str = "st
             "response_length": len(response)
         }
         
-        log_file = LOG_DIR / f"{model_type}_responses.jsonl"
-        with open(log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        response_log.append_jsonl(LOG_DIR / f"{model_type}_responses.jsonl", log_entry)
     except Exception as e:
-        print(f"Logging error: {e}")
+        logger.warning("Logging error: %s", e)
 
 # 9. Prompt Engineering System Prompt
 prompt_engineer_system = """You are an expert AI architect that generates detailed, contextual prompts for tech stack recommendations.
@@ -417,17 +677,136 @@ DO NOT:
 IMPORTANT: After providing the mermaid diagram, ALWAYS include the complete PRIMARY Technology Stack and all sections (Frontend, Backend, Database, DevOps, Additional Services) with pros, cons, and why explanations for each technology.
 """
 
+# Compact variant of system_prompt (SYSTEM_PROMPT_PROFILE=compact): the same
+# output contract - headings, "**Name** - emoji", Pros:/Cons:/Why:, the three
+# alternative explanation fields and the Mermaid rules - without the worked
+# examples, checklists and repeated rules, at roughly a third of the tokens.
+compact_system_prompt = """Recommend a tech stack tailored to the project the user describes. Use EXACTLY this markdown structure; replace every [placeholder] with real content.
+
+## Architecture Diagram
+```mermaid
+graph TD
+    Browser[User_Browser]
+    React[React_App]
+    FastAPI[FastAPI_Server]
+    PostgreSQL[(PostgreSQL_DB)]
+    Browser -->|HTTP_Request| React
+    React -->|API_Calls| FastAPI
+    FastAPI -->|Queries| PostgreSQL
+```
+(Example only. Every node must be a specific product you recommend below - never generic names like Database, Backend or Cache - and every recommended technology must appear.)
+
+## PRIMARY Technology Stack
+
+### Frontend
+**[Technology name]** - [emoji]
+Pros:
+• [advantage tied to their scale, budget, team, timeline or focus]
+• [advantage]
+• [advantage]
+Cons:
+• [limitation relative to their constraints]
+• [limitation]
+Why: [why this is the best choice for THEIR inputs - cite their team size, budget, scale, timeline or security level concretely]
+
+### Backend
+[same entry format]
+
+### Database
+[same entry format]
+
+### DevOps/Infrastructure
+[same entry format]
+
+### Additional Services
+[same entry format]
+
+## ALTERNATIVE Technology Stacks
+
+## ALTERNATIVE STACK #1
+**When to use this stack:** [scenario where this beats PRIMARY for their project]
+**Primary trade-off vs recommended stack:** [what is traded off to gain what]
+**Why this option is worth considering:** [why it is viable in their context]
+
+### Architecture Diagram
+```mermaid
+[diagram of this stack, same rules]
+```
+
+### Frontend
+[same entry format, then Backend, Database, DevOps/Infrastructure, Additional Services]
+
+## ALTERNATIVE STACK #2
+[same structure]
+
+## ALTERNATIVE STACK #3
+[same structure]
+
+Rules:
+- One technology per category per stack; technologies must work well together and be production-ready.
+- Alternatives: #1 optimizes COST (free/open-source), #2 DEVELOPER EXPERIENCE, #3 SCALABILITY (10x-100x growth). Each differs from PRIMARY and from the others in at least 2-3 technologies.
+- Never output placeholders literally and never skip a section.
+
+Mermaid rules (diagrams that break them fail to render):
+- Start with graph TD; at most 10 nodes; only --> arrows (no dotted or other arrows).
+- Node IDs: letters, digits and underscores only. Every node closes its bracket: ID[Label], ID[(Label)], ID([Label]) or ID((Label)).
+- Labels and arrow labels use underscores instead of spaces; no HTML entities, brackets or special characters inside labels; max 40 chars.
+- Every arrow has a target: A -->|Label| B. Never end a line with --> or |.
+"""
+
+# JSON output mode (OUTPUT_FORMAT=json): same content rules as the compact
+# prompt, but the answer is a RecommendationOutput document
+json_system_prompt = (
+    "Recommend a tech stack tailored to the project the user describes. Respond with ONLY a JSON object - "
+    "no markdown, no code fences, no text before or after it - with exactly this shape:\n\n"
+    + JSON_SHAPE
+    + "\n\nEvery category list holds exactly one technology with 3 pros, 2-3 cons and a \"why\" that cites the "
+    "user's team size, budget, scale, timeline or security level concretely. Give exactly 3 alternatives. "
+    "Diagrams are Mermaid source in a JSON string (newlines as \\n) and name the specific technologies of that stack.\n\n"
+    "Rules:\n"
+    + compact_system_prompt[compact_system_prompt.index("- One technology per category"):]
+)
+
+# Section prompts for fan-out generation (RECOMMEND_FANOUT / ?fanout=1).
+# Cut from system_prompt so both modes stay in sync with the text above.
+def _prompt_slice(start: str = None, end: str = None) -> str:
+    return system_prompt[system_prompt.index(start) if start else 0:system_prompt.index(end) if end else None]
+
+ALTERNATIVE_FOCUSES = [
+    (1, "COST (cheapest free/open-source options)"),
+    (2, "DEVELOPER EXPERIENCE (fastest development, easiest to learn)"),
+    (3, "SCALABILITY (handle 10x or 100x growth, performance-focused)"),
+]
+
+primary_section_prompt = (
+    _prompt_slice(end="## ALTERNATIVE Technology Stacks")
+    + "Do NOT write any ALTERNATIVE stacks - they are generated separately. Stop after ### Additional Services.\n\n"
+    + _prompt_slice(start="CRITICAL MERMAID SYNTAX RULES")
+)
+
+alternative_section_prompt = (
+    "You are writing ONE alternative to the mainstream tech stack for the project the user describes. "
+    "Optimize this stack for {focus}. It must differ from the obvious default choice in at least 2-3 technologies.\n\n"
+    "Structure your answer EXACTLY as follows:\n\n"
+    "## ALTERNATIVE STACK #{stack_num}\n"
+    + _prompt_slice(start="**When to use this stack:**", end="THEN INCLUDE A DIAGRAM:")
+    + "### Architecture Diagram\n"
+    + _prompt_slice(start="Provide a Mermaid.js diagram showing the architecture of this alternative", end="Then provide the full tech stack")
+    + "Then provide the full tech stack in this format:\n\n"
+    + _prompt_slice(start="### Frontend\n**", end="## ALTERNATIVE Technology Stacks")
+    + "Write ONLY this one alternative - no PRIMARY stack and no other alternatives.\n\n"
+    + _prompt_slice(start="CRITICAL MERMAID SYNTAX RULES", end="IMPORTANT: After providing the mermaid diagram")
+)
+
 # Function to extract and validate mermaid code from response
+MERMAID_BLOCK = re.compile(r'```mermaid\n(.*?)\n```', re.DOTALL)
+
 def process_response_stream(text: str) -> str:
     """
     Extract mermaid blocks, validate them, and return cleaned response
     """
-    # Find mermaid code blocks
-    mermaid_pattern = r'```mermaid\n(.*?)\n```'
-    matches = re.finditer(mermaid_pattern, text, re.DOTALL)
-    
     cleaned_text = text
-    for match in matches:
+    for match in MERMAID_BLOCK.finditer(text):
         mermaid_code = match.group(1)
         is_valid, message = validate_mermaid_syntax(mermaid_code)
         
@@ -440,405 +819,220 @@ def process_response_stream(text: str) -> str:
     
     return cleaned_text
 
+SYSTEM_PROMPTS = {"full": system_prompt, "compact": compact_system_prompt}
+
+# Recommendations for common form combinations, generated offline by precompute.py.
+# Only entries made with the current full system prompt are served
+precomputed_store = PrecomputedStore(
+    os.getenv("PRECOMPUTED_STORE_PATH", str(LOG_DIR / "precomputed.db")),
+    prompt_sha=hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+)
+
+@app.on_event("startup")
+def index_precomputed_recommendations():
+    """
+    Make precomputed recommendations reachable by similarity, not just exact key
+    """
+    entries = precomputed_store.entries()
+    for key, inputs in entries:
+        similarity_index.add(key, inputs)
+    if entries:
+        logger.info("Similarity index: %d precomputed recommendations", len(entries))
+
+# Refill the recommendation cache at startup from the newest archived recommendations (0: off)
+RESPONSE_ARCHIVE_WARM_CACHE = int(os.getenv("RESPONSE_ARCHIVE_WARM_CACHE", "0"))
+
+@app.on_event("startup")
+def warm_cache_from_archive():
+    """
+    Cache the newest archived recommendation of up to RESPONSE_ARCHIVE_WARM_CACHE
+    recent requests, for what is left of their RECOMMEND_CACHE_TTL
+    """
+    if response_archive is None or RESPONSE_ARCHIVE_WARM_CACHE <= 0:
+        return
+    start = time.perf_counter()
+    now = time.time()
+    warm = []
+    for record in response_archive.latest(min(RESPONSE_ARCHIVE_WARM_CACHE, recommendation_cache.max_entries)):
+        remaining = recommendation_cache.ttl_seconds - (now - record["created_at"])
+        if remaining <= 0:
+            break  # newest first - the rest have expired too
+        # Same rule as finalize_recommendation: only responses that contain a stack
+        primary = (record.get("parsed") or {}).get("primary") or {}
+        if primary.get("frontend") or primary.get("backend"):
+            warm.append((record, remaining))
+    # Oldest first, so the newest end up most recently used
+    for record, remaining in reversed(warm):
+        recommendation_cache.set(record["key"], record["parsed"], ttl_seconds=remaining)
+        if record.get("prompt_profile") == "full":
+            similarity_index.add(record["key"], record["inputs"])
+    if warm:
+        logger.info("Recommendation cache: %d entries from the response archive in %.0fms",
+                    len(warm), (time.perf_counter() - start) * 1000)
+
+def profile_stack_chain(profile: str, output_format: str = "markdown"):
+    chains = llm_chains()
+    if output_format == "json":
+        return chains.json_stack_chain
+    return chains.compact_stack_chain if profile == "compact" else chains.stack_chain
+
+def stack_system_prompt(profile: str, output_format: str = "markdown") -> str:
+    return json_system_prompt if output_format == "json" else SYSTEM_PROMPTS[profile]
+
+def resolve_output_format(output_format: str = None) -> str:
+    output_format = (output_format or OUTPUT_FORMAT).lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {', '.join(OUTPUT_FORMATS)}")
+    return output_format
+
+def resolve_prompt_profile(profile: str = None) -> str:
+    profile = (profile or SYSTEM_PROMPT_PROFILE).lower()
+    if profile not in SYSTEM_PROMPTS:
+        raise ValueError(f"prompt_profile must be one of {', '.join(SYSTEM_PROMPTS)}")
+    return profile
+
+def prompt_profile_stats() -> dict:
+    """
+    Size of each system prompt profile
+    """
+    return {
+        profile: {"chars": len(prompt), "tokens": count_tokens(prompt)}
+        for profile, prompt in SYSTEM_PROMPTS.items()
+    }
+
 # LangChain Pipelines
-stack_prompt_template = ChatPromptTemplate.from_messages([
-    ("system", system_prompt),
-    ("user", "{custom_prompt}")
-])
-
-stack_chain = stack_prompt_template | stack_model | StrOutputParser()
-
-# Prompt Engineering Prompt Template
-prompt_engineer_template = ChatPromptTemplate.from_messages([
-    ("system", prompt_engineer_system),
-    ("user", "App Type: {appType}, Scale: {scale}, Focus: {focus}, Team Size: {teamSize}, Budget: {budget}, Time to Market: {timeToMarket}, Security Level: {securityLevel}, Additional: {customConstraints}")
-])
-
-prompt_engineer_chain = prompt_engineer_template | prompt_engineer_model | StrOutputParser()
-
-# 7. Request and Response Models
-class TechItem(BaseModel):
-    name: str
-    pros: list[str] = []
-    cons: list[str] = []
-    why: str = ""
-
-class TechStack(BaseModel):
-    frontend: list[TechItem] = []
-    backend: list[TechItem] = []
-    database: list[TechItem] = []
-    devops: list[TechItem] = []
-    additional: list[TechItem] = []
-
-class RecommendationResponse(BaseModel):
-    architecture_diagram: str
-    primary: TechStack
-    alternatives: list[TechStack] = []
-    alternative_explanations: list[dict] = []  # {stack_num, when_to_use, trade_off, why_consider}
-
-class StackRequest(BaseModel):
-    appType: str
-    scale: str
-    focus: str
-    teamSize: str = "not specified"
-    budget: str = "not specified"
-    timeToMarket: str = "not specified"
-    securityLevel: str = "standard"
-    customConstraints: str = ""
-
-class PromptGenerationRequest(BaseModel):
-    appType: str
-    scale: str
-    focus: str
-    teamSize: str = "not specified"
-    budget: str = "not specified"
-    timeToMarket: str = "not specified"
-    securityLevel: str = "standard"
-    customConstraints: str = ""
-
-# Mermaid Sanitizer and Validator
+class LLMChains:
+    """
+    Both models (see llm_models.py) and every pipeline built on them - constructed
+    once by llm_chains(), which is also what imports LangChain and Groq
+    """
+
+    def __init__(self):
+        from langchain_core.messages import SystemMessage
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+        from llm_models import build_models
+
+        self.groq_client, self.prompt_engineer_model, self.stack_model = build_models(
+            LLM_BACKEND, upstream_http, llm_tokens, llm_calls, llm_errors)
+        stack_model = self.stack_model
+
+        self.stack_chain = ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            ("user", "{custom_prompt}")
+        ]) | stack_model | StrOutputParser()
+
+        self.compact_stack_chain = ChatPromptTemplate.from_messages([
+            ("system", compact_system_prompt),
+            ("user", "{custom_prompt}")
+        ]) | stack_model | StrOutputParser()
+
+        # SystemMessage, not a ("system", ...) template - the JSON example's braces are not variables.
+        # response_format turns on Groq's JSON mode (the fake backend ignores it)
+        self.json_stack_chain = ChatPromptTemplate.from_messages([
+            SystemMessage(content=json_system_prompt),
+            ("user", "{custom_prompt}")
+        ]) | stack_model.bind(response_format={"type": "json_object"}) | StrOutputParser()
+
+        # Fan-out: PRIMARY section and each ALTERNATIVE STACK as separate, concurrent calls
+        self.primary_section_chain = ChatPromptTemplate.from_messages([
+            ("system", primary_section_prompt),
+            ("user", "{custom_prompt}")
+        ]) | stack_model | StrOutputParser()
+
+        self.alternative_section_chain = ChatPromptTemplate.from_messages([
+            ("system", alternative_section_prompt),
+            ("user", "{custom_prompt}")
+        ]) | stack_model | StrOutputParser()
+
+        # Prompt Engineering Prompt Template
+        prompt_engineer_template = ChatPromptTemplate.from_messages([
+            ("system", prompt_engineer_system),
+            ("user", "App Type: {appType}, Scale: {scale}, Focus: {focus}, Team Size: {teamSize}, Budget: {budget}, Time to Market: {timeToMarket}, Security Level: {securityLevel}, Additional: {customConstraints}")
+        ])
+
+        self.prompt_engineer_chain = prompt_engineer_template | self.prompt_engineer_model | StrOutputParser()
+
+# Mermaid Sanitizer and Validator (single-pass lexer, see mermaid_ast.py)
 def sanitize_mermaid_code(code: str) -> str:
     """
     Clean up mermaid code to fix common generation issues
     """
-    lines = []
-    for line in code.split('\n'):
-        # Strip leading/trailing whitespace
-        line = line.strip()
-        if not line or line.startswith('graph'):
-            if line:
-                lines.append(line)
-            continue
-        
-        # SKIP completely incomplete arrows - these will break mermaid anyway
-        # Skip: A -->|Label| (no target) 
-        if line.endswith('-->|') or line.endswith('-->') or re.search(r'-->\|[^|]*\|?\s*$', line):
-            # Incomplete arrow, skip it
-            continue
-        
-        # Fix unclosed brackets - add closing bracket if needed
-        # Pattern: NodeID[Label without closing bracket (not on arrow lines)
-        if '[' in line and ']' not in line and '-->' not in line:
-            line = line + ']'
-        
-        # For arrow lines with unclosed brackets in target
-        # Pattern: A -->|Label| B[ should become A -->|Label| B[]
-        if '-->' in line and '[' in line and ']' not in line:
-            # Only add bracket if the line ends with an incomplete bracket
-            if line.rstrip().endswith('['):
-                line = line + ']'
-            # But if it has content after bracket that's not valid, skip the line
-            elif not re.search(r'\[[a-zA-Z0-9_]*\]', line):
-                # Can't fix this, skip it
-                continue
-        
-        # Fix spaces in node labels - replace spaces with underscores in brackets
-        # Pattern: NodeID[Label With Spaces] -> NodeID[Label_With_Spaces]
-        line = re.sub(r'(\[)([^\]]+)(\])', 
-                      lambda m: m.group(1) + m.group(2).replace(' ', '_') + m.group(3), 
-                      line)
-        
-        # Fix spaces in arrow labels - replace spaces with underscores
-        # Pattern: -->|Label With Spaces| -> -->|Label_With_Spaces|
-        line = re.sub(r'(\|)([^\|]+)(\|)', 
-                      lambda m: m.group(1) + m.group(2).replace(' ', '_') + m.group(3), 
-                      line)
-        
-        # Verify line is valid after processing
-        # Must have balanced brackets and pipes if this is an arrow
-        if '-->' in line:
-            # Arrow line - must have target node or be removed
-            if not re.search(r'-->\s*[a-zA-Z0-9_]+\[\w*\]', line) and not re.search(r'-->\|[^|]+\|\s*[a-zA-Z0-9_]+', line):
-                # Can't find valid target node, skip this line
-                continue
-        
-        lines.append(line)
-    
-    return '\n'.join(lines)
+    return lint_mermaid(code).code
 
 def validate_mermaid_syntax(code: str) -> tuple[bool, str]:
     """
-    Validate mermaid diagram syntax and return (is_valid, error_message)
+    Validate mermaid diagram syntax and return (is_valid, sanitized_code or error_message)
     """
-    if not code or len(code.strip()) < 10:
-        return False, "Code too short"
-    
-    # Sanitize first
-    code = sanitize_mermaid_code(code)
-    lines = code.strip().split('\n')
-    
-    # Check if starts with graph TD
-    if not any('graph TD' in line for line in lines[:3]):
-        return False, "Must start with 'graph TD'"
+    result = lint_mermaid(code)
+    if not result.valid:
+        return False, result.error
+    return True, result.code
+
+def check_diagrams(parsed: RecommendationResponse) -> RecommendationResponse:
+    """
+    Sanitize and validate the primary diagram and every alternative's diagram in place
+    """
+    errors = []
     
-    # Check for bracket matching - count brackets per line
-    for line in lines:
-        if line.strip() and not line.strip().startswith('graph'):
-            open_brackets = line.count('[')
-            close_brackets = line.count(']')
-            if open_brackets != close_brackets:
-                return False, f"Unmatched brackets in line: {line[:40]}"
-            
-            open_pipes = line.count('|')
-            if open_pipes > 0 and open_pipes % 2 != 0:
-                return False, f"Unmatched pipes in arrow label: {line[:40]}"
+    def checked(code: str, label) -> str:
+        if not code.strip():
+            errors.append({"diagram": label, "error": "Diagram missing"})
+            return ""
+        result = lint_mermaid(code)
+        if not result.valid:
+            errors.append({"diagram": label, "error": result.error})
+        return result.code
     
-    # Check for invalid arrow patterns
-    invalid_patterns = [
-        (r'--\.-+', 'Dotted arrows not allowed'),
-        (r'-+\|>', 'Special arrowheads not allowed'),
-        (r'===+>', 'Thick arrows not allowed'),
-        (r'-->+\*', 'Invalid symbols in arrows'),
-        (r'\]\[', 'Consecutive brackets error'),
-        (r'-->\|\s*$', 'Incomplete arrow statement'),
-        (r'-->\|$', 'Missing arrow label target'),
+    parsed.architecture_diagram = checked(parsed.architecture_diagram, "primary")
+    parsed.alternative_diagrams = [
+        checked(code, explanation["stack_num"])
+        for code, explanation in zip(parsed.alternative_diagrams, parsed.alternative_explanations)
     ]
-    
-    for pattern, reason in invalid_patterns:
-        if re.search(pattern, code, re.MULTILINE):
-            return False, reason
-    
-    # Check for HTML entities
-    if '&lt;' in code or '&gt;' in code or '&amp;' in code:
-        return False, "HTML entities not allowed"
-    
-    # Check for spaces in node IDs (should be underscores)
-    # Valid: NodeID[Label] or -->|Label_Text|
-    # Invalid: Node ID[Label] or -->|Label Text|
-    if re.search(r'\s+\[', code):
-        return False, "Spaces in node definitions"
-    
-    # Check node definitions exist
-    node_pattern = r'[a-zA-Z0-9_]+\['
-    if not re.search(node_pattern, code):
-        return False, "No valid nodes found"
-    
-    # Check connections exist
-    arrow_pattern = r'-->'
-    if not re.search(arrow_pattern, code):
-        return False, "No valid connections found"
-    
-    return True, code
+    parsed.diagram_errors = errors
+    if errors:
+        logger.info("Diagram issues: %s", errors)
+    return parsed
 
 
 # Parse response into structured format
-def parse_tech_stack_response(response: str) -> RecommendationResponse:
+def parse_tech_stack_response(response: str, output_format: str = "markdown") -> RecommendationResponse:
     """
     Parse the LLM response into a structured RecommendationResponse
+    Single pass over the text - see stream_parser.parse_recommendation
+    (JSON-mode replies are validated against RecommendationOutput, markdown parser as fallback)
     """
-    print(f"\n=== PARSE START: Response length {len(response)} ===")
-    print(f"First 500 chars:\n{response[:500]}\n")
-    
-    # Extract architecture diagram
-    mermaid_match = re.search(r'```mermaid\n(.*?)\n```', response, re.DOTALL)
-    diagram = mermaid_match.group(1) if mermaid_match else ""
+    logger.debug("Parse start: response length %d", len(response))
     
-    # Extract PRIMARY stack
-    primary_match = re.search(r'## PRIMARY Technology Stack\n(.*?)(?=## ALTERNATIVE|$)', response, re.DOTALL)
-    primary_text = primary_match.group(1) if primary_match else ""
-    print(f"\n=== PRIMARY section length: {len(primary_text)} ===")
-    print(f"PRIMARY first 300 chars:\n{primary_text[:300]}\n")
-    primary_stack = parse_stack_section(primary_text)
+    parsed = check_diagrams(parse_stats.timed_parse(response, output_format))
     
-    # Extract alternatives
-    alternatives = []
-    alternative_explanations = []
-    # Fixed regex: Allow for text after the number in the header (e.g., ": Cost-Effective MVP")
-    alt_pattern = r'## ALTERNATIVE STACK #(\d+)[:\s][^\n]*\n(.*?)(?=## ALTERNATIVE STACK #\d+|$)'
-    
-    # Debug: Check if response contains ALTERNATIVE STACK markers
-    if '## ALTERNATIVE STACK' in response:
-        print("✓ Response contains ALTERNATIVE STACK markers")
+    if parsed.alternatives:
+        logger.debug("Found %d alternative stacks", len(parsed.alternatives))
     else:
-        print("✗ Response MISSING ALTERNATIVE STACK markers!")
-        print(f"  Response content preview:\n{response[-500:]}")
-    
-    alt_matches = list(re.finditer(alt_pattern, response, re.DOTALL))
-    print(f"Found {len(alt_matches)} alternative stacks with improved regex")
+        logger.info("Response has no ALTERNATIVE STACK sections; it ends with:\n%s", response[-500:])
+    if logger.isEnabledFor(logging.DEBUG):
+        primary = parsed.primary
+        logger.debug("Parsed PRIMARY: frontend=%d, backend=%d, database=%d",
+                     len(primary.frontend), len(primary.backend), len(primary.database))
     
-    for match in alt_matches:
-        stack_num = int(match.group(1))
-        alt_text = match.group(2)
-        
-        print(f"\n=== ALTERNATIVE STACK #{stack_num} ===")
-        print(f"Alt text length: {len(alt_text)}")
-        print(f"Alt text first 200 chars:\n{alt_text[:200]}\n")
-        
-        # Extract explanation lines
-        when_match = re.search(r'\*\*When to use this stack:\*\*\s*(.+?)(?:\n\n|\*\*)', alt_text, re.DOTALL)
-        trade_match = re.search(r'\*\*Primary trade-off vs recommended stack:\*\*\s*(.+?)(?:\n\n|\*\*)', alt_text, re.DOTALL)
-        why_match = re.search(r'\*\*Why this option is worth considering:\*\*\s*(.+?)(?:\n\n###)', alt_text, re.DOTALL)
-        
-        when_text = when_match.group(1).strip() if when_match else ""
-        trade_text = trade_match.group(1).strip() if trade_match else ""
-        why_text = why_match.group(1).strip() if why_match else ""
-        
-        print(f"When to use: {when_text[:100]}")
-        print(f"Trade off: {trade_text[:100]}")
-        print(f"Why consider: {why_text[:100]}\n")
-        
-        alternative_explanations.append({
-            "stack_num": stack_num,
-            "when_to_use": when_text,
-            "trade_off": trade_text,
-            "why_consider": why_text
-        })
-        
-        alt_stack = parse_stack_section(alt_text)
-        print(f"Parsed alternative #{stack_num}: Frontend={len(alt_stack.frontend)}, Backend={len(alt_stack.backend)}, DB={len(alt_stack.database)}")
-        alternatives.append(alt_stack)
-    
-    return RecommendationResponse(
-        architecture_diagram=diagram,
-        primary=primary_stack,
-        alternatives=alternatives,
-        alternative_explanations=alternative_explanations
-    )
+    return parsed
 
 def parse_stack_section(text: str) -> TechStack:
     """
     Parse a single tech stack section (PRIMARY or ALTERNATIVE)
     More robust parsing with better error handling
     """
-    stack = TechStack()
     lines = text.split('\n')
-    current_category = None
-    current_tech = None
-    parsing_mode = None  # 'pros', 'cons', or 'why'
-    
-    print(f"\n=== PARSING STACK SECTION: {len(lines)} lines ===")
-    
-    for i, line in enumerate(lines):
-        line_stripped = line.strip()
-        if not line_stripped:
-            parsing_mode = None
-            continue
-        
-        # Skip explanation lines and examples
-        if any(kw in line_stripped for kw in ['When to use', 'Primary trade-off', 'Why this option', 'EXAMPLE']):
-            parsing_mode = None
-            continue
-        
-        # Detect category (###)
-        if line_stripped.startswith('### '):
-            # Save previous tech if exists
-            if current_tech and current_category:
-                cat_list = getattr(stack, current_category)
-                cat_list.append(current_tech)
-                print(f"  Added {current_tech.name} to {current_category}")
-            current_tech = None
-            parsing_mode = None
-            
-            # Identify new category
-            if 'Frontend' in line_stripped:
-                current_category = 'frontend'
-            elif 'Backend' in line_stripped:
-                current_category = 'backend'
-            elif 'Database' in line_stripped:
-                current_category = 'database'
-            elif 'DevOps' in line_stripped or 'Infrastructure' in line_stripped:
-                current_category = 'devops'
-            elif 'Additional' in line_stripped:
-                current_category = 'additional'
-            else:
-                current_category = None
-            
-            if current_category:
-                print(f"  Category: {current_category}")
-            continue
-        
-        # Extract tech name - look for **TechName** with dash and emoji/description
-        if line_stripped.startswith('**') and ' - ' in line_stripped and current_category:
-            # Save previous tech
-            if current_tech and current_category:
-                cat_list = getattr(stack, current_category)
-                cat_list.append(current_tech)
-            
-            # Match: **TechName** - emoji/description
-            match = re.search(r'\*\*([^*]+)\*\*\s*-\s*(.+)$', line_stripped)
-            if match:
-                tech_name = match.group(1).strip()
-                current_tech = TechItem(name=tech_name)
-                parsing_mode = None
-                print(f"    Found tech: {tech_name}")
-            continue
-        
-        # Section headers (case-insensitive)
-        if line_stripped.lower() == 'pros:' and current_tech:
-            parsing_mode = 'pros'
-            continue
-        
-        if line_stripped.lower() == 'cons:' and current_tech:
-            parsing_mode = 'cons'
-            continue
-        
-        if line_stripped.lower().startswith('why:') and current_tech:
-            # Extract inline why if exists
-            why_match = re.search(r'^why:\s*(.+)$', line_stripped, re.IGNORECASE)
-            if why_match and why_match.group(1):
-                current_tech.why = why_match.group(1).strip()
-                parsing_mode = None
-            else:
-                parsing_mode = 'why'
-            continue
-        
-        # Example blocks - skip them
-        if 'EXAMPLE' in line_stripped or 'example' in line_stripped:
-            parsing_mode = None
-            continue
-        
-        # Bullet point handling
-        if line_stripped.startswith('•') and current_tech:
-            bullet_text = line_stripped[1:].strip()
-            # Remove bold markers
-            bullet_text = re.sub(r'\*\*([^*]+)\*\*:\s*', '', bullet_text)
-            # Remove trailing punctuation except period in middle
-            bullet_text = re.sub(r'[,;]\s*$', '', bullet_text)
-            bullet_text = bullet_text.strip()
-            
-            if parsing_mode == 'pros' and bullet_text:
-                current_tech.pros.append(bullet_text)
-            elif parsing_mode == 'cons' and bullet_text:
-                current_tech.cons.append(bullet_text)
-            continue
-        
-        # Multi-line why continuation
-        if parsing_mode == 'why' and current_tech and line_stripped:
-            # Stop at next section
-            if line_stripped.startswith('###') or (line_stripped.startswith('**') and ' - ' in line_stripped):
-                parsing_mode = None
-                # Re-process this line as new category/tech
-                if line_stripped.startswith('### '):
-                    if 'Frontend' in line_stripped:
-                        current_category = 'frontend'
-                    elif 'Backend' in line_stripped:
-                        current_category = 'backend'
-                    elif 'Database' in line_stripped:
-                        current_category = 'database'
-                    elif 'DevOps' in line_stripped or 'Infrastructure' in line_stripped:
-                        current_category = 'devops'
-                    elif 'Additional' in line_stripped:
-                        current_category = 'additional'
-                    current_tech = None
-                continue
-            # Accumulate why
-            current_tech.why += ' ' + line_stripped
-            continue
-        
-        # Stop parsing sections when encountering new markers
-        if line_stripped.startswith('###') and parsing_mode:
-            parsing_mode = None
+    logger.debug("Parsing stack section: %d lines", len(lines))
     
-    # Don't forget the last tech
-    if current_tech and current_category:
-        cat_list = getattr(stack, current_category)
-        cat_list.append(current_tech)
-        print(f"  Added final {current_tech.name} to {current_category}")
+    section_parser = StackSectionParser(events=[])
+    for line in lines:
+        section_parser.feed_line(line)
+    stack = TechStack.model_validate(section_parser.close(), from_attributes=True)
     
-    # Debug output
-    total_techs = len(stack.frontend) + len(stack.backend) + len(stack.database) + len(stack.devops) + len(stack.additional)
-    print(f"  PARSED TOTAL: {total_techs} technologies")
-    print(f"    Frontend: {len(stack.frontend)}, Backend: {len(stack.backend)}, Database: {len(stack.database)}, DevOps: {len(stack.devops)}, Additional: {len(stack.additional)}")
+    logger.debug("Parsed stack section: frontend=%d, backend=%d, database=%d, devops=%d, additional=%d",
+                 len(stack.frontend), len(stack.backend), len(stack.database), len(stack.devops),
+                 len(stack.additional))
     
     return stack
 
@@ -846,98 +1040,667 @@ def parse_stack_section(text: str) -> TechStack:
 
 # 9. API Endpoints
 
+def prompt_engineer_inputs(req) -> dict:
+    """
+    Map a StackRequest/PromptGenerationRequest onto the prompt_engineer_template variables
+    """
+    return {
+        "appType": req.appType,
+        "scale": req.scale,
+        "focus": req.focus,
+        "teamSize": req.teamSize,
+        "budget": req.budget,
+        "timeToMarket": req.timeToMarket,
+        "securityLevel": req.securityLevel,
+        "customConstraints": req.customConstraints
+    }
+
+async def build_custom_prompt(req, mode: str = None, priority: int = INTERACTIVE) -> tuple[str, str]:
+    """
+    Build the custom prompt for stack_chain with the given mode (default PROMPT_MODE).
+    Returns (prompt, mode actually used) and records the per-mode latency.
+    """
+    mode = (mode or PROMPT_MODE).lower()
+    if mode not in PROMPT_MODES:
+        raise ValueError(f"prompt_mode must be one of {', '.join(PROMPT_MODES)}")
+    mode = resolve_prompt_mode(mode, req.customConstraints)
+    
+    start = time.perf_counter()
+    if mode == "template":
+        custom_prompt = template_prompt(req)
+    else:
+        custom_prompt, _ = await prompt_flight.do(
+            request_key(req.dict()),
+            lambda: llm_call(llm_chains().prompt_engineer_chain, prompt_engineer_inputs(req),
+                             estimate_tokens(prompt_engineer_system, req.customConstraints, output=800),
+                             priority))
+    elapsed = time.perf_counter() - start
+    prompt_mode_stats.record(mode, elapsed)
+    stage_timer.record("prompt", elapsed, mode)
+    return custom_prompt, mode
+
 # Endpoint 1: Generate Custom Prompt Based on User Inputs
 @app.post("/api/generate-prompt")
-async def generate_prompt(req: PromptGenerationRequest):
+async def generate_prompt(req: PromptGenerationRequest, prompt_mode: str = None):
     """
     Generate a custom prompt for tech stack recommendation based on user context
+    ?prompt_mode=llm|template|auto overrides PROMPT_MODE
     """
     try:
-        custom_prompt = await prompt_engineer_chain.ainvoke({
-            "appType": req.appType,
-            "scale": req.scale,
-            "focus": req.focus,
-            "teamSize": req.teamSize,
-            "budget": req.budget,
-            "timeToMarket": req.timeToMarket,
-            "securityLevel": req.securityLevel,
-            "customConstraints": req.customConstraints
-        })
+        custom_prompt, mode = await build_custom_prompt(req, prompt_mode)
         
         # Log the prompt generation - save both the generated prompt and system prompt
         log_request_response(req.dict(), custom_prompt, "prompt_engineering", 
                             custom_prompt=custom_prompt)
         
-        return {"success": True, "prompt": custom_prompt}
+        return {"success": True, "prompt": custom_prompt, "prompt_mode": mode}
+    except SchedulerOverloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 # Endpoint 2: Recommend Tech Stack Using Generated Prompt
-@app.post("/api/recommend")
-async def recommend_stack(req: StackRequest):
+def similar_recommendation(req: StackRequest, threshold: float) -> tuple[dict, float]:
     """
-    Generate tech stack recommendation with context from user inputs
-    Returns structured JSON response (non-streaming)
+    The cached (or precomputed) recommendation of the most similar past request
+    scoring at least `threshold`, and its score - (None, 0.0) if there is none
     """
-    try:
-        print("\n=== BACKEND LOG: Generating custom prompt ===")
-        custom_prompt = await prompt_engineer_chain.ainvoke({
-            "appType": req.appType,
-            "scale": req.scale,
-            "focus": req.focus,
-            "teamSize": req.teamSize,
-            "budget": req.budget,
-            "timeToMarket": req.timeToMarket,
-            "securityLevel": req.securityLevel,
-            "customConstraints": req.customConstraints
+    if threshold <= 0:
+        return None, 0.0
+    for key, score in similarity_index.search(req.dict(), k=3):
+        if score < threshold:
+            break
+        value = recommendation_cache.peek(key) or precomputed_store.get(key)
+        if value is not None:
+            return value, score
+        # Expired from the cache since it was indexed
+        similarity_index.remove(key)
+    return None, 0.0
+
+def stored_recommendation(req: StackRequest, cache_key: str, prompt_profile: str) -> tuple[dict, str, float]:
+    """
+    (recommendation, where it came from, similarity score) for a request that doesn't need
+    the LLM: the cache, then for the "full" profile the precomputed store and a similar past
+    request - (None, "miss", 0.0) otherwise. Found elsewhere than the cache, it is cached
+    under this request's key so repeats are exact hits
+    """
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return cached, "cache", 0.0
+    if prompt_profile != "full":
+        return None, "miss", 0.0
+    cached, source, score = precomputed_store.get(cache_key), "precomputed", 0.0
+    if cached is None:
+        (cached, score), source = similar_recommendation(req, SIMILARITY_REUSE_THRESHOLD), "similar"
+    if cached is None:
+        return None, "miss", 0.0
+    recommendation_cache.set(cache_key, cached)
+    return cached, source, score
+
+async def seed_custom_prompt(req: StackRequest, custom_prompt: str) -> str:
+    """
+    Append the PRIMARY stack of a similar past request (>= SIMILARITY_SEED_THRESHOLD) as a starting point
+    """
+    if SIMILARITY_SEED_THRESHOLD <= 0:
+        return custom_prompt
+    # May read the cache and precomputed SQLite files
+    seed, score = await asyncio.to_thread(similar_recommendation, req, SIMILARITY_SEED_THRESHOLD)
+    summary = seed_summary(seed) if seed else ""
+    if not summary:
+        return custom_prompt
+    similarity_matches.labels("seed").inc()
+    record_timing("seed", None, f"{score:.3f}")
+    return (f"{custom_prompt}\n\nFor a very similar project the recommended PRIMARY stack was:\n{summary}\n"
+            "Start from it and change only what this project's differences call for.")
+
+def finalize_recommendation(req: StackRequest, cache_key: str, custom_prompt: str, full_response: str,
+                            parsed_response: RecommendationResponse = None,
+                            prompt_profile: str = "full", output_format: str = "markdown",
+                            record: bool = True) -> RecommendationResponse:
+    """
+    Parse (unless already parsed while streaming), log and cache a complete stack_chain response.
+    record=False (precompute.py) skips the response log, the archive and the raw snapshot, which
+    are meant to hold what users asked for
+    """
+    logger.debug("Full response length %d", len(full_response))
+    
+    if record:
+        # Debug: Save raw response to file for inspection
+        response_log.replace_text(LOG_DIR / 'last_llm_response.txt', full_response)
+    
+    # Parse response into structured format
+    if parsed_response is None:
+        with stage_timer.time("parse", output_format):
+            parsed_response = parse_tech_stack_response(full_response, output_format)
+    
+    # Log the response
+    if record:
+        log_request_response(req.dict(), full_response, "stack_recommendation",
+                            custom_prompt=custom_prompt, master_prompt=stack_system_prompt(prompt_profile, output_format))
+    if record and response_archive is not None:
+        # Serialized by the archive's writer thread
+        response_archive.append({
+            "key": cache_key,
+            "inputs": req.dict(),
+            "prompt_profile": prompt_profile,
+            "output_format": output_format,
+            "custom_prompt": custom_prompt,
+            "response": full_response,
+            "parsed": parsed_response
         })
-        print(f"Custom prompt generated: {custom_prompt[:200]}...")
-        
-        print("=== BACKEND LOG: Generating tech stack recommendation ===")
-        # Get full response (not streaming)
-        full_response = await stack_chain.ainvoke({"custom_prompt": custom_prompt})
+    
+    # Only cache responses that actually contain a stack
+    if parsed_response.primary.frontend or parsed_response.primary.backend:
+        recommendation_cache.set(cache_key, parsed_response.dict())
+        if prompt_profile == "full":
+            similarity_index.add(cache_key, req.dict())
+    
+    return parsed_response
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def recommendation_response(request: Request, recommendation, cache_key: str, stored: bool) -> Response:
+    """
+    JSON response with the recommendation's key (X-Recommendation-Key), which
+    GET /api/recommend/{key} re-fetches. Only a `stored` recommendation (read
+    back from the cache or the precomputed store) gets an ETag - a fresh LLM
+    answer isn't reproducible, so there is nothing to revalidate. A matching
+    If-None-Match gives 304 on GET/HEAD and 412 on POST (RFC 9110 13.1.2).
+    """
+    headers = {"Cache-Control": "private, no-cache", "X-Recommendation-Key": cache_key}
+    with stage_timer.time("serialize"):
+        # A fresh RecommendationResponse is serialized by pydantic-core, without a dict copy first
+        response = FastJSONResponse(recommendation, headers=headers)
+        etag = etag_for(response.body) if stored else None
+    if etag is None:
+        return response
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        if request.method in ("GET", "HEAD"):
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+        return FastJSONResponse(status_code=412, content={"error": "Precondition Failed"},
+                                headers={**headers, "ETag": etag})
+    response.headers["ETag"] = etag
+    return response
+
+def sse_event(event: str, data) -> str:
+    """
+    Format one Server-Sent Event frame
+    """
+    return f"event: {event}\ndata: {fast_json.dumps(data).decode('utf-8')}\n\n"
+
+def stream_event(event: str, data: dict) -> str:
+    """
+    SSE frame for a RecommendationStreamParser event, with diagrams sanitized
+    """
+    if event == "diagram" and data["architecture_diagram"].strip():
+        data = {"architecture_diagram": sanitize_mermaid_code(data["architecture_diagram"])}
+    elif event == "alternative" and data["diagram"]:
+        data = {**data, "diagram": sanitize_mermaid_code(data["diagram"])}
+    return sse_event(event, data)
+
+FANOUT_ALT_CUT = "\n## ALTERNATIVE"
+FANOUT_ALT_HEADER = re.compile(r'## ALTERNATIVE STACK(?: #\d+)?')
+
+def alternative_section(text: str, stack_num: int) -> str:
+    """
+    Normalize one fan-out alternative: drop any preamble, force its header
+    number and cut off any extra stacks the model added after it
+    """
+    match = FANOUT_ALT_HEADER.search(text)
+    if match is None:
+        return f"## ALTERNATIVE STACK #{stack_num}\n{text.strip()}\n"
+    body = text[match.end():]
+    extra = FANOUT_ALT_HEADER.search(body)
+    if extra:
+        body = body[:extra.start()]
+    return f"## ALTERNATIVE STACK #{stack_num}{body.rstrip()}\n"
+
+async def fanout_chunks(custom_prompt: str):
+    """
+    Fan-out generation: the PRIMARY section and each ALTERNATIVE STACK run as
+    concurrent LLM calls. Yields one merged document in the single-call
+    format - the primary as it streams, then each alternative once it and
+    the ones before it are done - so the usual parsers apply unchanged.
+    A failed alternative is skipped; a failed primary fails the request.
+    """
+    alternatives = [
+        asyncio.create_task(llm_call(
+            llm_chains().alternative_section_chain, {"custom_prompt": custom_prompt, "stack_num": stack_num, "focus": focus},
+            estimate_tokens(alternative_section_prompt, custom_prompt, output=2000)))
+        for stack_num, focus in ALTERNATIVE_FOCUSES
+    ]
+    try:
+        pending = ""
+        # aclosing: leaving the loop early releases the scheduler slot and the upstream stream now, not at GC
+        async with aclosing(llm_stream(llm_chains().primary_section_chain, {"custom_prompt": custom_prompt},
+                                       estimate_tokens(primary_section_prompt, custom_prompt, output=2500))) as primary:
+            async for chunk in primary:
+                pending += chunk
+                cut = pending.find(FANOUT_ALT_CUT)
+                if cut >= 0:
+                    # The model wrote alternatives anyway - ours replace them
+                    pending = pending[:cut]
+                    break
+                # Hold back a tail that could be the start of FANOUT_ALT_CUT
+                safe = len(pending) - len(FANOUT_ALT_CUT)
+                if safe > 0:
+                    yield pending[:safe]
+                    pending = pending[safe:]
+        yield pending + "\n\n## ALTERNATIVE Technology Stacks\n\n"
         
-        print(f"\n=== BACKEND LOG: Full response length: {len(full_response)} ===")
-        print(f"=== BACKEND LOG: PRIMARY check: {'## PRIMARY' in full_response} ===")
-        print(f"=== BACKEND LOG: MERMAID check: {'```mermaid' in full_response} ===")
+        for (stack_num, _), task in zip(ALTERNATIVE_FOCUSES, alternatives):
+            try:
+                yield alternative_section(await task, stack_num) + "\n"
+            except Exception as e:
+                logger.warning("Fan-out alternative #%d failed: %s", stack_num, e)
+    finally:
+        for task in alternatives:
+            task.cancel()
+
+def stack_chunks(custom_prompt: str, fanout: bool, prompt_profile: str = "full", output_format: str = "markdown"):
+    """
+    Stream the stack_chain response (for the given system prompt profile and
+    output format), or the merged fan-out document (fan-out is markdown-only
+    and always uses the full prompt's sections)
+    """
+    if fanout and output_format == "markdown":
+        return fanout_chunks(custom_prompt)
+    return llm_stream(profile_stack_chain(prompt_profile, output_format), {"custom_prompt": custom_prompt},
+                      estimate_tokens(stack_system_prompt(prompt_profile, output_format), custom_prompt, output=6000))
+
+async def stream_recommendation(req: StackRequest, cache_key: str, fanout: bool = False, prompt_mode: str = None,
+                                prompt_profile: str = "full", output_format: str = "markdown"):
+    """
+    Server-Sent Events version of recommend_stack: emits the prompt, then the
+    RecommendationStreamParser events (diagram, tech, category, primary,
+    alternative_explanation, alternative) while the LLM is still generating,
+    then a final "complete" event with the full RecommendationResponse
+    (JSON output has no incremental parser - only prompt, timing and complete)
+    """
+    try:
+        # An identical request is already generating - wait for its result
+        flight = recommend_flight.lead(cache_key)
+        if flight is None:
+            parsed_response, _ = await recommend_flight.do(
+                cache_key, lambda: generate_recommendation(req, cache_key, fanout, prompt_mode, prompt_profile,
+                                                           output_format))
+            yield sse_event("complete", parsed_response)
+            return
         
-        # Debug: Save raw response to file for inspection
-        with open('last_llm_response.txt', 'w') as f:
-            f.write(full_response)
-        print(f"=== BACKEND LOG: Raw response saved to last_llm_response.txt ===")
+        try:
+            custom_prompt, mode = await build_custom_prompt(req, prompt_mode)
+            custom_prompt = await seed_custom_prompt(req, custom_prompt)
+            yield sse_event("prompt", {"prompt": custom_prompt, "prompt_mode": mode})
+            
+            # Parse inline with generation - every event goes out as soon as its section closes
+            parser = RecommendationStreamParser()
+            chunks = []
+            parse_seconds = 0.0
+            start = time.perf_counter()
+            # A client that disconnects closes this generator mid-loop; aclosing closes the upstream one with it
+            async with aclosing(stack_chunks(custom_prompt, fanout, prompt_profile, output_format)) as upstream:
+                async for chunk in upstream:
+                    if not chunks:
+                        stage_timer.record("first_token", time.perf_counter() - start)
+                    chunks.append(chunk)
+                    if output_format == "json":
+                        continue
+                    parse_start = time.perf_counter()
+                    events = parser.feed(chunk)
+                    parse_seconds += time.perf_counter() - parse_start
+                    for event, data in events:
+                        yield stream_event(event, data)
+            if output_format == "json":
+                stage_timer.record("generate", time.perf_counter() - start, "json")
+                # The whole document is needed before it can be decoded
+                parsed_response = finalize_recommendation(req, cache_key, custom_prompt, ''.join(chunks),
+                                                          prompt_profile=prompt_profile, output_format=output_format)
+            else:
+                parse_start = time.perf_counter()
+                events = parser.close()
+                checked = check_diagrams(parser.result())
+                parse_seconds += time.perf_counter() - parse_start
+                stage_timer.record("generate", parse_start - start - parse_seconds,
+                                   "fanout" if fanout else prompt_profile)
+                stage_timer.record("parse", parse_seconds, "markdown")
+                parse_stats.record("markdown", "markdown", parse_seconds, has_stack(checked))
+                for event, data in events:
+                    yield stream_event(event, data)
+                
+                parsed_response = finalize_recommendation(req, cache_key, custom_prompt, ''.join(chunks),
+                                                          parsed_response=checked, prompt_profile=prompt_profile)
+            flight.set_result(parsed_response)
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            # Client went away mid-stream: waiting requests take over the generation
+            if not flight.done():
+                flight.cancel()
+        # The Server-Timing header went out before generation; send the breakdown as an event
+        yield sse_event("timing", {stage: round(ms, 1) for stage, ms, _ in current_timings() if ms is not None})
+        yield sse_event("complete", parsed_response)
+    except Exception as e:
+        logger.error("Error in stream_recommendation: %s", e)
+        yield sse_event("error", {"error": str(e)})
+
+async def generate_recommendation(req: StackRequest, cache_key: str, fanout: bool, prompt_mode: str = None,
+                                  prompt_profile: str = "full", output_format: str = "markdown",
+                                  priority: int = INTERACTIVE, record: bool = True) -> RecommendationResponse:
+    """
+    Full non-streaming generation: custom prompt, stack_chain (or fan-out, or the
+    JSON-mode chain), parse, log, cache. precompute.py calls it with priority=BATCH
+    and record=False (see finalize_recommendation)
+    """
+    custom_prompt, mode = await build_custom_prompt(req, prompt_mode, priority)
+    custom_prompt = await seed_custom_prompt(req, custom_prompt)
+    logger.debug("Custom prompt (%s): %.200s", mode, custom_prompt)
+    # Get full response (not streaming)
+    if output_format == "json":
+        fanout = False
+    with stage_timer.time("generate", "json" if output_format == "json" else "fanout" if fanout else prompt_profile):
+        if fanout:
+            full_response = ''.join([chunk async for chunk in fanout_chunks(custom_prompt)])
+        else:
+            full_response = await llm_call(profile_stack_chain(prompt_profile, output_format),
+                                           {"custom_prompt": custom_prompt},
+                                           estimate_tokens(stack_system_prompt(prompt_profile, output_format),
+                                                           custom_prompt, output=6000),
+                                           priority)
+    
+    return finalize_recommendation(req, cache_key, custom_prompt, full_response, prompt_profile=prompt_profile,
+                                   output_format=output_format, record=record)
+
+@app.post("/api/recommend")
+async def recommend_stack(req: StackRequest, request: Request, stream: bool = False, fanout: bool = None,
+                          prompt_mode: str = None, prompt_profile: str = None, output_format: str = None):
+    """
+    Generate tech stack recommendation with context from user inputs
+    Returns structured JSON response (see recommendation_response for the
+    X-Recommendation-Key and ETag headers), or Server-Sent Events with ?stream=1
+    ?fanout=1 generates the primary and alternative stacks as concurrent calls
+    (default: RECOMMEND_FANOUT)
+    ?prompt_mode=llm|template|auto picks how the custom prompt is built (default: PROMPT_MODE)
+    ?prompt_profile=full|compact picks the system prompt (default: SYSTEM_PROMPT_PROFILE)
+    ?output_format=markdown|json picks how stack_chain answers (default: OUTPUT_FORMAT);
+    json uses its own system prompt, so prompt_profile and fanout don't apply
+    """
+    try:
+        prompt_profile = resolve_prompt_profile(prompt_profile)
+        output_format = resolve_output_format(output_format)
+        if output_format == "json":
+            prompt_profile = "full"
+            fanout = False
+        # Profiles produce different responses, so only the default "full" shares the plain key.
+        # JSON mode parses to the same RecommendationResponse, so it shares it too
+        cache_key = request_key(req.dict())
+        if prompt_profile != "full":
+            cache_key = f"{prompt_profile}:{cache_key}"
+        if fanout is None:
+            fanout = RECOMMEND_FANOUT
         
-        # Parse response into structured format
-        parsed_response = parse_tech_stack_response(full_response)
+        if recommendation_cache.persistent or precomputed_store.available:
+            # A miss in memory reads SQLite - keep that off the event loop
+            cached, source, score = await asyncio.to_thread(stored_recommendation, req, cache_key, prompt_profile)
+        else:
+            cached, source, score = stored_recommendation(req, cache_key, prompt_profile)
+        record_timing("cache", None, "hit" if source == "cache" else "miss")
+        if source == "precomputed":
+            record_timing("precomputed", None)
+        elif source == "similar":
+            similarity_matches.labels("reuse").inc()
+            record_timing("similar", None, f"{score:.3f}")
+        if cached is not None:
+            logger.debug("Cache hit %.12s (%s)", cache_key, source)
+            if stream:
+                return StreamingResponse(iter([sse_event("complete", cached)]),
+                                         media_type="text/event-stream", headers=SSE_HEADERS)
+            return recommendation_response(request, cached, cache_key, stored=True)
         
-        # Log the response
-        log_request_response(req.dict(), full_response, "stack_recommendation",
-                            custom_prompt=custom_prompt, master_prompt=system_prompt)
+        if stream:
+            # Shed before the 200 goes out - once streaming, errors can only be events
+            if not recommend_flight.in_flight(cache_key):
+                llm_scheduler.admit()
+            return StreamingResponse(
+                stream_recommendation(req, cache_key, fanout, prompt_mode, prompt_profile, output_format),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
         
-        return parsed_response
+        parsed_response, shared = await recommend_flight.do(
+            cache_key, lambda: generate_recommendation(req, cache_key, fanout, prompt_mode, prompt_profile,
+                                                       output_format))
+        if shared:
+            record_timing("coalesced", None)
+            logger.debug("Joined in-flight generation %.12s", cache_key)
+        return recommendation_response(request, parsed_response, cache_key, stored=False)
         
+    except SchedulerOverloaded as e:
+        logger.warning("Shedding recommend_stack: %s", e)
+        return overloaded_response(e)
     except Exception as e:
-        print(f"Error in recommend_stack: {e}")
+        logger.error("Error in recommend_stack: %s", e)
         return {"error": str(e)}
 
 # Endpoint 3: Debug - Show what system prompt looks like
 @app.get("/api/debug/system-prompt")
 def debug_system_prompt():
     """
-    Show the system prompt being used (for debugging)
+    Show the system prompt being used (for debugging), with the size of each profile
     """
     return {
         "system_prompt_length": len(system_prompt),
         "has_primary": "## PRIMARY" in system_prompt,
         "has_frontend": "### Frontend" in system_prompt,
         "first_500_chars": system_prompt[:500],
-        "sample_section": system_prompt[100:400]
+        "sample_section": system_prompt[100:400],
+        "default_profile": SYSTEM_PROMPT_PROFILE,
+        "tokenizer": tokenizer_name(),
+        "profiles": prompt_profile_stats()
     }
 
-# Endpoint 4: Health Check
+def worker_stats(stats: dict) -> dict:
+    """
+    Tag a stats payload with the worker process that answered. With several workers
+    every counter below is that worker's alone - only the cache entries and /metrics are shared
+    """
+    return {"worker_pid": os.getpid(), "workers": WORKERS, **stats}
+
+# Endpoint 4: Recommendation cache statistics
+@app.get("/api/cache/stats")
+def cache_stats():
+    """
+    Show hit/miss counters for the recommendation cache, the precomputed store and the similarity index
+    """
+    return worker_stats({**recommendation_cache.stats(), "precomputed": precomputed_store.stats(),
+                         "similarity": similarity_index.stats()})
+
+# Endpoint 5: Background response log statistics
+@app.get("/api/logs/stats")
+def log_stats():
+    """
+    Show queue depth and written/dropped/rotated counters for the response log writer
+    """
+    return worker_stats(response_log.stats())
+
+# Endpoint 6: Per-mode latency of custom prompt construction
+@app.get("/api/prompt/stats")
+def prompt_stats():
+    """
+    Compare custom prompt latency between the LLM prompt engineer and the local templates
+    """
+    return worker_stats({"default_mode": PROMPT_MODE, "modes": prompt_mode_stats.stats()})
+
+# Endpoint 7: Request coalescing statistics
+@app.get("/api/coalescing/stats")
+def coalescing_stats():
+    """
+    Show how many upstream LLM calls were saved by joining identical in-flight requests
+    """
+    return worker_stats({"recommendations": recommend_flight.stats(), "prompts": prompt_flight.stats()})
+
+# Endpoint 8: LLM scheduler statistics
+@app.get("/api/llm/stats")
+def llm_stats():
+    """
+    Show running/queued upstream calls, retries, 429s and shed requests
+    """
+    return worker_stats(llm_scheduler.stats())
+
+# Endpoint 9: Upstream connection pool statistics
+@app.get("/api/upstream/stats")
+def upstream_stats():
+    """
+    Show how many upstream requests reused a pooled connection vs opened a new one
+    """
+    return worker_stats(pool_stats(upstream_http))
+
+# Endpoint 10: Response compression statistics
+@app.get("/api/compression/stats")
+def compression_statistics():
+    """
+    Show bytes before/after compression and compression time per content coding
+    """
+    return worker_stats({"min_size": COMPRESS_MIN_SIZE, "codings": compression_stats.stats()})
+
+# Endpoint 11: Response parse statistics per output format
+@app.get("/api/parse/stats")
+def parse_statistics():
+    """
+    Show parse time and success rate of markdown vs JSON output, and how often
+    JSON replies fell back to the markdown parser
+    """
+    return worker_stats({"default_format": OUTPUT_FORMAT, "formats": parse_stats.stats()})
+
+def collect_component_metrics() -> list:
+    """
+    Scheduler, cache, coalescing, response log and connection pool stats as metric families
+    """
+    scheduler = llm_scheduler.stats()
+    cache = recommendation_cache.stats()
+    flights = {"recommendations": recommend_flight.stats(), "prompts": prompt_flight.stats()}
+    logs = response_log.stats()
+    pool = pool_stats(upstream_http)
+    parses = parse_stats.stats()
+    return [
+        ("techstack_llm_running", "gauge", "Upstream LLM calls in progress", [({}, scheduler["running"])]),
+        ("techstack_llm_queued", "gauge", "Upstream LLM calls waiting for a slot", [({}, scheduler["queued"])]),
+        ("techstack_llm_retries_total", "counter", "Upstream calls retried after 429/5xx/connection errors", [({}, scheduler["retries"])]),
+        ("techstack_llm_rate_limited_total", "counter", "Upstream 429 responses", [({}, scheduler["rate_limited"])]),
+        ("techstack_llm_shed_total", "counter", "Requests rejected with 503 by the scheduler", [({}, scheduler["shed"])]),
+        ("techstack_llm_failures_total", "counter", "Upstream calls that failed after retries", [({}, scheduler["failures"])]),
+        ("techstack_cache_lookups_total", "counter", "Recommendation cache lookups by result",
+         [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])]),
+        ("techstack_cache_entries", "gauge", "Recommendation cache entries in memory", [({}, cache["entries"])]),
+        ("techstack_precomputed_lookups_total", "counter", "Precomputed store lookups by result",
+         [({"result": "hit"}, precomputed_store.hits), ({"result": "miss"}, precomputed_store.misses)]),
+        ("techstack_coalescing_in_flight", "gauge", "Distinct generations in flight",
+         [({"kind": kind}, stats["in_flight"]) for kind, stats in flights.items()]),
+        ("techstack_coalescing_leaders_total", "counter", "Generations started",
+         [({"kind": kind}, stats["leaders"]) for kind, stats in flights.items()]),
+        ("techstack_coalescing_joined_total", "counter", "Requests that joined an in-flight generation",
+         [({"kind": kind}, stats["upstream_calls_saved"]) for kind, stats in flights.items()]),
+        ("techstack_response_log_queued", "gauge", "Response log entries waiting to be written", [({}, logs["queued"])]),
+        ("techstack_response_log_dropped_total", "counter", "Response log entries dropped", [({}, logs["dropped"])]),
+        ("techstack_response_archive_dropped_total", "counter", "Recommendations not archived (queue full)",
+         [({}, response_archive.dropped if response_archive is not None else 0)]),
+        ("techstack_upstream_connections_total", "counter", "Upstream HTTP requests by connection reuse",
+         [({"connection": "new"}, pool.get("new_connections", 0)), ({"connection": "reused"}, pool.get("reused_connections", 0))]),
+        ("techstack_system_prompt_tokens", "gauge", "Approximate tokens in each system prompt profile",
+         [({"profile": profile}, stats["tokens"]) for profile, stats in prompt_profile_stats().items()]),
+        ("techstack_parse_total", "counter", "Parsed stack responses by output format and result",
+         [({"format": fmt, "result": result}, value) for fmt, stats in parses.items()
+          for result, value in (("ok", stats["succeeded"]), ("empty", stats["parsed"] - stats["succeeded"]))]),
+        ("techstack_response_bytes_total", "counter", "Compressed response bodies by coding, before (raw) and after (sent)",
+         [({"coding": coding, "size": size}, stats[f"{size}_bytes"]) for coding, stats in compression_stats.stats().items()
+          for size in ("raw", "sent")]),
+        ("techstack_parse_fallbacks_total", "counter", "JSON replies that had to be parsed as markdown",
+         [({}, parses["json"]["fallbacks"])]),
+    ]
+
+metrics.add_collector(collect_component_metrics)
+
+# Endpoint 12: Prometheus metrics
+@app.get("/metrics")
+def prometheus_metrics():
+    """
+    Stage latency histograms, per-model token counts, errors/429s, cache and
+    coalescing counters and in-flight gauges in Prometheus text format
+    (summed over all workers when WEB_CONCURRENCY > 1)
+    """
+    text = shared_metrics.render() if shared_metrics is not None else metrics.render()
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+# Endpoint 13: Health Check
 @app.get("/")
 def home():
     return {
         "message": "TechStack.Studio Brain is Active 🧠",
         "version": "2.0",
-        "features": ["prompt_engineering", "tech_stack_recommendation", "mermaid_diagrams", "logging"]
-    }
\ No newline at end of file
+        "features": ["prompt_engineering", "tech_stack_recommendation", "mermaid_diagrams", "logging", "recommendation_cache"]
+    }
+
+# Endpoint 14: Liveness probe (Docker HEALTHCHECK, load balancers)
+@app.get("/healthz")
+def healthz():
+    """
+    The process is up and its event loop answers - nothing else is checked
+    """
+    return {"status": "ok"}
+
+# Endpoint 15: Readiness probe
+@app.get("/readyz")
+def readyz():
+    """
+    Ready for traffic: the models are built and the upstream connections warmed
+    up (unless LLM_PRELOAD is off, then the first request does both) and the log
+    writers are running. 503 with the failing checks otherwise.
+    """
+    if _llm_chains is not None:
+        llm = "ok"
+    elif llm_setup_error:
+        llm = llm_setup_error
+    else:
+        llm = "loading" if LLM_PRELOAD else "on first use"
+    if not LLM_PRELOAD:
+        upstream = "on first use"
+    else:
+        upstream = "ok" if upstream_warm else "warming up"
+    checks = {
+        "llm": llm,
+        "upstream": upstream,
+        "response_log": "ok" if response_log.alive() else "stopped",
+        "access_log": "ok" if log_listener is not None else "not started",
+    }
+    ready = (llm in ("ok", "on first use") and upstream in ("ok", "on first use")
+             and all(checks[name] == "ok" for name in ("response_log", "access_log")))
+    return FastJSONResponse(status_code=200 if ready else 503,
+                            content={"status": "ready" if ready else "not ready", "checks": checks})
+
+# Endpoint 16: Response archive statistics
+@app.get("/api/archive/stats")
+def archive_stats():
+    """
+    Show records, blocks and compression of the response archive and its writer's counters
+    """
+    if response_archive is None:
+        return worker_stats({"enabled": False})
+    return worker_stats({"enabled": True, **response_archive.stats()})
+
+# Endpoint 17: Re-fetch a recommendation by key
+@app.get("/api/recommend/{cache_key}")
+async def get_recommendation(cache_key: str, request: Request):
+    """
+    A recommendation from the cache or the precomputed store by the key POST /api/recommend
+    returned in X-Recommendation-Key, with an ETag (If-None-Match gives 304); 404 once it expired
+    """
+    def lookup():
+        return recommendation_cache.peek(cache_key) or precomputed_store.get(cache_key)
+
+    if recommendation_cache.persistent or precomputed_store.available:
+        cached = await asyncio.to_thread(lookup)
+    else:
+        cached = lookup()
+    if cached is None:
+        return FastJSONResponse(status_code=404, content={"error": "Recommendation not found or expired"})
+    return recommendation_response(request, cached, cache_key, stored=True)
@@ -0,0 +1,322 @@
+import re
+from typing import Optional
+
+# One-pass lexer/parser for the `graph TD` subset that system_prompt asks for.
+#
+# Each line is tokenized once with a single precompiled master pattern, folded
+# into a small AST (nodes + edges) and repaired on the way:
+#   - unclosed node brackets are closed, stray brackets dropped
+#   - dangling arrows (no target, unclosed |label|) are dropped
+#   - spaces in node IDs / labels / arrow labels become underscores
+#   - HTML-escaped arrows (--&gt;) are decoded, dotted/thick/open arrows become -->
+#   - subgraph/style/classDef lines are flattened away
+# The AST is then printed back as a canonical diagram (header, node
+# definitions, edges), so validation needs no second scan of the text.
+
+TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<arrow><?(?:-{2,}|={2,}|-\.+-)(?:>|o(?!\w)|x(?!\w))?)
+  | (?P<label>\|[^|]*\|?)
+  | (?P<shape>\(\[|\[\(|\(\(|\[\[|\{\{|\[|\(|\{)
+  | (?P<id>[^\s\[\](){}|&;<>=\-"'`]+(?:-(?![-.>=])[^\s\[\](){}|&;<>=\-"'`]+)*)
+  | (?P<amp>&)
+  | (?P<semi>;)
+  | (?P<other>.)
+''', re.VERBOSE)
+
+KEYWORDS = r'(?:subgraph|end|classDef|class|style|linkStyle|click|direction)\b'
+KEYWORD_RE = re.compile(r'(?P<header>(?i:graph|flowchart))\b|' + KEYWORDS)
+# Fast path: "A -->|Label| B" and "A[Label]" lines already in canonical form skip the tokenizer
+CANONICAL_LINE = re.compile(
+    r'(?!' + KEYWORDS + r')(?:'
+    r'([A-Za-z0-9_]+)\s*-->\s*(?:\|([\w.+/:,-]*)\|\s*)?([A-Za-z0-9_]+)'
+    r'|([A-Za-z0-9_]+)(\[\(|\(\[|\(\(|\[\[|\{\{|[\[({])([\w.+/:,-]+)(\)\]|\]\)|\)\)|\]\]|\}\}|[\])}])'
+    r')'
+)
+ENTITY_RE = re.compile(r'&(lt|gt|amp|quot|#39|nbsp);')
+ID_INVALID = re.compile(r'[^A-Za-z0-9_]+')
+LABEL_INVALID = re.compile(r'[^\w.+/:,-]+')
+
+ENTITIES = {"lt": "<", "gt": ">", "amp": "&", "quot": '"', "#39": "'", "nbsp": " "}
+
+# opener -> (closer, printed opener, printed closer)
+SHAPES = {
+    "[": ("]", "[", "]"),
+    "(": (")", "(", ")"),
+    "{": ("}", "{", "}"),
+    "([": ("])", "([", "])"),
+    "[(": (")]", "[(", ")]"),
+    "((": ("))", "((", "))"),
+    "[[": ("]]", "[[", "]]"),
+    "{{": ("}}", "{{", "}}"),
+}
+
+
+def clean_id(raw: str) -> str:
+    node_id = ID_INVALID.sub('_', raw).strip('_') or "Node"
+    # "end" is a Mermaid keyword and breaks the whole diagram when used as an ID
+    return node_id + "_" if node_id.lower() == "end" else node_id
+
+
+def clean_label(raw: str) -> str:
+    if '&' in raw:
+        raw = ENTITY_RE.sub(lambda m: ENTITIES[m.group(1)], raw)
+    label = LABEL_INVALID.sub('_', raw.strip())
+    if '__' in label:
+        label = re.sub(r'_{2,}', '_', label)
+    # A leading/trailing "/" would turn [..] into a trapezoid shape
+    return label.strip('_/')
+
+
+def is_clean_label(label: str) -> bool:
+    """
+    True when clean_label would return `label` unchanged (label already matched [\\w.+/:,-]*)
+    """
+    return not label or (label[0] not in '_/' and label[-1] not in '_/' and '__' not in label)
+
+
+class MermaidNode:
+    __slots__ = ("id", "label", "shape")
+
+    def __init__(self, node_id: str, label: Optional[str] = None, shape: str = "["):
+        self.id = node_id
+        self.label = label
+        self.shape = shape
+
+    def render(self) -> str:
+        _, opener, closer = SHAPES[self.shape]
+        return f"{self.id}{opener}{self.label or self.id}{closer}"
+
+
+class MermaidEdge:
+    __slots__ = ("source", "target", "label")
+
+    def __init__(self, source: str, target: str, label: str = ""):
+        self.source = source
+        self.target = target
+        self.label = label
+
+    def render(self) -> str:
+        if self.label:
+            return f"{self.source} -->|{self.label}| {self.target}"
+        return f"{self.source} --> {self.target}"
+
+
+class MermaidResult:
+    """
+    Outcome of lint_mermaid: canonical code plus validation status and the
+    list of repairs that were applied
+    """
+    __slots__ = ("code", "valid", "error", "repairs", "nodes", "edges")
+
+    def __init__(self, code: str, valid: bool, error: str, repairs: list, nodes: dict, edges: list):
+        self.code = code
+        self.valid = valid
+        self.error = error
+        self.repairs = repairs
+        self.nodes = nodes
+        self.edges = edges
+
+
+class _Diagram:
+    def __init__(self):
+        self.nodes = {}  # id -> MermaidNode, in first-seen order
+        self.ids = {}  # raw ID -> cleaned ID
+        self.edges = []
+        self.repairs = []
+        self.has_header = False
+
+    def repair(self, reason: str):
+        if reason not in self.repairs:
+            self.repairs.append(reason)
+
+    def node(self, raw_id: str, label: Optional[str] = None, shape: Optional[str] = None) -> str:
+        node_id = self.ids.get(raw_id)
+        if node_id is None:
+            node_id = self.ids[raw_id] = clean_id(raw_id)
+        if node_id != raw_id:
+            self.repair("invalid characters in node ID")
+        node = self.nodes.get(node_id)
+        if node is None:
+            node = self.nodes[node_id] = MermaidNode(node_id)
+        if label and not node.label:
+            node.label = label
+            node.shape = shape or "["
+        return node_id
+
+    def line(self, line: str):
+        if '&' in line and ';' in line:
+            decoded = ENTITY_RE.sub(lambda m: ENTITIES[m.group(1)], line)
+            if decoded != line:
+                self.repair("HTML entities decoded")
+                line = decoded
+
+        canonical = CANONICAL_LINE.fullmatch(line)
+        if canonical:
+            source, edge_label, target, node_id, opener, label, closer = canonical.groups()
+            if source is not None:
+                if is_clean_label(edge_label):
+                    self.edges.append(MermaidEdge(self.node(source), self.node(target), edge_label or ""))
+                    return
+            elif SHAPES[opener][0] == closer and is_clean_label(label):
+                self.node(node_id, label, opener)
+                return
+
+        keyword = KEYWORD_RE.match(line)
+        if keyword:
+            if keyword.group("header"):
+                if self.has_header or line.split()[1:2] != ["TD"]:
+                    self.repair("diagram header normalized to graph TD")
+                self.has_header = True
+            else:
+                self.repair("subgraph/style directives flattened")
+            return
+        self.statement_tokens(line)
+
+    def statement_tokens(self, line: str):
+        # Tokens: ("node", id, label, shape) / ("arrow", label, has_head, raw) / ("amp",) / ("broken",)
+        tokens = []
+        pos = 0
+        end = len(line)
+        spaced = False
+        while pos < end:
+            match = TOKEN_RE.match(line, pos)
+            kind = match.lastgroup
+            pos = match.end()
+            if kind == "ws":
+                spaced = True
+                continue
+            if kind == "id":
+                # "API Gateway[...]" - join words of a spaced node ID
+                if tokens and tokens[-1][0] == "node" and tokens[-1][2] is None and spaced:
+                    prev = tokens.pop()
+                    tokens.append(("node", prev[1] + "_" + match.group(), None, None))
+                    self.repair("spaces in node ID")
+                else:
+                    tokens.append(("node", match.group(), None, None))
+            elif kind == "shape":
+                opener = match.group()
+                closer = SHAPES[opener][0]
+                close_at = line.find(closer, pos)
+                if close_at < 0:
+                    label_text = line[pos:]
+                    pos = end
+                    self.repair("unclosed node bracket")
+                else:
+                    label_text = line[pos:close_at]
+                    pos = close_at + len(closer)
+                label = clean_label(label_text)
+                if label != label_text.strip():
+                    self.repair("node label cleaned")
+                if tokens and tokens[-1][0] == "node":
+                    if tokens[-1][2] is not None:
+                        self.repair("consecutive node brackets dropped")
+                    else:
+                        if spaced:
+                            self.repair("space before node shape")
+                        tokens[-1] = ("node", tokens[-1][1], label, opener)
+                elif label:
+                    # Bare "[Label]" with no ID - use the label as the ID
+                    tokens.append(("node", label, label, opener))
+                    self.repair("node without ID")
+            elif kind == "arrow":
+                arrow = match.group()
+                if arrow not in ("-->", "--->"):
+                    self.repair("arrow normalized to -->")
+                tokens.append(("arrow", "", arrow.endswith((">", "o", "x")), arrow))
+            elif kind == "label":
+                text = match.group()
+                if not (tokens and tokens[-1][0] == "arrow"):
+                    self.repair("stray pipe label dropped")
+                elif len(text) < 2 or not text.endswith('|'):
+                    # "A -->|Label B" - the label never closes, so there is no target
+                    tokens.append(("broken",))
+                    pos = end
+                else:
+                    label = clean_label(text[1:-1])
+                    if label != text[1:-1]:
+                        self.repair("arrow label cleaned")
+                    tokens[-1] = ("arrow", label, True, tokens[-1][3])
+            elif kind == "amp":
+                tokens.append(("amp",))
+            elif kind == "semi":
+                self.statement(tokens)
+                tokens = []
+            else:
+                self.repair("stray characters dropped")
+            spaced = False
+        self.statement(tokens)
+
+    def statement(self, tokens: list):
+        if not tokens:
+            return
+        # "A -- text --> B": fold the words between an open link and the arrow into its label
+        folded = []
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token[0] == "arrow" and not token[2] and not token[1]:
+                j = i + 1
+                words = []
+                while j < len(tokens) and tokens[j][0] == "node" and tokens[j][2] is None:
+                    words.append(tokens[j][1])
+                    j += 1
+                if words and j < len(tokens) and tokens[j][0] == "arrow":
+                    folded.append(("arrow", clean_label(" ".join(words)), True, tokens[j][3]))
+                    self.repair("inline arrow text moved into label")
+                    i = j + 1
+                    continue
+            folded.append(token)
+            i += 1
+
+        groups = [[]]
+        labels = []
+        for token in folded:
+            kind = token[0]
+            if kind == "node":
+                groups[-1].append(self.node(token[1], token[2], token[3]))
+            elif kind == "arrow":
+                if not groups[-1]:
+                    self.repair("arrow without source dropped")
+                    continue
+                labels.append(token[1])
+                groups.append([])
+            elif kind == "broken":
+                break
+        if len(groups) > 1 and not groups[-1]:
+            groups.pop()
+            labels.pop()
+            self.repair("dangling arrow dropped")
+        for index, label in enumerate(labels):
+            for source in groups[index]:
+                for target in groups[index + 1]:
+                    self.edges.append(MermaidEdge(source, target, label))
+
+    def result(self, raw: str) -> MermaidResult:
+        if not self.has_header and (self.nodes or self.edges):
+            self.repair("missing graph TD header added")
+        lines = ["graph TD"]
+        lines.extend("    " + node.render() for node in self.nodes.values())
+        lines.extend("    " + edge.render() for edge in self.edges)
+        code = "\n".join(lines)
+
+        error = ""
+        if len(raw.strip()) < 10:
+            error = "Code too short"
+        elif not self.nodes:
+            error = "No valid nodes found"
+        elif not self.edges:
+            error = "No valid connections found"
+        return MermaidResult(code, not error, error, self.repairs, self.nodes, self.edges)
+
+
+def lint_mermaid(code: str) -> MermaidResult:
+    """
+    Tokenize, repair and validate a Mermaid flowchart in a single pass
+    """
+    diagram = _Diagram()
+    for line in code.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('%%'):
+            diagram.line(line)
+    return diagram.result(code or "")
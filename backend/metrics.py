@@ -0,0 +1,240 @@
+import contextvars
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+# Prometheus text-format metrics without the prometheus_client dependency.
+#
+# Everything on the hot path (observe/inc) runs on the event loop thread, so
+# children are plain lists and floats updated without locks; the scrape only
+# reads them. Stats owned by other components (scheduler, cache, ...) are
+# pulled by collector callables at scrape time instead of being mirrored.
+
+# Seconds: the LLM stages take 0.1s-60s, parsing and templating well under 10ms
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            # setdefault keeps the first child if two threads race here
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+        for values, child in list(self._children.items()):
+            yield from self._render_child(values, child)
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def _render_child(self, values, child):
+        yield f"{self.name}{_label_text(self.labelnames, values)} {_number(child.value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+
+class _Buckets:
+    __slots__ = ("counts", "sum", "bounds")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = STAGE_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def _render_child(self, values, child):
+        counts = list(child.counts)
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            total += count
+            le = f'le="{_number(bound)}"'
+            yield f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {total}"
+        yield f"{self.name}_sum{_label_text(self.labelnames, values)} {_number(child.sum)}"
+        yield f"{self.name}_count{_label_text(self.labelnames, values)} {total}"
+
+
+class Registry:
+    """
+    Metrics plus collectors: callables returning [(name, type, help, [(labels dict, value), ...]), ...]
+    evaluated on every scrape
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = STAGE_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], list]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e!r}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(f"{name}{_label_text(names, tuple(labels[n] for n in names))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# --- per-request stage timings (Server-Timing) ---
+
+# [(stage, milliseconds or None, description), ...] for the current request.
+# The middleware sets a fresh list; tasks spawned by the request share it.
+_timings: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> list:
+    timings = []
+    _timings.set(timings)
+    return timings
+
+
+def record_timing(stage: str, seconds: Optional[float], description: str = ""):
+    """
+    Add one entry to the current request's Server-Timing (no-op outside a request)
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, None if seconds is None else seconds * 1000, description))
+
+
+def current_timings() -> list:
+    return list(_timings.get() or ())
+
+
+def server_timing(timings: list) -> str:
+    """
+    Server-Timing header value: prompt;dur=412.3;desc="llm", generate;dur=..., cache;desc="miss"
+    """
+    parts = []
+    for stage, ms, description in timings:
+        part = stage
+        if ms is not None:
+            part += f";dur={ms:.1f}"
+        if description:
+            part += f';desc="{_escape(description)}"'
+        parts.append(part)
+    return ", ".join(parts)
+
+
+class StageTimer:
+    """
+    Observes `stage` durations into a histogram (labels: stage) and the request's Server-Timing
+    """
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def record(self, stage: str, seconds: float, description: str = ""):
+        self.histogram.labels(stage).observe(seconds)
+        record_timing(stage, seconds, description)
+
+    def time(self, stage: str, description: str = "") -> "_Stage":
+        return _Stage(self, stage, description)
+
+
+class _Stage:
+    __slots__ = ("timer", "stage", "description", "start")
+
+    def __init__(self, timer: StageTimer, stage: str, description: str):
+        self.timer = timer
+        self.stage = stage
+        self.description = description
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.stage, time.perf_counter() - self.start, self.description)
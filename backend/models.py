@@ -0,0 +1,56 @@
+from pydantic import BaseModel
+
+# Request and Response Models
+class TechItem(BaseModel):
+    name: str
+    pros: list[str] = []
+    cons: list[str] = []
+    why: str = ""
+
+class TechStack(BaseModel):
+    frontend: list[TechItem] = []
+    backend: list[TechItem] = []
+    database: list[TechItem] = []
+    devops: list[TechItem] = []
+    additional: list[TechItem] = []
+
+class RecommendationResponse(BaseModel):
+    architecture_diagram: str
+    primary: TechStack
+    alternatives: list[TechStack] = []
+    alternative_explanations: list[dict] = []  # {stack_num, when_to_use, trade_off, why_consider}
+    alternative_diagrams: list[str] = []  # one sanitized diagram per alternative ("" if none)
+    diagram_errors: list[dict] = []  # {diagram: "primary" | stack_num, error}
+
+# JSON output mode: the shape stack_chain is asked to return (see json_output.py)
+class AlternativeOutput(BaseModel):
+    when_to_use: str = ""
+    trade_off: str = ""
+    why_consider: str = ""
+    architecture_diagram: str = ""
+    stack: TechStack
+
+class RecommendationOutput(BaseModel):
+    architecture_diagram: str = ""
+    primary: TechStack
+    alternatives: list[AlternativeOutput] = []
+
+class StackRequest(BaseModel):
+    appType: str
+    scale: str
+    focus: str
+    teamSize: str = "not specified"
+    budget: str = "not specified"
+    timeToMarket: str = "not specified"
+    securityLevel: str = "standard"
+    customConstraints: str = ""
+
+class PromptGenerationRequest(BaseModel):
+    appType: str
+    scale: str
+    focus: str
+    teamSize: str = "not specified"
+    budget: str = "not specified"
+    timeToMarket: str = "not specified"
+    securityLevel: str = "standard"
+    customConstraints: str = ""
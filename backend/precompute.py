@@ -0,0 +1,201 @@
+"""
+Offline precomputation: generate recommendations for the most common form
+combinations ahead of time and write them to the precomputed store
+(PRECOMPUTED_STORE_PATH), which recommend_stack checks before calling the LLM.
+
+Combinations come from the form's dropdown options, ranked by the response
+logs: combinations users actually submitted (with empty customConstraints)
+first, most frequent first, then the most likely unseen ones from the
+per-field value frequencies. Generation goes through the same chains as
+/api/recommend, at BATCH priority, with bounded concurrency, but is not
+written to the response logs or the archive, so a run doesn't skew the
+ranking of the next one. Every result is written to the store as soon as it
+is ready, so an interrupted run resumes where it stopped - combinations
+already in the store are skipped.
+
+Usage (from backend/):
+    python precompute.py --limit 200 --concurrency 4
+    python precompute.py --limit 50 --dry-run          # show the plan only
+"""
+import argparse
+import asyncio
+import contextlib
+import gzip
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from cache import REQUEST_FIELDS, _fold, request_key
+from prompt_templates import APP_TYPES, BUDGETS, FOCUS, SCALES, SECURITY_LEVELS, TEAM_SIZES, TIMELINES
+
+# The dropdown options, as the (folded) keys of the prompt template tables - those mirror
+# OPTIONS in frontend/components/InputForm.tsx
+FORM_OPTIONS = {
+    "appType": list(APP_TYPES),
+    "scale": list(SCALES),
+    "focus": list(FOCUS),
+    "teamSize": list(TEAM_SIZES),
+    "budget": list(BUDGETS),
+    "timeToMarket": list(TIMELINES),
+    "securityLevel": list(SECURITY_LEVELS),
+}
+
+LOG_NAME = "stack_recommendation_responses"
+
+
+def logged_inputs(log_dir: Path):
+    """
+    Inputs of every logged stack recommendation, including rotated .jsonl.gz segments
+    """
+    files = sorted(log_dir.glob(f"{LOG_NAME}.*.jsonl.gz")) + [log_dir / f"{LOG_NAME}.jsonl"]
+    for path in files:
+        if not path.exists():
+            continue
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    inputs = json.loads(line).get("inputs")
+                except ValueError:
+                    continue
+                if isinstance(inputs, dict):
+                    yield inputs
+
+
+def plan(log_dir: Path, limit: int, per_field: int) -> list:
+    """
+    Up to `limit` request bodies (customConstraints empty), most likely first
+    """
+    observed = Counter()
+    examples = {}
+    # Counted by folded value (as request_key compares them); `spelling` keeps the form users
+    # sent, options nobody picked yet keep the folded one
+    values = {field: Counter() for field in REQUEST_FIELDS}
+    spelling = {}
+    for inputs in logged_inputs(log_dir):
+        for field in REQUEST_FIELDS:
+            if inputs.get(field):
+                folded = _fold(inputs[field])
+                values[field][folded] += 1
+                spelling.setdefault(folded, inputs[field])
+        if (inputs.get("customConstraints") or "").strip():
+            continue
+        body = {field: inputs.get(field) or "" for field in REQUEST_FIELDS}
+        key = request_key(body)
+        observed[key] += 1
+        examples.setdefault(key, body)
+
+    combos = [{**examples[key], "customConstraints": ""} for key, _ in observed.most_common()]
+
+    # Unseen combinations: product of the top values per field, scored by
+    # their (add-one smoothed) frequencies; form order breaks ties
+    ranked = {}
+    for field in REQUEST_FIELDS:
+        options = list(dict.fromkeys(FORM_OPTIONS[field] + list(values[field])))
+        total = sum(values[field].values()) + len(options)
+        weights = {option: (values[field][option] + 1) / total for option in options}
+        ranked[field] = sorted(options, key=lambda option: -weights[option])[:per_field]
+        ranked[field] = [(option, weights[option]) for option in ranked[field]]
+    scored = []
+    for choice in itertools.product(*(ranked[field] for field in REQUEST_FIELDS)):
+        score = 1.0
+        for _, weight in choice:
+            score *= weight
+        scored.append((score, {field: spelling.get(option, option)
+                               for field, (option, _) in zip(REQUEST_FIELDS, choice)}))
+    scored.sort(key=lambda item: -item[0])
+
+    seen = set(observed)
+    for _, body in scored:
+        if len(combos) >= limit:
+            break
+        key = request_key(body)
+        if key not in seen:
+            seen.add(key)
+            combos.append({**body, "customConstraints": ""})
+    return combos[:limit]
+
+
+def progress(message: str):
+    # stdout is silenced while the job runs (the app logs every request)
+    print(message, file=sys.stderr, flush=True)
+
+
+async def run(main, combos: list, concurrency: int, prompt_mode: str = None) -> dict:
+    from llm_scheduler import BATCH, SchedulerOverloaded
+    from models import StackRequest
+
+    store = main.precomputed_store
+    done = store.keys()
+    todo = [body for body in combos if request_key(body) not in done]
+    counts = Counter(skipped=len(combos) - len(todo))
+    progress(f"{len(combos)} combinations, {counts['skipped']} already in {store.path}, generating {len(todo)}")
+
+    slots = asyncio.Semaphore(max(1, concurrency))
+    start = time.perf_counter()
+
+    async def generate(index: int, body: dict):
+        key = request_key(body)
+        async with slots:
+            while True:
+                try:
+                    # record=False: precomputed generations must not count as user traffic in the logs plan() reads
+                    parsed = await main.generate_recommendation(StackRequest(**body), key, fanout=False,
+                                                                prompt_mode=prompt_mode, priority=BATCH,
+                                                                record=False)
+                    break
+                except SchedulerOverloaded as e:
+                    await asyncio.sleep(e.retry_after)
+                except Exception as e:
+                    counts["failed"] += 1
+                    progress(f"[{index}/{len(todo)}] failed: {e}")
+                    return
+        if parsed.primary.frontend or parsed.primary.backend:
+            store.put(key, body, parsed.dict())
+            counts["generated"] += 1
+            progress(f"[{index}/{len(todo)}] {body['appType']} / {body['scale']} / {body['focus']} "
+                     f"({time.perf_counter() - start:.0f}s)")
+        else:
+            counts["failed"] += 1
+            progress(f"[{index}/{len(todo)}] no stack in the response, not stored")
+
+    await asyncio.gather(*(generate(i, body) for i, body in enumerate(todo, 1)))
+    return dict(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=200, help="Number of combinations to precompute")
+    parser.add_argument("--per-field", type=int, default=3,
+                        help="Most frequent values per field combined for unseen combinations")
+    parser.add_argument("--concurrency", type=int, default=4, help="Generations in flight at once")
+    parser.add_argument("--logs", type=Path, default=Path(os.getenv("LOG_DIR", "logs")),
+                        help="Directory with the response logs (default: $LOG_DIR or logs)")
+    parser.add_argument("--prompt-mode", choices=("llm", "template", "auto"), help="Default: PROMPT_MODE")
+    parser.add_argument("--dry-run", action="store_true", help="Print the combinations and exit")
+    args = parser.parse_args()
+
+    combos = plan(args.logs, args.limit, args.per_field)
+    if args.dry_run:
+        for body in combos:
+            print(json.dumps(body))
+        return
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import main as app_main
+        try:
+            counts = asyncio.run(run(app_main, combos, args.concurrency, args.prompt_mode))
+        finally:
+            app_main.response_log.close()
+            if app_main.response_archive is not None:
+                app_main.response_archive.close()
+    print(f"Done: {counts.get('generated', 0)} generated, {counts.get('skipped', 0)} skipped, "
+          f"{counts.get('failed', 0)} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import threading
+from collections import deque
+from functools import lru_cache
+
+# Deterministic replacement for prompt_engineer_chain: builds the contextual
+# prompt for stack_chain from the InputForm dropdown values, no LLM call.
+# Keys are the folded dropdown options from frontend/components/InputForm.tsx;
+# unknown values fall back to a generic sentence that quotes them.
+
+PROMPT_MODES = ("llm", "template", "auto")
+
+APP_TYPES = {
+    "e-commerce": "an e-commerce store: product catalog, cart and checkout, payments, inventory and order management, with traffic spikes around sales",
+    "saas": "a multi-tenant SaaS product: account and subscription management, tenant isolation, billing, and a dashboard-style web app",
+    "mobile app": "a mobile app backed by an API: authentication, push notifications, offline-tolerant sync and app-store release cycles",
+    "social network": "a social network: user profiles, follow graphs, feeds, media uploads, notifications and heavy read traffic",
+    "dating": "a dating app: profiles with photos, matching, real-time chat, location-based discovery and strict privacy expectations",
+    "marketplace": "a two-sided marketplace: listings, search, buyer/seller accounts, payments with payouts, reviews and dispute handling",
+    "content platform": "a content platform: authoring and publishing, media storage and delivery, search and SEO-friendly pages",
+    "analytics": "an analytics product: event ingestion, aggregation pipelines, time-series queries and interactive dashboards",
+    "gaming": "a gaming backend: player accounts, matchmaking, leaderboards, low-latency real-time state and in-game purchases",
+    "healthcare": "a healthcare application: patient records, appointments, clinician workflows and protected health information",
+    "finance": "a finance application: ledgers, transactions that must never be lost or double-applied, reporting and audit trails",
+    "education": "an education platform: courses and lessons, video content, progress tracking, quizzes and instructor tools",
+    "real estate": "a real estate platform: property listings with rich media, map and geo search, inquiries and agent tools",
+    "booking system": "a booking system: availability calendars, reservations without double-booking, payments, reminders and cancellations",
+    "streaming": "a streaming service: video/audio ingest and transcoding, CDN delivery, playback sessions and subscriptions",
+}
+
+SCALES = {
+    "mvp (1k-10k users)": "This is an MVP for roughly 1K-10K users, so simplicity and speed of iteration matter far more than horizontal scaling; avoid infrastructure that only pays off at large scale.",
+    "growth (10k-100k users)": "The product is in a growth phase (10K-100K users): the stack must scale without a rewrite, with caching, background jobs and a database that handles growing write volume.",
+    "scale (100k-1m users)": "The product must serve 100K-1M users: plan for horizontal scaling, read replicas or sharding, caching layers, queues and solid observability.",
+    "enterprise (1m+ users)": "This is enterprise scale (1M+ users): high throughput, multi-region options, strict SLAs, and operational tooling are hard requirements.",
+    "high availability": "High availability is the hard constraint: no single points of failure, automated failover, zero-downtime deploys and tested disaster recovery.",
+    "global scale": "Users are global: latency across regions, edge delivery, data residency and multi-region replication drive the architecture.",
+}
+
+FOCUS = {
+    "cost optimization": "keeping infrastructure and licensing costs as low as possible (free tiers, open source, managed services that scale to zero)",
+    "performance": "raw performance - low latency and high throughput on the hot paths",
+    "security": "security - a minimal attack surface, strong authentication and authorization, and secure defaults",
+    "scalability": "scalability - components that scale horizontally without re-architecture",
+    "time to market": "time to market - batteries-included frameworks and managed services over custom infrastructure",
+    "developer experience": "developer experience - productive tooling, good docs, fast feedback loops and a gentle learning curve",
+    "maintenance": "low maintenance - few moving parts, managed services and boring, well-supported technology",
+    "reliability": "reliability - predictable behavior under failure, retries, backups and mature technology",
+    "data privacy": "data privacy - data minimization, encryption at rest and in transit, and control over where data lives",
+    "user experience": "user experience - fast page loads, responsive UI and real-time feedback",
+}
+
+TEAM_SIZES = {
+    "solo (1 person)": "a solo developer, so every component must be something one person can build, deploy and operate",
+    "small (2-5)": "a small team of 2-5, so favor one primary language across the stack and managed infrastructure",
+    "medium (5-10)": "a medium team of 5-10 that can own a few services but should not run a platform team",
+    "large (10-20)": "a large team of 10-20 that can split into frontend, backend and infrastructure ownership",
+    "enterprise (20+)": "an enterprise team of 20+ where service boundaries, governance and onboarding matter",
+}
+
+BUDGETS = {
+    "minimal (<$1k)": "a minimal budget under $1K, so free tiers and open-source self-hosting are preferred over paid services",
+    "small ($1k-$5k)": "a small budget of $1K-$5K, which allows a few managed services but rules out expensive enterprise tooling",
+    "medium ($5k-$20k)": "a medium budget of $5K-$20K, enough for managed databases, hosting and monitoring",
+    "large ($20k-$100k)": "a large budget of $20K-$100K, so paying for managed services to save engineering time is usually worth it",
+    "enterprise ($100k+)": "an enterprise budget of $100K+, where support contracts, SLAs and compliance tooling are affordable",
+}
+
+TIMELINES = {
+    "asap (1-2 weeks)": "It needs to ship in 1-2 weeks: only choose technologies the team can be productive with immediately.",
+    "quick (1-2 months)": "It needs to ship in 1-2 months, so prefer mature frameworks with strong conventions.",
+    "moderate (3-6 months)": "The timeline is 3-6 months, leaving room for some custom infrastructure where it clearly pays off.",
+    "standard (6-12 months)": "The timeline is 6-12 months, so long-term maintainability outweighs initial setup speed.",
+    "long-term (12+ months)": "This is a long-term build (12+ months): optimize for a stack that will still be healthy in five years.",
+}
+
+SECURITY_LEVELS = {
+    "standard": "Standard security practices apply (HTTPS, hashed passwords, least-privilege access).",
+    "soc 2": "SOC 2 compliance is required: audit logging, access controls, change management and vendors with SOC 2 reports.",
+    "gdpr": "GDPR applies: EU data residency options, consent management, data export/deletion and data processing agreements.",
+    "hipaa": "HIPAA applies: every service touching PHI needs a BAA, encryption at rest and in transit, and access audit trails.",
+    "pci-dss": "PCI-DSS applies: keep card data out of scope with a tokenizing payment provider and segment anything that touches payments.",
+    "nist": "NIST controls apply: documented security controls, hardened configurations and continuous monitoring.",
+    "iso 27001": "ISO 27001 applies: an auditable information security management process and vendors that support it.",
+}
+
+PROMPT_TEMPLATE = (
+    "Recommend a production-ready tech stack for {app}.\n\n"
+    "{scale} The team is {team}. The project has {budget}. {timeline} {security}\n\n"
+    "The primary decision driver is {focus}. Every technology choice must be justified against these "
+    "specific constraints - the team size, budget, scale and timeline above - not with generic pros and cons. "
+    "Call out the trade-offs that matter for THIS project, and explain in each pros/cons/why how the choice "
+    "affects this team's ability to ship and operate it."
+)
+
+# Free-text inputs that carry no information for the prompt engineer
+TRIVIAL_CONSTRAINTS = {"", "none", "no", "n/a", "na", "nil", "nothing", "no constraints", "no preference", "no preferences", "-", "."}
+
+
+def _fold(value) -> str:
+    return " ".join(str(value or "").split()).lower()
+
+
+def _application(name: str) -> str:
+    """
+    Fallback for app types without a description: "ai consumer app" -> "an ai consumer application"
+    """
+    words = name.split()
+    while words and words[-1] in ("app", "apps", "application", "applications"):
+        words.pop()
+    if not words or name == "not specified":
+        return "an application"
+    name = " ".join(words)
+    return f"{'an' if name[0] in 'aeiou' else 'a'} {name} application"
+
+
+def _lookup(table: dict, value: str, fallback) -> str:
+    """
+    Look up a (possibly ", "-joined multi-select) dropdown value. `fallback` is a
+    format string or a function for values not in `table`
+    """
+    fallback = fallback if callable(fallback) else fallback.format
+    folded = _fold(value)
+    if folded in table:
+        return table[folded]
+    parts = [table.get(part.strip()) or fallback(part.strip()) for part in folded.split(",") if part.strip()]
+    if not parts or folded in ("not specified", ""):
+        return fallback("not specified")
+    return parts[0] if len(parts) == 1 else "; ".join(parts[:-1]) + " and " + parts[-1]
+
+
+def has_custom_constraints(custom_constraints: str) -> bool:
+    """
+    True when customConstraints has real content worth a prompt-engineering LLM call
+    """
+    return _fold(custom_constraints).strip(" .!") not in TRIVIAL_CONSTRAINTS
+
+
+@lru_cache(maxsize=4096)
+def _render(app_type: str, scale: str, focus: str, team_size: str, budget: str,
+            time_to_market: str, security_level: str) -> str:
+    return PROMPT_TEMPLATE.format(
+        app=_lookup(APP_TYPES, app_type, _application),
+        scale=_lookup(SCALES, scale, "The expected scale is {}; size the architecture accordingly."),
+        focus=_lookup(FOCUS, focus, "{}"),
+        team=_lookup(TEAM_SIZES, team_size, "{} in size"),
+        budget=_lookup(BUDGETS, budget, "a budget that is {}"),
+        timeline=_lookup(TIMELINES, time_to_market, "The timeline is {}."),
+        security=_lookup(SECURITY_LEVELS, security_level, "Security requirements: {}."),
+    )
+
+
+def template_prompt(req) -> str:
+    """
+    Build the contextual prompt for a StackRequest/PromptGenerationRequest locally
+    """
+    prompt = _render(_fold(req.appType), _fold(req.scale), _fold(req.focus), _fold(req.teamSize),
+                     _fold(req.budget), _fold(req.timeToMarket), _fold(req.securityLevel))
+    constraints = " ".join(str(req.customConstraints or "").split())
+    if has_custom_constraints(constraints):
+        prompt += f"\n\nAdditional constraints from the user: {constraints}"
+    return prompt
+
+
+def resolve_prompt_mode(mode: str, custom_constraints: str) -> str:
+    """
+    "auto" -> "llm" when customConstraints is non-trivial, else "template"
+    """
+    if mode == "auto":
+        return "llm" if has_custom_constraints(custom_constraints) else "template"
+    return mode
+
+
+class PromptModeStats:
+    """
+    Per-mode latency of custom prompt construction (last `window` samples per mode)
+    """
+
+    def __init__(self, window: int = 1000):
+        self._samples = {mode: deque(maxlen=window) for mode in ("llm", "template")}
+        self._counts = {mode: 0 for mode in self._samples}
+        self._lock = threading.Lock()
+
+    def record(self, mode: str, seconds: float):
+        with self._lock:
+            self._samples[mode].append(seconds * 1000)
+            self._counts[mode] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for mode, samples in self._samples.items():
+                ordered = sorted(samples)
+                result[mode] = {
+                    "count": self._counts[mode],
+                    "avg_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                    "p50_ms": round(ordered[len(ordered) // 2], 3) if ordered else 0.0,
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3) if ordered else 0.0,
+                    "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+                }
+            return result
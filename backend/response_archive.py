@@ -0,0 +1,451 @@
+"""
+Append-only archive of complete recommendations: the request, the custom
+prompt, the full raw LLM output and the parsed result, one record per
+generated recommendation (response_preview in the response logs keeps only
+the first 500 characters; last_llm_response.txt only the latest reply).
+
+Records live in one SQLite file (RESPONSE_ARCHIVE_PATH). New records go to a
+small uncompressed `pending` table; every `block_records` of them (or fewer,
+once they reach `block_bytes`) are sealed into one compressed block (JSON
+lines, zlib or lzma), so responses that share most of their text compress
+together while a lookup still only inflates a block of that size. The `records` index maps a 64-bit hash
+of the cache key and the creation time to (block, slot): a point lookup or a
+time range decompresses only the blocks holding matching records, a few at a
+time, so memory stays bounded however many records there are. Nothing is
+updated or deleted once sealed.
+
+Request handlers only enqueue (`append`); a writer thread inserts and seals,
+so the request path never waits on SQLite. Several worker processes can share
+the file (WAL; sealing runs in a BEGIN IMMEDIATE transaction).
+
+Feeds: FAKE_LLM_RESPONSES / load_test.py --responses accept the archive file
+(see fake_llm.load_responses), RESPONSE_ARCHIVE_WARM_CACHE refills the
+recommendation cache at startup, and `export` writes raw responses as *.txt.
+
+Usage (from backend/):
+    python response_archive.py stats
+    python response_archive.py get <cache key | request JSON>
+    python response_archive.py scan --since 2026-01-01 --until 2026-02-01 > january.jsonl
+    python response_archive.py export replay/ --limit 500   # *.txt for FAKE_LLM_RESPONSES
+"""
+import argparse
+import hashlib
+import json
+import lzma
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from pydantic import BaseModel
+
+import fast_json
+
+# codec -> (compress(data, level), decompress(data))
+CODECS = {
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+BATCH_RECORDS = 256  # records inserted per transaction by the writer thread
+PAGE_ROWS = 1000  # index rows fetched per query while scanning
+CACHED_BLOCKS = 8  # decompressed blocks kept for scans (one per interleaving worker)
+
+_STOP = object()
+
+
+def key_hash(key: str) -> int:
+    """
+    64-bit index key for a cache key - records are checked against the full key on read
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def _plain(value):
+    # Parsed results may still be pydantic models when they are enqueued
+    return value.model_dump() if isinstance(value, BaseModel) else value
+
+
+class ResponseArchive:
+    """
+    Append-only, block-compressed archive in the SQLite file at `path`.
+    The file is created by the first write; readers find it once it exists.
+    """
+
+    def __init__(self, path: str, block_records: int = 64, block_bytes: int = 128 * 1024, codec: str = "zlib",
+                 level: int = 6, max_queue: int = 1000, flush_interval: float = 1.0):
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {', '.join(CODECS)}, got {codec!r}")
+        self.path = Path(path)
+        self.block_records = max(1, int(block_records))
+        self.block_bytes = max(1, int(block_bytes))
+        self.codec = codec
+        self.level = int(level)
+        self.flush_interval = float(flush_interval)
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._db = None  # reader connection, opened lazily
+        self._db_lock = threading.Lock()
+        self._blocks: "OrderedDict[int, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.sealed_blocks = 0
+        self.dropped = 0
+        self.errors = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="response-archive", daemon=True)
+        self._thread.start()
+
+    # --- producer side (called from request handlers) ---
+
+    def append(self, record: dict) -> bool:
+        """
+        Queue `record` (needs "key"; "created_at" defaults to now). Never blocks:
+        returns False and counts a drop when the queue is full.
+        """
+        if self._closed:
+            return False
+        record.setdefault("created_at", time.time())
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self, timeout: float = 5.0):
+        """
+        Block until everything queued so far is in the file
+        """
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --- reads ---
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        The newest record for `key`, None if there is none
+        """
+        records = self.history(key, 1)
+        return records[0] if records else None
+
+    def history(self, key: str, limit: int = 10) -> list:
+        """
+        Up to `limit` records for `key`, newest first
+        """
+        hashed = key_hash(key)
+        rows = self._query(
+            "SELECT created_at, block, slot, key_hash FROM records WHERE key_hash = ? "
+            "UNION ALL SELECT created_at, -id, 0, key_hash FROM pending WHERE key_hash = ? "
+            "ORDER BY created_at DESC LIMIT ?", (hashed, hashed, limit * 2))
+        # Another key with the same 64-bit hash is possible, if unlikely
+        records = [record for record in map(self._load, rows) if record is not None and record.get("key") == key]
+        return records[:limit]
+
+    def scan(self, since: float = 0.0, until: float = float("inf"), reverse: bool = False) -> Iterator[dict]:
+        """
+        Records created in [since, until), oldest first (newest first with `reverse`).
+        Reads the index a page at a time and keeps only a few blocks decompressed.
+        """
+        order, compare = ("DESC", "<") if reverse else ("ASC", ">")
+        position = None
+        while True:
+            after = f"AND (created_at, block, slot) {compare} (?, ?, ?)" if position else ""
+            rows = self._query(
+                f"SELECT created_at, block, slot, key_hash FROM ("
+                f"SELECT created_at, block, slot, key_hash FROM records WHERE created_at >= ? AND created_at < ? "
+                f"UNION ALL SELECT created_at, -id, 0, key_hash FROM pending WHERE created_at >= ? AND created_at < ?"
+                f") WHERE 1 {after} ORDER BY created_at {order}, block {order}, slot {order} LIMIT {PAGE_ROWS}",
+                (since, until, since, until) + (position or ()))
+            for row in rows:
+                record = self._load(row)
+                if record is not None:
+                    yield record
+            if len(rows) < PAGE_ROWS:
+                return
+            position = tuple(rows[-1][:3])
+
+    def latest(self, limit: int) -> Iterator[dict]:
+        """
+        The newest record of each of the `limit` most recently archived keys
+        """
+        seen = set()
+        if limit <= 0:
+            return
+        for record in self.scan(reverse=True):
+            if record.get("key") not in seen:
+                seen.add(record.get("key"))
+                yield record
+                if len(seen) >= limit:
+                    return
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = {
+                "queued": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "sealed_blocks": self.sealed_blocks,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+        blocks = self._query("SELECT COUNT(*), COALESCE(SUM(records), 0), COALESCE(SUM(raw_bytes), 0), "
+                             "COALESCE(SUM(stored_bytes), 0) FROM blocks", ())
+        pending = self._query("SELECT COUNT(*), COALESCE(SUM(length(data)), 0) FROM pending", ())
+        blocks, sealed, raw, stored = blocks[0] if blocks else (0, 0, 0, 0)
+        pending, pending_bytes = pending[0] if pending else (0, 0)
+        return {
+            "path": str(self.path),
+            "available": self.path.exists(),
+            "codec": self.codec,
+            "block_records": self.block_records,
+            "block_bytes": self.block_bytes,
+            "records": sealed + pending,
+            "blocks": blocks,
+            "pending": pending,
+            "raw_bytes": raw + pending_bytes,
+            "stored_bytes": stored + pending_bytes,
+            "compression_ratio": round(raw / stored, 2) if stored else None,
+            **counters,
+        }
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.path.exists():
+            self._db = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+            self._create_tables(self._db)
+        return self._db
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._db_lock:
+            try:
+                db = self._connect()
+                return db.execute(sql, params).fetchall() if db else []
+            except sqlite3.Error as e:
+                print(f"Response archive read error: {e}")
+                return []
+
+    def _load(self, row: tuple) -> Optional[dict]:
+        created_at, block, slot, hashed = row
+        if block < 0:
+            data = self._query("SELECT data FROM pending WHERE id = ?", (-block,))
+            line = data[0][0] if data else None
+            if line is None:
+                # Sealed into a block since the index was read
+                data = self._query("SELECT created_at, block, slot, key_hash FROM records "
+                                   "WHERE key_hash = ? AND created_at = ?", (hashed, created_at))
+                return self._load(data[0]) if data else None
+        else:
+            lines = self._block(block)
+            line = lines[slot] if lines is not None and slot < len(lines) else None
+        return fast_json.loads(line) if line is not None else None
+
+    def _block(self, block: int) -> Optional[list]:
+        with self._db_lock:
+            lines = self._blocks.get(block)
+            if lines is not None:
+                self._blocks.move_to_end(block)
+                return lines
+        rows = self._query("SELECT codec, data FROM blocks WHERE id = ?", (block,))
+        if not rows:
+            return None
+        codec, data = rows[0]
+        lines = CODECS[codec][1](data).split(b"\n")
+        with self._db_lock:
+            self._blocks[block] = lines
+            while len(self._blocks) > CACHED_BLOCKS:
+                self._blocks.popitem(last=False)
+        return lines
+
+    @staticmethod
+    def _create_tables(db: sqlite3.Connection):
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS blocks ("
+                   "id INTEGER PRIMARY KEY, codec TEXT NOT NULL, records INTEGER NOT NULL, "
+                   "first_at REAL NOT NULL, last_at REAL NOT NULL, raw_bytes INTEGER NOT NULL, "
+                   "stored_bytes INTEGER NOT NULL, data BLOB NOT NULL)")
+        db.execute("CREATE TABLE IF NOT EXISTS records ("
+                   "key_hash INTEGER NOT NULL, created_at REAL NOT NULL, block INTEGER NOT NULL, slot INTEGER NOT NULL, "
+                   "PRIMARY KEY (key_hash, created_at, block, slot)) WITHOUT ROWID")
+        db.execute("CREATE INDEX IF NOT EXISTS records_time ON records (created_at)")
+        db.execute("CREATE TABLE IF NOT EXISTS pending ("
+                   "id INTEGER PRIMARY KEY, key_hash INTEGER NOT NULL, created_at REAL NOT NULL, data BLOB NOT NULL)")
+        db.commit()
+
+    # --- writer thread ---
+
+    def _run(self):
+        db = None
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while len(batch) < BATCH_RECORDS:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [item for item in batch if isinstance(item, dict)]
+            if records:
+                try:
+                    if db is None:
+                        self.path.parent.mkdir(parents=True, exist_ok=True)
+                        # Autocommit mode: _write runs its own transaction
+                        db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+                        self._create_tables(db)
+                    self._write(db, records)
+                except (sqlite3.Error, OSError) as e:
+                    with self._lock:
+                        self.errors += 1
+                    print(f"Response archive error: {e}")
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is _STOP for item in batch):
+                if db is not None:
+                    db.close()
+                return
+
+    def _write(self, db: sqlite3.Connection, records: list):
+        """
+        Seal the pending records plus `records` into as many full blocks as they
+        make (see _blocks_of) and leave the rest pending, in one transaction -
+        a batch never passes through the pending table, which stays under a block.
+        """
+        rows = []
+        for record in records:
+            try:
+                data = fast_json.dumps({name: _plain(value) for name, value in record.items()})
+                rows.append((None, key_hash(record["key"]), float(record["created_at"]), data))
+            except (KeyError, TypeError, ValueError) as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"Response archive error: {e}")
+        compress = CODECS[self.codec][0]
+        sealed = 0
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Other workers' records too: they're in the same file
+            pending = db.execute("SELECT id, key_hash, created_at, data FROM pending ORDER BY id").fetchall()
+            rows = pending + rows
+            blocks, rest = self._blocks_of(rows)
+            for block_rows in blocks:
+                raw = b"\n".join(row[3] for row in block_rows)
+                data = compress(raw, self.level)
+                times = [row[2] for row in block_rows]
+                block = db.execute(
+                    "INSERT INTO blocks (codec, records, first_at, last_at, raw_bytes, stored_bytes, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.codec, len(block_rows), min(times), max(times), len(raw), len(data), data)).lastrowid
+                db.executemany("INSERT OR IGNORE INTO records (key_hash, created_at, block, slot) VALUES (?, ?, ?, ?)",
+                               ((row[1], row[2], block, slot) for slot, row in enumerate(block_rows)))
+                sealed += 1
+            sealed_ids = [row[0] for block_rows in blocks for row in block_rows if row[0] is not None]
+            if sealed_ids:
+                db.execute("DELETE FROM pending WHERE id <= ?", (sealed_ids[-1],))
+            db.executemany("INSERT INTO pending (key_hash, created_at, data) VALUES (?, ?, ?)",
+                           (row[1:] for row in rest if row[0] is None))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.written += len(rows) - len(pending)
+            self.sealed_blocks += sealed
+
+    def _blocks_of(self, rows: list) -> tuple:
+        """
+        Split `rows` into full blocks (block_records rows, or fewer reaching
+        block_bytes) and the rest, which doesn't fill one yet
+        """
+        blocks = []
+        start = size = 0
+        for end, row in enumerate(rows, 1):
+            size += len(row[3])
+            if end - start >= self.block_records or size >= self.block_bytes:
+                blocks.append(rows[start:end])
+                start, size = end, 0
+        return blocks, rows[start:]
+
+
+# --- CLI ---
+
+def parse_time(value: Optional[str], default: float) -> float:
+    return datetime.fromisoformat(value).timestamp() if value else default
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("stats", "get", "scan", "export"))
+    parser.add_argument("arg", nargs="?", help="get: cache key or request JSON; export: output directory")
+    parser.add_argument("--archive", default="logs/response_archive.db")
+    parser.add_argument("--since", help="ISO date/time (scan, export)")
+    parser.add_argument("--until", help="ISO date/time (scan, export)")
+    parser.add_argument("--limit", type=int, help="At most this many records (scan, export)")
+    args = parser.parse_args()
+
+    if not Path(args.archive).exists():
+        sys.exit(f"No archive at {args.archive}")
+    archive = ResponseArchive(args.archive)
+    try:
+        if args.command == "stats":
+            print(json.dumps(archive.stats(), indent=2))
+        elif args.command == "get":
+            if not args.arg:
+                sys.exit("get needs a cache key or a request JSON")
+            key = args.arg
+            if key.lstrip().startswith("{"):
+                from cache import request_key
+                key = request_key(json.loads(key))
+            record = archive.get(key)
+            if record is None:
+                sys.exit(f"No record for {key}")
+            print(json.dumps(record, indent=2, ensure_ascii=False))
+        else:
+            records = archive.scan(parse_time(args.since, 0.0), parse_time(args.until, float("inf")))
+            if args.command == "export":
+                output = Path(args.arg or "archived_responses")
+                output.mkdir(parents=True, exist_ok=True)
+            count = 0
+            for record in records:
+                if args.limit is not None and count >= args.limit:
+                    break
+                if args.command == "scan":
+                    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+                else:
+                    name = f"{datetime.fromtimestamp(record['created_at']):%Y%m%d-%H%M%S-%f}-{record['key'][-12:]}.txt"
+                    (output / name).write_text(record.get("response", ""), encoding="utf-8")
+                count += 1
+            if args.command == "export":
+                print(f"Exported {count} responses to {output}")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
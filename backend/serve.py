@@ -0,0 +1,58 @@
+"""
+Production entry point: uvicorn with several worker processes (default: one per CPU).
+
+Each worker is a full copy of the app with its own event loop, so the
+CPU-bound part of a request (prompt templating, parsing, Mermaid linting,
+JSON encoding) runs on as many cores as there are workers. With more than
+one worker, main.py shares what has to be shared:
+  - the recommendation cache, through logs/recommendation_cache.db (RECOMMEND_CACHE_PATH)
+  - /metrics, summed over workers through logs/metrics.db (SHARED_METRICS_PATH)
+  - LLM_MAX_CONCURRENCY and the LLM_*_PER_MINUTE budgets, split evenly between workers
+and all workers append to the same log files safely (see log_writer.py and access_log.py).
+
+Usage (from backend/):
+    python serve.py                              # WEB_CONCURRENCY workers, default: CPU count
+    python serve.py --workers 4 --host 0.0.0.0 --port 8000
+
+gunicorn works too (it reads WEB_CONCURRENCY as well):
+    WEB_CONCURRENCY=4 gunicorn main:app -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000
+"""
+import argparse
+import os
+from pathlib import Path
+
+import uvicorn
+
+APP_DIR = Path(__file__).resolve().parent
+
+
+def default_workers() -> int:
+    """
+    CPUs this process may run on (respects taskset/cpuset; pass --workers under a CPU quota)
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY") or default_workers()))
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    # Workers are spawned fresh and read it at import (main.WORKERS)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    if workers > 1:
+        # Counters start from zero with the server, as they do with a single process
+        metrics_db = Path(os.getenv("SHARED_METRICS_PATH") or Path(os.getenv("LOG_DIR", "logs")) / "metrics.db")
+        for path in (metrics_db, Path(f"{metrics_db}-wal"), Path(f"{metrics_db}-shm")):
+            path.unlink(missing_ok=True)
+    print(f"Starting {workers} worker{'s' if workers > 1 else ''} on {args.host}:{args.port}")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=workers, app_dir=str(APP_DIR))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+# /metrics across worker processes (WEB_CONCURRENCY > 1).
+#
+# Every worker keeps its own Registry; a scrape reaches whichever worker the
+# kernel hands the connection to. So each worker publishes its rendered
+# metrics to a shared SQLite file every `interval` seconds (and whenever it
+# serves a scrape), and the scrape merges the latest snapshot per worker:
+#   - counters and histograms are summed over every worker that published,
+#     including ones that have exited (their counts happened), as with
+#     prometheus_client's multiprocess mode
+#   - gauges are summed over workers that published in the last 3 intervals
+
+
+def merge_snapshots(snapshots: list, live: set) -> str:
+    """
+    Sum Prometheus text snapshots [(worker, text), ...]; gauges only from workers in `live`
+    """
+    families = {}  # name -> [help line, type, {series: value}]
+    for worker, text in snapshots:
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# HELP "):
+                name = line.split(" ", 3)[2]
+                family = families.setdefault(name, [line, "untyped", {}])
+            elif line.startswith("# TYPE "):
+                family[1] = line.rsplit(" ", 1)[1]
+            elif line and family is not None:
+                if family[1] == "gauge" and worker not in live:
+                    continue
+                series, _, value = line.rpartition(" ")
+                try:
+                    number = int(value)
+                except ValueError:
+                    number = float(value)
+                family[2][series] = family[2].get(series, 0) + number
+    lines = []
+    for name, (help_line, kind, samples) in families.items():
+        lines.append(help_line)
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{series} {'+Inf' if value == float('inf') else repr(value)}" for series, value in samples.items())
+    return "\n".join(lines) + "\n"
+
+
+class SharedMetrics:
+    """
+    Publishes `render()` (this worker's Registry.render) to a SQLite file and
+    merges every worker's latest snapshot on scrape (see module comment)
+    """
+
+    def __init__(self, path: str, render: Callable[[], str], interval: float = 5.0):
+        self.path = Path(path)
+        self.render_local = render
+        self.interval = max(0.5, float(interval))
+        self.worker = str(os.getpid())
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots (worker TEXT PRIMARY KEY, updated_at REAL NOT NULL, text TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def start(self):
+        self.publish()
+        self._thread = threading.Thread(target=self._run, name="shared-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval)
+        self.publish()
+
+    def publish(self):
+        text = self.render_local()
+        with self._lock:
+            try:
+                self._db.execute("INSERT OR REPLACE INTO snapshots (worker, updated_at, text) VALUES (?, ?, ?)",
+                                 (self.worker, time.time(), text))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Shared metrics write error: {e}")
+
+    def render(self) -> str:
+        """
+        Metrics of all workers, with this worker's current values
+        """
+        self.publish()
+        with self._lock:
+            try:
+                rows = self._db.execute("SELECT worker, updated_at, text FROM snapshots").fetchall()
+            except sqlite3.Error as e:
+                print(f"Shared metrics read error: {e}")
+                return self.render_local()
+        cutoff = time.time() - 3 * self.interval
+        live = {worker for worker, updated_at, _ in rows if updated_at >= cutoff}
+        return merge_snapshots([(worker, text) for worker, _, text in rows], live)
+
+    def workers(self) -> int:
+        with self._lock:
+            cutoff = time.time() - 3 * self.interval
+            return self._db.execute("SELECT COUNT(*) FROM snapshots WHERE updated_at >= ?", (cutoff,)).fetchone()[0]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.publish()
@@ -0,0 +1,285 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# numpy is optional: without it, search falls back to sparse dot products in pure
+# Python. It is imported by the first index insert, not with this module - it is
+# a tenth of `import main`
+np = None
+_numpy_checked = False
+
+
+def numpy_module():
+    """
+    numpy, imported on first call; None when it isn't installed
+    """
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return np
+
+from prompt_templates import APP_TYPES, BUDGETS, FOCUS, SCALES, SECURITY_LEVELS, TEAM_SIZES, TIMELINES
+
+# Nearest-neighbour lookup over past StackRequests, for requests that miss the
+# exact-match cache only because customConstraints is worded differently or a
+# budget/scale bucket is one step away.
+#
+# A request is encoded as one block per field, each L2-normalized and scaled
+# by sqrt(weight), so the cosine of two encodings is the weighted average of
+# the per-field cosines:
+#   - dropdown fields: one-hot over the InputForm options (multi-selects split
+#     on ","), unknown values hashed into a few spare buckets. Ordered fields
+#     (scale, team size, budget, timeline) also put 0.5 on the neighbouring
+#     options, so adjacent buckets are similar rather than unrelated.
+#   - customConstraints: hashed bag of words, with a dedicated bucket for "empty"
+#
+# Search only scans entries with the same appType (the heaviest field - a
+# different app type never clears a useful threshold), which keeps a 100k
+# entry index well under a millisecond per lookup.
+
+# (field, options in InputForm order, leading options that are ordered, weight)
+FIELDS = (
+    ("appType", list(APP_TYPES), 0, 3.0),
+    ("scale", list(SCALES), 4, 1.5),
+    ("focus", list(FOCUS), 0, 1.5),
+    ("teamSize", list(TEAM_SIZES), 5, 1.0),
+    ("budget", list(BUDGETS), 5, 1.0),
+    ("timeToMarket", list(TIMELINES), 5, 1.0),
+    ("securityLevel", list(SECURITY_LEVELS), 0, 1.5),
+)
+UNKNOWN_BUCKETS = 4
+TEXT_BUCKETS = 64
+TEXT_WEIGHT = 2.0
+
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+STOPWORDS = {"a", "an", "and", "the", "to", "of", "for", "in", "on", "with", "we", "our", "is", "are", "be",
+             "it", "that", "this", "should", "must", "need", "needs", "want", "would", "like", "use", "using"}
+
+
+def _fold(value) -> str:
+    return " ".join(str(value or "").split()).lower()
+
+
+def _bucket(text: str, buckets: int) -> int:
+    # crc32, not hash(): encodings must be stable across processes
+    return zlib.crc32(text.encode("utf-8")) % buckets
+
+
+class RequestEncoder:
+    """
+    StackRequest dict -> sparse unit vector {index: value} (see module comment)
+    """
+
+    def __init__(self):
+        self.blocks = []
+        offset = 0
+        for field, options, ordered, weight in FIELDS:
+            self.blocks.append((field, {option: i for i, option in enumerate(options)}, ordered, weight, offset))
+            offset += len(options) + UNKNOWN_BUCKETS
+        self.text_offset = offset
+        self.dim = offset + TEXT_BUCKETS + 1
+        self.total_weight = sum(weight for *_, weight in FIELDS) + TEXT_WEIGHT
+
+    def partition(self, inputs: dict) -> str:
+        return _fold(inputs.get("appType"))
+
+    def encode(self, inputs: dict) -> dict:
+        vector = {}
+        for field, positions, ordered, weight, offset in self.blocks:
+            values = [part.strip() for part in _fold(inputs.get(field)).split(",") if part.strip()] or [""]
+            block = {}
+            for value in values:
+                position = positions.get(value)
+                if position is None:
+                    index = offset + len(positions) + _bucket(value, UNKNOWN_BUCKETS)
+                    block[index] = block.get(index, 0.0) + 1.0
+                    continue
+                block[offset + position] = block.get(offset + position, 0.0) + 1.0
+                if position < ordered:
+                    for neighbour in (position - 1, position + 1):
+                        if 0 <= neighbour < ordered:
+                            block[offset + neighbour] = block.get(offset + neighbour, 0.0) + 0.5
+            self._add_block(vector, block, weight)
+
+        words = [word for word in WORD_RE.findall(_fold(inputs.get("customConstraints"))) if word not in STOPWORDS]
+        block = {}
+        for word in words:
+            index = self.text_offset + _bucket(word, TEXT_BUCKETS)
+            block[index] = block.get(index, 0.0) + 1.0
+        if not block:
+            block[self.text_offset + TEXT_BUCKETS] = 1.0
+        self._add_block(vector, block, TEXT_WEIGHT)
+        return vector
+
+    def _add_block(self, vector: dict, block: dict, weight: float):
+        scale = (weight / self.total_weight) ** 0.5 / sum(v * v for v in block.values()) ** 0.5
+        for index, value in block.items():
+            vector[index] = value * scale
+
+
+class _Partition:
+    """
+    The encodings of one appType: rows 0..size-1 of a float32 matrix (numpy) or a
+    list of sparse vectors. Deleting moves the last row into the hole.
+    """
+
+    def __init__(self, dim: int):
+        numpy_module()
+        self.dim = dim
+        self.keys = []
+        self.vectors = []
+        self.matrix = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def append(self, key: str, vector: dict) -> int:
+        row = len(self.keys)
+        self.keys.append(key)
+        if np is None:
+            self.vectors.append(vector)
+            return row
+        if self.matrix is None or row >= len(self.matrix):
+            grown = np.zeros((max(64, 2 * row), self.dim), dtype=np.float32)
+            if self.matrix is not None:
+                grown[:row] = self.matrix[:row]
+            self.matrix = grown
+        self.matrix[row] = 0.0
+        self.matrix[row, list(vector)] = list(vector.values())
+        return row
+
+    def delete(self, row: int) -> str:
+        """
+        Remove `row`; returns the key that moved into it (None if it was the last row)
+        """
+        last = len(self.keys) - 1
+        moved = None
+        if row != last:
+            moved = self.keys[row] = self.keys[last]
+            if np is None:
+                self.vectors[row] = self.vectors[last]
+            else:
+                self.matrix[row] = self.matrix[last]
+        self.keys.pop()
+        if np is None:
+            self.vectors.pop()
+        return moved
+
+    def top(self, vector: dict, k: int) -> list:
+        if not self.keys:
+            return []
+        if np is None:
+            scored = ((sum(vector.get(i, 0.0) * v for i, v in row.items()), i) for i, row in enumerate(self.vectors))
+            return sorted(scored, reverse=True)[:k]
+        query = np.zeros(self.dim, dtype=np.float32)
+        query[list(vector)] = list(vector.values())
+        scores = self.matrix[:len(self.keys)] @ query
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), int(i)) for i in top]
+
+
+class SimilarityIndex:
+    """
+    Bounded cosine top-k index of request encodings, keyed by cache key.
+    Inserts are incremental; past `max_entries` the least recently used
+    entry (inserted or matched) is evicted.
+
+    With numpy each appType's encodings are rows of a float32 matrix (grown
+    by doubling) and a search is one matrix-vector product over them;
+    without it, sparse dot products per entry.
+    """
+
+    def __init__(self, max_entries: int = 10000, encoder: RequestEncoder = None):
+        self.max_entries = max(1, int(max_entries))
+        self.encoder = encoder or RequestEncoder()
+        self._lock = threading.Lock()
+        self._where: "OrderedDict[str, tuple[str, int]]" = OrderedDict()  # key -> (partition, row), LRU order
+        self._partitions: dict[str, _Partition] = {}
+        self.lookups = 0
+        self.matches = 0
+        self.evictions = 0
+        self._lookup_seconds = 0.0
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if numpy_module() is not None else "python"
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def add(self, key: str, inputs: dict):
+        vector = self.encoder.encode(inputs)
+        partition = self.encoder.partition(inputs)
+        with self._lock:
+            if key in self._where:
+                self._delete(key)
+            elif len(self._where) >= self.max_entries:
+                self._delete(next(iter(self._where)))
+                self.evictions += 1
+            part = self._partitions.get(partition)
+            if part is None:
+                part = self._partitions[partition] = _Partition(self.encoder.dim)
+            self._where[key] = (partition, part.append(key, vector))
+
+    def remove(self, key: str):
+        with self._lock:
+            if key in self._where:
+                self._delete(key)
+
+    def search(self, inputs: dict, k: int = 1) -> list:
+        """
+        Up to k (key, cosine similarity) pairs with the same appType, most similar first
+        """
+        start = time.perf_counter()
+        vector = self.encoder.encode(inputs)
+        partition = self.encoder.partition(inputs)
+        with self._lock:
+            part = self._partitions.get(partition)
+            result = [(part.keys[row], score) for score, row in part.top(vector, k)] if part else []
+            if result:
+                self._where.move_to_end(result[0][0])
+            self.lookups += 1
+            self.matches += bool(result)
+            self._lookup_seconds += time.perf_counter() - start
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "entries": len(self._where),
+                "max_entries": self.max_entries,
+                "partitions": sum(1 for part in self._partitions.values() if len(part)),
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "evictions": self.evictions,
+                "avg_lookup_ms": round(self._lookup_seconds * 1000 / self.lookups, 4) if self.lookups else 0.0,
+            }
+
+    def _delete(self, key: str):
+        partition, row = self._where.pop(key)
+        moved = self._partitions[partition].delete(row)
+        if moved is not None:
+            # Reassigning an existing key keeps its LRU position
+            self._where[moved] = (partition, row)
+
+
+def seed_summary(recommendation: dict) -> str:
+    """
+    One line per PRIMARY category of a previous recommendation, for seeding a new one
+    """
+    lines = []
+    for category, label in (("frontend", "Frontend"), ("backend", "Backend"), ("database", "Database"),
+                            ("devops", "DevOps/Infrastructure"), ("additional", "Additional Services")):
+        names = [tech["name"] for tech in recommendation.get("primary", {}).get(category, [])]
+        if names:
+            lines.append(f"- {label}: {', '.join(names)}")
+    return "\n".join(lines)
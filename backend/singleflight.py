@@ -0,0 +1,106 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight async calls: while a call for `key` is
+    running, later callers with the same key await the same future instead of
+    starting their own.
+
+    - Results and exceptions are delivered to every waiter.
+    - The work runs as its own task, so a cancelled caller does not cancel it
+      while others still wait; the last waiter to leave cancels it.
+    - If the leader is cancelled, remaining waiters elect a new leader and
+      retry instead of failing.
+    - Keys are removed as soon as the call finishes, so only in-flight work
+      is shared (pair with a cache for completed results).
+    """
+
+    def __init__(self, name: str = "calls"):
+        self.name = name
+        self._calls: dict[str, "_Call"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.reelections = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]) -> tuple[object, bool]:
+        """
+        Run `fn()` for `key` unless an identical call is in flight.
+        Returns (result, shared) where shared is True if another caller's call was joined.
+        """
+        while True:
+            call = self._calls.get(key)
+            shared = call is not None
+            if call is None:
+                call = self._register(key, asyncio.ensure_future(fn()), owned=True)
+            else:
+                self.coalesced += 1
+            call.waiters += 1
+            try:
+                return await asyncio.shield(call.future), shared
+            except asyncio.CancelledError:
+                if call.future.cancelled() and not asyncio.current_task().cancelling():
+                    # The leader went away (e.g. client disconnected) - take over
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                    self.reelections += 1
+                    if shared:
+                        self.coalesced -= 1  # that join saved nothing after all
+                    continue
+                if call.owned and call.waiters == 1 and not call.future.done():
+                    call.future.cancel()
+                raise
+            finally:
+                call.waiters -= 1
+
+    def lead(self, key: str) -> Optional[asyncio.Future]:
+        """
+        Register a call driven by the caller itself (e.g. a streaming response
+        that must yield while it generates). Returns a Future the caller must
+        resolve with set_result/set_exception - or cancel() if it gives up -
+        or None when `key` is already in flight (use do() to join it).
+        """
+        if key in self._calls:
+            return None
+        return self._register(key, asyncio.get_running_loop().create_future(), owned=False).future
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "upstream_calls_saved": self.coalesced,
+            "failures": self.failures,
+            "leader_cancellations": self.cancelled,
+            "reelections": self.reelections,
+        }
+
+    def _register(self, key: str, future: asyncio.Future, owned: bool) -> "_Call":
+        call = _Call(future, owned)
+        self._calls[key] = call
+        self.leaders += 1
+        future.add_done_callback(lambda done: self._finished(key, call))
+        return call
+
+    def _finished(self, key: str, call: "_Call"):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if call.future.cancelled():
+            self.cancelled += 1
+        elif call.future.exception() is not None:
+            # Retrieved here so an error nobody awaited doesn't warn at shutdown
+            self.failures += 1
+
+
+class _Call:
+    __slots__ = ("future", "owned", "waiters")
+
+    def __init__(self, future: asyncio.Future, owned: bool):
+        self.future = future
+        self.owned = owned  # True when do() started the task (and may cancel it)
+        self.waiters = 0
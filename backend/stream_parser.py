@@ -0,0 +1,554 @@
+import re
+from typing import Optional
+
+from models import RecommendationResponse
+
+# Push-based parser for the stack_chain markdown.
+#
+# Text can be fed in arbitrary chunks (e.g. straight from stack_chain.astream);
+# only the current partial line is buffered, every complete line is handled
+# exactly once, and events are emitted as soon as a unit is complete:
+#   ("diagram", {"architecture_diagram"})
+#   ("tech", {"section", "stack_num", "category", "item"})
+#   ("category", {"section", "stack_num", "category", "items"})
+#   ("primary", {"stack"})
+#   ("alternative_explanation", {...same dict as alternative_explanations...})
+#   ("alternative", {"stack_num", "explanation", "stack", "diagram"})
+# The final result() is identical to the regex-based parse_tech_stack_response.
+#
+# While parsing, technologies and stacks are __slots__ records (TechRecord,
+# StackRecord); the public pydantic models are built once, by result(), in a
+# single validation pass that reads the records' attributes.
+#
+# parse_recommendation() runs the same state machine over a complete response
+# with events switched off; it is what parse_tech_stack_response uses.
+
+ALT_MARKER = '## ALTERNATIVE'
+ALT_BOUNDARY = re.compile(r'## ALTERNATIVE STACK #\d')
+ALT_HEADER = re.compile(r'## ALTERNATIVE STACK #(\d+)(?:([:\s])|$)')
+TECH_LINE = re.compile(r'\*\*([^*]+)\*\*\s*-\s*(.+)$')
+WHY_LINE = re.compile(r'^why:\s*(.+)$', re.IGNORECASE)
+BULLET_BOLD = re.compile(r'\*\*([^*]+)\*\*:\s*')
+NON_SPACE = re.compile(r'\S')
+
+CATEGORIES = ('frontend', 'backend', 'database', 'devops', 'additional')
+
+EXPLANATION_FIELDS = (
+    ("when_to_use", "**When to use this stack:**", ("\n\n", "**")),
+    ("trade_off", "**Primary trade-off vs recommended stack:**", ("\n\n", "**")),
+    ("why_consider", "**Why this option is worth considering:**", ("\n\n###",)),
+)
+
+
+def category_for_heading(line: str) -> Optional[str]:
+    """
+    Map a "### ..." heading onto a TechStack field name
+    """
+    if 'Frontend' in line:
+        return 'frontend'
+    if 'Backend' in line:
+        return 'backend'
+    if 'Database' in line:
+        return 'database'
+    if 'DevOps' in line or 'Infrastructure' in line:
+        return 'devops'
+    if 'Additional' in line:
+        return 'additional'
+    return None
+
+
+class TechRecord:
+    """
+    A TechItem while it is being parsed
+    """
+    __slots__ = ('name', 'pros', 'cons', 'why')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pros = []
+        self.cons = []
+        self.why = ""
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "pros": self.pros[:], "cons": self.cons[:], "why": self.why}
+
+
+class StackRecord:
+    """
+    A TechStack while it is being parsed: one list of TechRecords per category
+    """
+    __slots__ = CATEGORIES
+
+    def __init__(self):
+        self.frontend = []
+        self.backend = []
+        self.database = []
+        self.devops = []
+        self.additional = []
+
+    def as_dict(self) -> dict:
+        return {category: [item.as_dict() for item in getattr(self, category)] for category in CATEGORIES}
+
+
+class MermaidBlock:
+    """
+    First ```mermaid block in the lines it is fed - same rules as
+    re.search(r'```mermaid\n(.*?)\n```', text, re.DOTALL)
+    """
+
+    def __init__(self):
+        self.state = "search"  # search -> open -> done
+        self.lines = []
+        self.code = ""
+
+    def feed_line(self, line: str, terminated: bool) -> bool:
+        """
+        Returns True when this line closed the block
+        """
+        if self.state == "search":
+            if terminated and line.endswith('```mermaid'):
+                self.state = "open"
+            return False
+        if self.state == "open":
+            # The closing fence needs a "\n" inside the block, so the first line never closes it
+            if self.lines and line.startswith('```'):
+                self.code = '\n'.join(self.lines)
+                self.state = "done"
+                self.lines = []
+                return True
+            self.lines.append(line)
+        return False
+
+    def close(self):
+        self.state = "done"
+        self.lines = []
+
+
+class StackSectionParser:
+    """
+    Line-at-a-time version of parse_stack_section.
+    Completed TechItems and categories are appended to `events` (None disables events).
+    close() returns a StackRecord (TechStack.model_validate(record, from_attributes=True) for the model).
+    """
+
+    def __init__(self, events: Optional[list], section: str = "primary", stack_num: Optional[int] = None):
+        self.events = events
+        self.section = section
+        self.stack_num = stack_num
+        self.stack = StackRecord()
+        self.current_category = None
+        self.current_tech = None
+        self.parsing_mode = None  # 'pros', 'cons', or 'why'
+
+    def _add_current(self):
+        getattr(self.stack, self.current_category).append(self.current_tech)
+        if self.events is None:
+            return
+        self.events.append(("tech", {
+            "section": self.section,
+            "stack_num": self.stack_num,
+            "category": self.current_category,
+            "item": self.current_tech.as_dict(),
+        }))
+
+    def _close_category(self):
+        if self.events is not None and self.current_category:
+            items = getattr(self.stack, self.current_category)
+            if items:
+                self.events.append(("category", {
+                    "section": self.section,
+                    "stack_num": self.stack_num,
+                    "category": self.current_category,
+                    "items": [item.as_dict() for item in items],
+                }))
+
+    def feed_line(self, line: str):
+        # Same decision order as the original parse_stack_section, but dispatched on the
+        # first character so the common bullet/why lines skip the checks that can't match
+        line_stripped = line.strip()
+        if not line_stripped:
+            self.parsing_mode = None
+            return
+
+        # Skip explanation lines and examples
+        if ('When to use' in line_stripped or 'Primary trade-off' in line_stripped
+                or 'Why this option' in line_stripped or 'EXAMPLE' in line_stripped):
+            self.parsing_mode = None
+            return
+
+        first = line_stripped[0]
+
+        # Detect category (###)
+        if first == '#' and line_stripped.startswith('### '):
+            if self.current_tech and self.current_category:
+                self._add_current()
+            self._close_category()
+            self.current_tech = None
+            self.parsing_mode = None
+            self.current_category = category_for_heading(line_stripped)
+            return
+
+        # Extract tech name - look for **TechName** with dash and emoji/description
+        if first == '*' and self.current_category and line_stripped.startswith('**') and ' - ' in line_stripped:
+            if self.current_tech:
+                self._add_current()
+            match = TECH_LINE.search(line_stripped)
+            if match:
+                self.current_tech = TechRecord(match.group(1).strip())
+                self.parsing_mode = None
+            return
+
+        if first in 'pPcCwW' and self.current_tech:
+            lowered = line_stripped.lower()
+            if lowered == 'pros:':
+                self.parsing_mode = 'pros'
+                return
+            if lowered == 'cons:':
+                self.parsing_mode = 'cons'
+                return
+            if lowered.startswith('why:'):
+                why_match = WHY_LINE.search(line_stripped)
+                if why_match and why_match.group(1):
+                    self.current_tech.why = why_match.group(1).strip()
+                    self.parsing_mode = None
+                else:
+                    self.parsing_mode = 'why'
+                return
+
+        # Example blocks - skip them
+        if 'example' in line_stripped:
+            self.parsing_mode = None
+            return
+
+        # Bullet point handling
+        if first == '•' and self.current_tech:
+            bullet_text = line_stripped[1:].strip()
+            # Remove bold markers
+            if '**' in bullet_text:
+                bullet_text = BULLET_BOLD.sub('', bullet_text)
+            # Remove trailing comma/semicolon
+            trimmed = bullet_text.rstrip()
+            if trimmed and trimmed[-1] in ',;':
+                bullet_text = trimmed[:-1]
+            bullet_text = bullet_text.strip()
+            if self.parsing_mode == 'pros' and bullet_text:
+                self.current_tech.pros.append(bullet_text)
+            elif self.parsing_mode == 'cons' and bullet_text:
+                self.current_tech.cons.append(bullet_text)
+            return
+
+        # Multi-line why continuation
+        if self.parsing_mode == 'why' and self.current_tech:
+            if line_stripped.startswith('###') or (line_stripped.startswith('**') and ' - ' in line_stripped):
+                self.parsing_mode = None
+                if line_stripped.startswith('### '):
+                    self.current_category = category_for_heading(line_stripped) or self.current_category
+                    self.current_tech = None
+                return
+            self.current_tech.why += ' ' + line_stripped
+            return
+
+        if self.parsing_mode and line_stripped.startswith('###'):
+            self.parsing_mode = None
+
+    def close(self) -> StackRecord:
+        if self.current_tech and self.current_category:
+            self._add_current()
+        self._close_category()
+        return self.stack
+
+
+class ExplanationField:
+    """
+    Incremental equivalent of re.search(marker + r'\\s*(.+?)(?:' + terminators + ')', text, re.DOTALL)
+    Only the text after the marker is buffered, and only until it resolves.
+    """
+
+    def __init__(self, marker: str, terminators: tuple):
+        self.marker = marker
+        self.terminators = terminators
+        self.longest = max(len(t) for t in terminators)
+        self.buffer = None  # text after the marker once it has been seen
+        self.start = None  # first non-whitespace offset in buffer
+        self.scan_from = 0
+        self.value = None
+
+    def append(self, text: str, terminated: bool):
+        if self.buffer is None:
+            idx = text.find(self.marker)
+            if idx < 0:
+                return
+            self.buffer = text[idx + len(self.marker):]
+        else:
+            self.buffer += text
+        if terminated:
+            self.buffer += '\n'
+        self._resolve(final=False)
+
+    def trim_final_newline(self):
+        # A trailing "\n" at the very end of the response is excluded by the `$` lookahead
+        if self.value is None and self.buffer and self.buffer.endswith('\n'):
+            self.buffer = self.buffer[:-1]
+
+    def finish(self) -> str:
+        if self.value is None:
+            if self.buffer is not None:
+                self._resolve(final=True)
+            if self.value is None:
+                self.value = ""
+        return self.value
+
+    def _resolve(self, final: bool):
+        buffer = self.buffer
+        if self.start is None:
+            match = NON_SPACE.search(buffer)
+            if not match:
+                return
+            self.start = match.start()
+            self.scan_from = self.start + 1
+
+        best = -1
+        best_term = None
+        for term in self.terminators:
+            pos = buffer.find(term, self.scan_from)
+            if pos >= 0 and (best < 0 or pos < best):
+                best, best_term = pos, term
+
+        if best < 0:
+            self.scan_from = max(self.start + 1, len(buffer) - self.longest + 1)
+            return
+        # "\n\n" touching the end of the buffer may still be the trimmed final newline
+        if not final and best_term.endswith('\n') and best + len(best_term) == len(buffer):
+            self.scan_from = best
+            return
+        self.value = buffer[self.start:best].strip()
+
+
+class AlternativeSection:
+    """
+    Body of one "## ALTERNATIVE STACK #N" section
+    """
+
+    def __init__(self, stack_num: int, events: Optional[list]):
+        self.stack_num = stack_num
+        self.events = events
+        self.stack_parser = StackSectionParser(events, "alternative", stack_num)
+        self.diagram = MermaidBlock()
+        self.fields = [(key, ExplanationField(marker, terms)) for key, marker, terms in EXPLANATION_FIELDS]
+        self.pending_fields = [field for _, field in self.fields]
+        self.explanation_sent = False
+
+    def feed(self, text: str, terminated: bool):
+        self.stack_parser.feed_line(text)
+        if self.diagram.state != "done":
+            self.diagram.feed_line(text, terminated)
+        if not self.pending_fields:
+            return
+        for field in self.pending_fields:
+            field.append(text, terminated)
+        if any(field.value is not None for field in self.pending_fields):
+            self.pending_fields = [field for field in self.pending_fields if field.value is None]
+            if not self.pending_fields:
+                self._send_explanation()
+
+    def _explanation(self) -> dict:
+        explanation = {"stack_num": self.stack_num}
+        for key, field in self.fields:
+            explanation[key] = field.finish()
+        return explanation
+
+    def _send_explanation(self):
+        self.explanation_sent = True
+        if self.events is not None:
+            self.events.append(("alternative_explanation", self._explanation()))
+
+    def close(self, end_of_text: bool = False) -> tuple[dict, StackRecord]:
+        if end_of_text:
+            for _, field in self.fields:
+                field.trim_final_newline()
+        if not self.explanation_sent:
+            self._send_explanation()
+        explanation = self._explanation()
+        stack = self.stack_parser.close()
+        self.diagram.close()
+        if self.events is not None:
+            self.events.append(("alternative", {
+                "stack_num": self.stack_num,
+                "explanation": explanation,
+                "stack": stack.as_dict(),
+                "diagram": self.diagram.code,
+            }))
+        return explanation, stack
+
+
+class RecommendationStreamParser:
+    """
+    Single-pass, push-based parser for the full recommendation markdown.
+
+        parser = RecommendationStreamParser()
+        for chunk in chunks:
+            for event, data in parser.feed(chunk): ...
+        for event, data in parser.close(): ...
+        response = parser.result()
+    """
+
+    def __init__(self, emit_events: bool = True):
+        self.events = [] if emit_events else None
+        self.partial_line = ""
+
+        # First ```mermaid block anywhere in the response
+        self.diagram = MermaidBlock()
+
+        # "## PRIMARY Technology Stack" until the first "## ALTERNATIVE"
+        self.primary_state = "search"  # search -> active -> done
+        self.primary_parser = None
+        self.primary = None
+
+        # "## ALTERNATIVE STACK #N" sections
+        self.alt_state = "outside"  # outside / swallow / body
+        self.pending_stack_num = None
+        self.current_alt = None
+        self.alternatives = []
+        self.alternative_explanations = []
+        self.alternative_diagrams = []
+
+        self.closed = False
+
+    def feed(self, chunk: str) -> list:
+        self.partial_line += chunk
+        if '\n' in chunk:
+            *lines, self.partial_line = self.partial_line.split('\n')
+            for line in lines:
+                self._line(line, terminated=True)
+        return self._drain()
+
+    def close(self) -> list:
+        if self.closed:
+            return []
+        self.closed = True
+        line, self.partial_line = self.partial_line, ""
+        self._line(line, terminated=False)
+        # An empty final line means the response ended with "\n"
+        ended_with_newline = not line
+
+        self.diagram.close()
+
+        if self.primary_state == "active":
+            self._close_primary()
+        if self.primary is None:
+            self.primary = StackRecord()
+
+        self.pending_stack_num = None
+        if self.alt_state == "body":
+            self._close_alternative(end_of_text=ended_with_newline)
+        self.alt_state = "outside"
+        return self._drain()
+
+    def result(self) -> RecommendationResponse:
+        if not self.closed:
+            self.close()
+        # The only validation pass: the records built while parsing become the public models here
+        return RecommendationResponse.model_validate({
+            "architecture_diagram": self.diagram.code,
+            "primary": self.primary,
+            "alternatives": self.alternatives,
+            "alternative_explanations": self.alternative_explanations,
+            "alternative_diagrams": self.alternative_diagrams,
+        }, from_attributes=True)
+
+    def _drain(self) -> list:
+        if self.events is None:
+            return []
+        # Section parsers append to the same list, so empty it in place
+        events = self.events[:]
+        self.events.clear()
+        return events
+
+    def _line(self, line: str, terminated: bool):
+        if self.diagram.state != "done" and self.diagram.feed_line(line, terminated):
+            if self.events is not None:
+                self.events.append(("diagram", {"architecture_diagram": self.diagram.code}))
+        # One scan tells both the PRIMARY and ALTERNATIVE machines whether a section boundary is on this line
+        marker = line.find(ALT_MARKER)
+        if self.primary_state != "done":
+            self._primary_line(line, terminated, marker)
+        self._alternative_line(line, terminated, marker)
+
+    def _primary_line(self, line: str, terminated: bool, marker: int):
+        if self.primary_state == "search":
+            if terminated and line.endswith('## PRIMARY Technology Stack'):
+                self.primary_state = "active"
+                self.primary_parser = StackSectionParser(self.events, "primary")
+            return
+        if self.primary_state == "active":
+            if marker < 0:
+                self.primary_parser.feed_line(line)
+                return
+            self.primary_parser.feed_line(line[:marker])
+            self._close_primary()
+
+    def _close_primary(self):
+        self.primary = self.primary_parser.close()
+        self.primary_parser = None
+        self.primary_state = "done"
+        if self.events is not None:
+            self.events.append(("primary", {"stack": self.primary.as_dict()}))
+
+    def _alternative_line(self, line: str, terminated: bool, marker: int):
+        if self.alt_state == "swallow":
+            # "## ALTERNATIVE STACK #N\n" - the header's [^\n]*\n consumes the following line too
+            if terminated:
+                self._open_alternative(self.pending_stack_num)
+            else:
+                self.alt_state = "outside"
+            self.pending_stack_num = None
+            return
+
+        if marker < 0:
+            if self.alt_state == "body":
+                self.current_alt.feed(line, terminated)
+            return
+
+        pos = marker
+        if self.alt_state == "body":
+            boundary = ALT_BOUNDARY.search(line, marker)
+            if not boundary:
+                self.current_alt.feed(line, terminated)
+                return
+            self.current_alt.feed(line[:boundary.start()], False)
+            self._close_alternative()
+            pos = boundary.start()
+
+        header = ALT_HEADER.search(line, pos)
+        if not header or not terminated:
+            return
+        if header.group(2) is None:
+            self.alt_state = "swallow"
+            self.pending_stack_num = int(header.group(1))
+        else:
+            self._open_alternative(int(header.group(1)))
+
+    def _open_alternative(self, stack_num: int):
+        self.current_alt = AlternativeSection(stack_num, self.events)
+        self.alt_state = "body"
+
+    def _close_alternative(self, end_of_text: bool = False):
+        explanation, stack = self.current_alt.close(end_of_text)
+        self.alternative_explanations.append(explanation)
+        self.alternatives.append(stack)
+        self.alternative_diagrams.append(self.current_alt.diagram.code)
+        self.current_alt = None
+        self.alt_state = "outside"
+
+
+def parse_recommendation(response: str) -> RecommendationResponse:
+    """
+    Parse a complete response in one pass (no events, no re-scanning)
+    """
+    parser = RecommendationStreamParser(emit_events=False)
+    lines = response.split('\n')
+    parser.partial_line = lines.pop()
+    handle = parser._line
+    for line in lines:
+        handle(line, True)
+    return parser.result()
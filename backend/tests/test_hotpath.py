@@ -0,0 +1,54 @@
+"""
+The hot-path regression gate (benchmarks/bench_suite.py) without the timing:
+the baseline covers every case, and the memory metrics, which don't depend on
+the machine, stay within the baseline's tolerance.
+
+Run from backend/:
+    python -m pytest tests/test_hotpath.py
+"""
+import contextlib
+import json
+import os
+import platform
+
+import pytest
+
+from benchmarks import bench_suite
+
+BASELINE = json.loads(bench_suite.BASELINE.read_text())
+
+
+@pytest.fixture(scope="module")
+def cases():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        import main
+    return {name: (fn, inputs) for name, fn, inputs in bench_suite.corpus_cases(main)}
+
+
+def test_baseline_covers_every_case(cases):
+    assert sorted(BASELINE["cases"]) == sorted(cases)
+
+
+@pytest.mark.skipif(platform.python_version().rsplit(".", 1)[0] != BASELINE["python"].rsplit(".", 1)[0],
+                    reason=f"memory baseline recorded on Python {BASELINE['python']}")
+def test_memory_within_baseline(cases):
+    results = {"cases": {}}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name, (fn, inputs) in cases.items():
+            peak_kb, blocks = bench_suite.measure_memory(fn, inputs[:10])
+            # Throughput is left to the benchmark run: report the baseline's own value
+            results["cases"][name] = {"normalized": BASELINE["cases"][name]["normalized"],
+                                      "peak_kb": round(peak_kb, 1), "retained_blocks": round(blocks, 1)}
+    assert bench_suite.compare(results, BASELINE, tolerance=0.25) == {}
+
+
+def test_compare_flags_slower_and_bigger_cases():
+    baseline = {"cases": {"a": {"normalized": 10.0, "peak_kb": 100.0, "retained_blocks": 50.0},
+                          "b": {"normalized": 10.0, "peak_kb": 100.0, "retained_blocks": 50.0}}}
+    results = {"cases": {"a": {"normalized": 7.0, "peak_kb": 100.0, "retained_blocks": 50.0},
+                         "b": {"normalized": 9.0, "peak_kb": 120.0, "retained_blocks": 52.0},
+                         "new": {"normalized": 1.0, "peak_kb": 1.0, "retained_blocks": 1.0}}}
+    regressions = bench_suite.compare(results, baseline, tolerance=0.25)
+    assert sorted(regressions) == ["a", "b"]
+    assert "throughput" in regressions["a"][0]
+    assert regressions["b"] == ["b: peak_kb 100.0 -> 120.0"]
@@ -0,0 +1,68 @@
+"""
+Connection reuse of the shared upstream client (http_pool), checked with
+pool_stats against the local Groq stand-in from benchmarks/bench_http_pool.py.
+
+Run from backend/:
+    python -m pytest tests/test_http_pool.py
+"""
+import asyncio
+
+import httpx
+
+from benchmarks.bench_http_pool import StandInGroq
+from http_pool import build_http_client, pool_stats, warm_up
+
+
+async def completions(max_keepalive: int, requests: int, concurrency: int = 1, warm: int = 0):
+    """
+    Send `requests` chat completions `concurrency` at a time through a fresh
+    client; returns (pool_stats, connections the server accepted)
+    """
+    server = StandInGroq(handshake_ms=0)
+    base_url = await server.start()
+    http = build_http_client(max_keepalive=max_keepalive)
+    try:
+        if warm:
+            assert await warm_up(http, f"{base_url}/openai/v1/models", warm) == warm
+        for _ in range(0, requests, concurrency):
+            responses = await asyncio.gather(*(
+                http.post(f"{base_url}/openai/v1/chat/completions", json={"model": "llama-3.1-8b-instant"})
+                for _ in range(concurrency)
+            ))
+            assert all(response.status_code == 200 for response in responses)
+        return pool_stats(http), server.connections
+    finally:
+        await http.aclose()
+        await server.stop()
+
+
+def test_sequential_requests_share_one_connection():
+    stats, accepted = asyncio.run(completions(max_keepalive=20, requests=10))
+    assert accepted == 1
+    assert stats["requests"] == 10
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 9
+    assert stats["reuse_rate"] == 0.9
+
+
+def test_warm_up_opens_the_connections_requests_then_reuse():
+    stats, accepted = asyncio.run(completions(max_keepalive=20, requests=12, concurrency=4, warm=4))
+    assert accepted == 4
+    assert stats["requests"] == 16
+    assert stats["new_connections"] == 4
+    assert stats["reused_connections"] == 12
+
+
+def test_no_keepalive_opens_a_connection_per_request():
+    stats, accepted = asyncio.run(completions(max_keepalive=0, requests=5))
+    assert accepted == 5
+    assert stats["new_connections"] == 5
+    assert stats["reused_connections"] == 0
+
+
+def test_pool_stats_of_a_foreign_client_is_empty():
+    async def stats():
+        async with httpx.AsyncClient() as client:
+            return pool_stats(client)
+
+    assert asyncio.run(stats()) == {}
@@ -0,0 +1,31 @@
+"""
+The import checks of benchmarks/bench_startup.py as tests: `import main`
+stays within its budget relative to `import fastapi`, doesn't load LangChain
+or the Groq SDK, and creates no files in the working directory.
+
+Run from backend/:
+    python -m pytest tests/test_startup.py
+"""
+import pytest
+
+from benchmarks import bench_startup
+
+
+@pytest.fixture(scope="module")
+def imports():
+    # Fresh interpreters in a temporary directory, median of 5
+    return bench_startup.measure_imports(repeat=5)
+
+
+def test_import_does_not_load_langchain_or_groq(imports):
+    assert imports["loaded"] == []
+
+
+def test_import_creates_no_files(imports):
+    assert imports["files"] == []
+
+
+def test_import_time_within_budget(imports):
+    ratio = imports["main_ms"] / imports["fastapi_ms"]
+    assert ratio <= bench_startup.MAX_RATIO, (
+        f"import main {imports['main_ms']:.1f} ms is {ratio:.2f}x import fastapi {imports['fastapi_ms']:.1f} ms")
@@ -0,0 +1,52 @@
+"""
+stream_parser against the regex parser it replaced (benchmarks/legacy_parser.py)
+on the benchmark corpus, and incremental feeding against a one-shot parse.
+
+Run from backend/:
+    python -m pytest tests/test_stream_parser.py
+"""
+import random
+
+import pytest
+
+from benchmarks import corpus, legacy_parser
+from stream_parser import RecommendationStreamParser, parse_recommendation
+
+CORPUS = {
+    "normal": corpus.synthetic_response(),
+    "two techs per category": corpus.synthetic_response(techs_per_category=2, seed=1),
+    "no alternatives": corpus.synthetic_response(alternatives=0, seed=2),
+    "10x": corpus.scaled_response(10, seed=3),
+    "malformed diagrams": corpus.malformed_response(seed=4),
+    "truncated": corpus.truncated_response(seed=5),
+    "truncated early": corpus.truncated_response(fraction=0.2, seed=6),
+    "trailing newline": corpus.synthetic_response(seed=7) + "\n",
+    "empty": "",
+}
+
+
+@pytest.fixture(autouse=True)
+def quiet_legacy_parser(monkeypatch):
+    # The old parser prints every line it looks at
+    monkeypatch.setattr(legacy_parser, "print", lambda *args, **kwargs: None, raising=False)
+
+
+@pytest.mark.parametrize("text", CORPUS.values(), ids=CORPUS.keys())
+def test_matches_legacy_parser(text):
+    # The legacy parser predates per-alternative diagrams and always leaves them empty
+    expected = legacy_parser.parse_tech_stack_response(text)
+    assert parse_recommendation(text).model_copy(update={"alternative_diagrams": []}) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, None], ids=["1", "7", "64", "random"])
+@pytest.mark.parametrize("text", CORPUS.values(), ids=CORPUS.keys())
+def test_chunked_feed_matches_one_shot(text, chunk_size):
+    rng = random.Random(len(text))
+    parser = RecommendationStreamParser()
+    position = 0
+    while position < len(text):
+        size = chunk_size or rng.randint(1, 200)
+        parser.feed(text[position:position + size])
+        position += size
+    parser.close()
+    assert parser.result() == parse_recommendation(text)
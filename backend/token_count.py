@@ -0,0 +1,48 @@
+import math
+import re
+from functools import lru_cache
+
+# Approximate token counts for prompt budgeting and reporting.
+#
+# Llama 3 uses a tiktoken-style BPE, so when the optional `tiktoken` package is
+# installed its cl100k_base encoding is used as a close stand-in. Without it,
+# text is split the way BPE pre-tokenizers do (words with their leading space,
+# digit runs, punctuation runs, newlines) and each piece is costed by length.
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # not installed, or its vocabulary can't be downloaded offline
+    _ENCODING = None
+
+PIECE_RE = re.compile(r" ?[^\W\d_]+| ?\d+| ?[^\w\s]+|\n+|[ \t]+|_+")
+
+
+def _piece_tokens(piece: str) -> int:
+    text = piece.lstrip(" ")
+    if not text:
+        return 1
+    if text[0] == "\n":
+        return 1
+    if text[0].isdigit():
+        return math.ceil(len(text) / 3)  # numbers are split into 1-3 digit groups
+    if not text.isascii():
+        # Emoji, bullets and other non-ASCII symbols cost roughly a token per 2 UTF-8 bytes
+        return max(1, math.ceil(len(text.encode("utf-8")) / 2))
+    if text[0].isalpha():
+        return max(1, math.ceil(len(text) / 6))
+    return math.ceil(len(text) / 2)
+
+
+@lru_cache(maxsize=256)
+def count_tokens(text: str) -> int:
+    """
+    Approximate number of LLM tokens in `text`
+    """
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return sum(_piece_tokens(piece) for piece in PIECE_RE.findall(text))
+
+
+def tokenizer_name() -> str:
+    return "tiktoken cl100k_base" if _ENCODING is not None else "approximate (regex)"
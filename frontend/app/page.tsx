@@ -1,6 +1,6 @@
 'use client';
 
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import ReactMarkdown from 'react-markdown';
 import { Server, Zap, Database, ArrowRight, Loader2, FileText, X } from 'lucide-react';
 import Mermaid from '@/components/Mermaid';
@@ -214,6 +214,11 @@ export default function Home() {
     return cleaned.trim();
   };
 
+  // Key of the recommendation on screen (X-Recommendation-Key) and its ETag once the
+  // backend has sent one. The PDF export re-fetches it with If-None-Match: a 304 means the
+  // copy on screen is still current, so no payload is downloaded twice.
+  const recommendationRef = useRef<{ key: string; etag: string | null } | null>(null);
+
   const generateStack = async () => {
     if (!appType.length || !scale.length || !focus.length) return;
 
@@ -223,26 +228,28 @@ export default function Home() {
 
     try {
       const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+      const requestBody = JSON.stringify({
+        appType: appType.join(', '),
+        scale: scale.join(', '),
+        focus: focus.join(', '),
+        teamSize: teamSize.join(', '),
+        budget: budget.join(', '),
+        timeToMarket: timeToMarket.join(', '),
+        securityLevel,
+        customConstraints
+      });
       const response = await fetch(`${apiUrl}/api/recommend`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          appType: appType.join(', '),
-          scale: scale.join(', '),
-          focus: focus.join(', '),
-          teamSize: teamSize.join(', '),
-          budget: budget.join(', '),
-          timeToMarket: timeToMarket.join(', '),
-          securityLevel,
-          customConstraints
-        }),
+        body: requestBody,
       });
 
       if (!response.ok) {
         throw new Error(`API error: ${response.statusText}`);
       }
-
       const data = await response.json();
+      const key = response.headers.get('X-Recommendation-Key');
+      recommendationRef.current = key && data.primary ? { key, etag: response.headers.get('ETag') } : null;
       console.log('API Response:', data);
 
       // The response is now already structured
@@ -274,9 +281,39 @@ export default function Home() {
     }
   };
 
+  // The stored copy of the recommendation on screen; null when it is unchanged (304) or gone
+  const refetchRecommendation = async () => {
+    const current = recommendationRef.current;
+    if (!current) return null;
+    const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+    try {
+      const response = await fetch(`${apiUrl}/api/recommend/${encodeURIComponent(current.key)}`, {
+        headers: current.etag ? { 'If-None-Match': current.etag } : {},
+      });
+      if (!response.ok) return null;
+      const data = await response.json();
+      current.etag = response.headers.get('ETag');
+      return data;
+    } catch (error) {
+      console.error('Error re-fetching recommendation:', error);
+      return null;
+    }
+  };
+
   const handleDownloadPDF = async () => {
     if (techStackData && techStackData.primary) {
-      await generatePDF(techStackData as TechStackData);
+      const data = await refetchRecommendation();
+      const exported = data?.primary ? {
+        ...techStackData,
+        primary: data.primary,
+        alternatives: data.alternatives || [],
+        alternative_explanations: data.alternative_explanations || [],
+        mermaid_diagram: data.architecture_diagram,
+      } as TechStackData : techStackData;
+      if (exported !== techStackData) {
+        setTechStackData(exported);
+      }
+      await generatePDF(exported as TechStackData);
     }
   };
 
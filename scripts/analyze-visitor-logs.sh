@@ -27,6 +27,17 @@ if [ ! -f "$LOG_FILE" ]; then
     exit 1
 fi
 
+# Reports come from backend/log_analytics.py when python3 is available: it keeps
+# rollups in backend/logs/analytics.db and only reads what was appended since the
+# last run. ANALYZE_WITH_SHELL=1 forces the grep/awk pipelines below.
+if [ -z "$ANALYZE_WITH_SHELL" ] && command -v python3 >/dev/null 2>&1; then
+    case "${1:-summary}" in
+        summary|hourly|daily|geo|export)
+            exec python3 "$(dirname "$0")/../backend/log_analytics.py" --log-dir "$(dirname "$LOG_FILE")" "${1:-summary}" ${2:+"$2"}
+            ;;
+    esac
+fi
+
 # Parse command
 case "${1:-summary}" in
     summary)
@@ -27,6 +27,16 @@ check_containers() {
     fi
 }
 
+# Rollup-based reports from backend/log_analytics.py (only reads what was appended
+# since the last run); returns 1 without python3 or with ANALYZE_WITH_SHELL=1
+run_analytics() {
+    if [ -z "$ANALYZE_WITH_SHELL" ] && command -v python3 >/dev/null 2>&1; then
+        python3 "$(dirname "$0")/../backend/log_analytics.py" --log-dir backend/logs "$@"
+        return 0
+    fi
+    return 1
+}
+
 # Function to show real-time visitor logs
 show_live_logs() {
     print_header "Live Visitor Access Logs"
@@ -52,6 +62,7 @@ show_unique_visitors_today() {
     
     local today=$(date +%Y-%m-%d)
     if [ -f "backend/logs/visitor_access.log" ]; then
+        run_analytics today && return
         local count=$(grep "$today" backend/logs/visitor_access.log | grep "IP:" | awk '{print $3}' | sort -u | wc -l)
         echo "Total unique IPs: $count"
         echo -e "\n${YELLOW}Breakdown by IP:${NC}"
@@ -66,6 +77,7 @@ show_top_user_agents() {
     print_header "Top 10 User Agents"
     
     if [ -f "backend/logs/visitor_access.log" ]; then
+        run_analytics agents 10 && return
         echo -e "${YELLOW}User Agent Distribution:${NC}"
         grep "UserAgent:" backend/logs/visitor_access.log | sed 's/.*UserAgent: //' | sort | uniq -c | sort -rn | head -10
     else
@@ -78,6 +90,7 @@ show_visitor_stats() {
     print_header "Visitor Statistics"
     
     if [ -f "backend/logs/visitor_access.log" ]; then
+        run_analytics today && return
         local total_visits=$(wc -l < backend/logs/visitor_access.log)
         local unique_ips=$(grep "IP:" backend/logs/visitor_access.log | awk '{print $3}' | sort -u | wc -l)
         local today=$(date +%Y-%m-%d)
@@ -74,7 +74,7 @@ docker compose -f docker-compose.prod.yml ps
 
 # 11. Health checks
 echo -e "${YELLOW}11. Running health checks...${NC}"
-echo "   - Backend: $(curl -s http://localhost:8000/ | head -c 50)..."
+echo "   - Backend: $(curl -s http://localhost:8000/readyz | head -c 80)..."
 echo "   - Frontend: $(curl -s http://localhost:3000/ | head -c 50)..."
 echo "   - Nginx: $(curl -s http://localhost:80/ | head -c 50)..."
 
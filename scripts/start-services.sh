@@ -16,7 +16,7 @@ User=ubuntu
 WorkingDirectory=/home/ubuntu/app/TechStack.Studio/backend
 Environment="PATH=/home/ubuntu/app/TechStack.Studio/backend/venv/bin"
 Environment="GROQ_API_KEY=${GROQ_API_KEY}"
-ExecStart=/home/ubuntu/app/TechStack.Studio/backend/venv/bin/uvicorn main:app --host 127.0.0.1 --port 8000
+ExecStart=/home/ubuntu/app/TechStack.Studio/backend/venv/bin/python serve.py --host 127.0.0.1 --port 8000
 Restart=always
 RestartSec=10
 